@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "name",
+        "status",
+        "attempts",
+        "run_at",
+        "duration_ms",
+        "created_at",
+    )
+    list_filter = ("status", "name")
+    search_fields = ("name", "idempotency_key")
+    readonly_fields = ("locked_by", "locked_at", "started_at", "finished_at")
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+
+    def ready(self):
+        # Uygulamaların tasks modüllerini yükle (görev kayıt defteri)
+        from django.utils.module_loading import autodiscover_modules
+
+        autodiscover_modules("tasks")
+
+        # OpenAPI uzantılarını kaydet (ClaimsJWTAuthentication şeması)
+        from . import schema  # noqa: F401
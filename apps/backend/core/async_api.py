@@ -0,0 +1,147 @@
+"""
+Building blocks for native async (ASGI) API views.
+
+``async_api_view`` gives a coroutine the parts of DRF's ``APIView`` these
+read endpoints rely on (JWT authentication, throttling, JSON rendering and
+DRF-shaped errors) without running the view in a sync worker thread, and
+``apaginate`` is ``PageNumberPagination`` on top of the async ORM.
+"""
+
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .authentication import user_from_claims
+from .db_router import areplica_allowed, replica_reads
+
+User = get_user_model()
+
+_jwt = JWTAuthentication()
+
+
+def _json(data, status=200):
+    return HttpResponse(
+        JSONRenderer().render(data), status=status, content_type="application/json"
+    )
+
+
+def error_response(exc):
+    """DRF-shaped JSON response for an ``APIException`` raised outside DRF."""
+    data = (
+        exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    )
+    response = _json(data, status=exc.status_code)
+    if isinstance(exc, exceptions.NotAuthenticated):
+        response["WWW-Authenticate"] = _jwt.authenticate_header(None)
+    if getattr(exc, "wait", None):
+        response["Retry-After"] = str(int(exc.wait))
+    return response
+
+
+async def _authenticate(request):
+    """JWTAuthentication without the sync user lookup (claims first)."""
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise exceptions.NotAuthenticated()
+    token = _jwt.get_validated_token(raw_token)
+    user = user_from_claims(token)
+    if user is not None:
+        return user
+    try:
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise exceptions.AuthenticationFailed(
+            "Token contained no recognizable user identification"
+        )
+    try:
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        raise exceptions.AuthenticationFailed("User not found", code="user_not_found")
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+def _check_throttles(request):
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, None):
+            raise exceptions.Throttled(throttle.wait())
+
+
+def async_api_view(fallback=None, replica=False):
+    """Run ``view`` for GET/HEAD with JWT auth, throttling and DRF errors.
+
+    Other methods go to the synchronous ``fallback`` view (405 without one).
+    ``replica`` lets the reads use a read replica (see ``core.db_router``).
+    """
+
+    def decorator(view):
+        # Token-authenticated like the DRF views it stands in for
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                if fallback is None:
+                    return error_response(exceptions.MethodNotAllowed(request.method))
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+            drf_request = Request(request)
+            try:
+                drf_request.user = await _authenticate(request)
+                _check_throttles(drf_request)
+                use_replica = replica and await areplica_allowed(drf_request.user)
+                with replica_reads(use_replica):
+                    return _json(await view(drf_request, *args, **kwargs))
+            except exceptions.APIException as exc:
+                return error_response(exc)
+
+        return wrapper
+
+    return decorator
+
+
+async def apaginate(request, queryset, pagination_class, serializer_class):
+    """``PageNumberPagination`` with the count and the page fetched together."""
+    paginator = pagination_class()
+    page_size = paginator.get_page_size(request)
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    number = paginator.get_page_number(request, django_paginator)
+
+    if str(number).isdigit() and int(number) > 0:
+        offset = (int(number) - 1) * page_size
+        count, rows = await asyncio.gather(
+            queryset.acount(), alist(queryset[offset : offset + page_size])
+        )
+    else:
+        count, rows = await queryset.acount(), None
+
+    django_paginator.__dict__["count"] = count  # Paginator.count is cached
+    try:
+        page = django_paginator.page(number)
+    except InvalidPage as exc:
+        raise exceptions.NotFound(
+            paginator.invalid_page_message.format(page_number=number, message=str(exc))
+        )
+    if rows is None:
+        rows = await alist(page.object_list)
+    page.object_list = rows
+
+    paginator.page, paginator.request = page, request
+    data = serializer_class(rows, many=True).data
+    return paginator.get_paginated_response(data).data
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
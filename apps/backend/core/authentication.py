@@ -0,0 +1,130 @@
+"""
+JWT authentication that reads the user from the token claims.
+
+``UserClaimsRefreshToken`` adds ``CLAIM_FIELDS`` to the tokens at login and
+``ClaimsTokenRefreshSerializer`` rewrites them from the user on every
+refresh, so a change (premium, privacy, staff) shows up in the next access
+token and an inactive user can no longer refresh.
+
+``ClaimsJWTAuthentication`` answers safe requests with ``user_from_claims``:
+a ``User`` built from the claims without a query. Its other fields are
+deferred, so reading one (``username``, ``email``, ...) loads it from the
+database like ``.only()`` would. Writes get the full user from a short-lived
+cache (``AUTH_USER_CACHE_SECONDS``), which ``invalidate_user`` drops when the
+profile changes. Views that must see the current row (``me``, password
+change, admin tools) keep SimpleJWT's ``JWTAuthentication`` in their
+``authentication_classes``.
+
+Claims are as fresh as the access token: a deactivated user keeps read
+access until it expires (``ACCESS_TOKEN_LIFETIME``).
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+CLAIM_FIELDS = ("is_staff", "is_superuser", "is_premium", "is_private")
+
+
+def _key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def cached_user(user_id):
+    """The user row, cached for ``AUTH_USER_CACHE_SECONDS`` (None if missing)."""
+    key = _key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None:
+            return None
+        cache.set(key, user, timeout=settings.AUTH_USER_CACHE_SECONDS)
+    return user
+
+
+def invalidate_user(user_id):
+    cache.delete(_key(user_id))
+
+
+def set_user_claims(token, user):
+    for name in CLAIM_FIELDS:
+        token[name] = getattr(user, name)
+    return token
+
+
+def user_from_claims(token):
+    """A ``User`` with the id and claim fields loaded, or None without claims."""
+    try:
+        values = [token[api_settings.USER_ID_CLAIM]]
+        values += [token[name] for name in CLAIM_FIELDS]
+    except KeyError:
+        return None
+    # Only active users get tokens; the rest of the fields stay deferred
+    field_names = [api_settings.USER_ID_FIELD, *CLAIM_FIELDS, "is_active"]
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, [*values, True])
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        return set_user_claims(super().for_user(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = UserClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = cached_user(refresh.get(api_settings.USER_ID_CLAIM))
+        if user is None or not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        set_user_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """Claims user for safe requests, cached user for writes."""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS:
+            user = user_from_claims(validated_token)
+            if user is not None:
+                return user, validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        user = cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
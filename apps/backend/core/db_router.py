@@ -0,0 +1,116 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Only views that opt in with ``ReplicaReadsMixin`` read from a replica, and
+only for safe methods after authentication has run; everything else (auth
+lookups, writes, admin, management commands) stays on ``default``.
+
+After a successful unsafe request (like, comment, follow, profile edit, ...)
+``PrimaryStickinessMiddleware`` pins the user to the primary for
+``DB_REPLICA_PIN_SECONDS`` so their next reads see their own writes even if
+the replica lags. Pins are stored in the default cache; use a shared cache
+backend when running more than one process.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = "default"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def _pin_key(user_id):
+    return f"db:pin-primary:{user_id}"
+
+
+def pin_to_primary(user_id):
+    cache.set(_pin_key(user_id), True, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(_pin_key(user_id)))
+
+
+async def areplica_allowed(user):
+    """Async counterpart of ``ReplicaReadsMixin`` for native async views."""
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return not (user.is_authenticated and await cache.aget(_pin_key(user.id)))
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    # sync_to_async copies the context, so async ORM calls see this too
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        # Explicit: instances loaded from a replica must not drag reads there
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaReadsMixin:
+    """Let a DRF view serve safe requests from a read replica.
+
+    ``replica_read_actions`` limits it to some viewset actions
+    (``None`` means every safe request of the view).
+    """
+
+    replica_read_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self._replica_allowed(request):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def _replica_allowed(self, request):
+        if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return False
+        actions = self.replica_read_actions
+        if actions is not None and getattr(self, "action", None) not in actions:
+            return False
+        user = request.user
+        return not (user and user.is_authenticated and is_pinned(user.id))
+
+
+class PrimaryStickinessMiddleware:
+    """Pin users to the primary for a few seconds after they write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # DRF stores the token-authenticated user back on the HttpRequest
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.id)
+        return response
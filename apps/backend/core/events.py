@@ -0,0 +1,219 @@
+"""
+Server-sent events: per-user push channel on the ASGI application.
+
+``GET /api/events/?ticket=<ticket>`` keeps a ``text/event-stream`` open and
+forwards every message published to the user's channel as an SSE event
+(``event: <type>``, ``data: <json>``), with a keepalive comment every
+``EVENTS_KEEPALIVE_SECONDS``. EventSource cannot send an Authorization
+header, so clients first ``POST /api/events/ticket/`` with their token and
+open the stream with the ticket it returns: random, valid for
+``EVENTS_TICKET_SECONDS`` and consumed by the first connection, so the URL
+(and server logs holding it) never carries a reusable credential.
+
+The stream holds its connection for as long as the client stays, which only
+an event loop can afford: both routes are registered with
+``ASYNC_SOCIAL_VIEWS`` (on under ``core.asgi``), and the stream answers 501
+to a request that did not come through ASGI rather than pin a WSGI worker.
+
+Publishers call ``publish(user_id, event, data)`` from any thread (sync views,
+signal handlers); delivery goes through the broker named by
+``EVENTS_BROKER``. ``InMemoryBroker`` only reaches clients connected to the
+same process; a deployment with several ASGI workers plugs in a shared
+broker (e.g. Redis pub/sub) implementing ``Broker``. Events carry ids, not
+rendered objects: clients refetch what they display.
+"""
+
+import asyncio
+import json
+import secrets
+import threading
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .async_api import error_response
+
+
+class Broker:
+    """Fan-out of JSON-serializable messages to per-channel subscribers."""
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Return a ``Subscription``; called on the subscriber's event loop."""
+        raise NotImplementedError
+
+
+class Subscription:
+    async def get(self):
+        """Wait for the next message."""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class _LocalSubscription(Subscription):
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        # Runs on the subscriber's loop; a stalled client loses the oldest
+        # messages rather than growing without bound
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker._remove(self)
+
+
+class InMemoryBroker(Broker):
+    """Process-local broker; also the stand-in for tests."""
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.deliver, message)
+            except RuntimeError:  # loop already closed
+                self._remove(sub)
+
+    def subscribe(self, channel):
+        sub = _LocalSubscription(self, channel, self.maxsize)
+        with self._lock:
+            self._subscribers[channel].add(sub)
+        return sub
+
+    def _remove(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+@cache
+def get_broker():
+    return import_string(settings.EVENTS_BROKER)()
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def publish(user_id, event, data):
+    get_broker().publish(user_channel(user_id), {"type": event, **data})
+
+
+def publish_many(user_ids, event, data):
+    broker = get_broker()
+    message = {"type": event, **data}
+    for user_id in user_ids:
+        broker.publish(user_channel(user_id), message)
+
+
+def _format(message):
+    return f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+
+async def _stream(channel):
+    subscription = get_broker().subscribe(channel)
+    try:
+        # Reconnect delay hint for EventSource
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS
+                )
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _format(message)
+    finally:
+        subscription.close()
+
+
+class StreamUnavailable(exceptions.APIException):
+    status_code = 501
+    default_detail = "Event streams are only served by the ASGI application."
+    default_code = "stream_unavailable"
+
+
+def _ticket_key(ticket):
+    return f"events:ticket:{ticket}"
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def event_ticket(request):
+    """One-time ticket that opens the caller's event stream."""
+    ticket = secrets.token_urlsafe(32)
+    django_cache.set(
+        _ticket_key(ticket), request.user.id, timeout=settings.EVENTS_TICKET_SECONDS
+    )
+    return Response({"ticket": ticket, "expires_in": settings.EVENTS_TICKET_SECONDS})
+
+
+async def _redeem(ticket):
+    """The ticket's user id, once; a replayed or expired ticket fails."""
+    key = _ticket_key(ticket)
+    user_id = await django_cache.aget(key)
+    # Only the connection whose delete removed the key gets the stream
+    if user_id is None or not await django_cache.adelete(key):
+        raise exceptions.AuthenticationFailed(
+            "Invalid or expired stream ticket", code="invalid_ticket"
+        )
+    return user_id
+
+
+@csrf_exempt
+async def event_stream(request):
+    if not isinstance(request, ASGIRequest):
+        return error_response(StreamUnavailable())
+    if request.method != "GET":
+        return error_response(exceptions.MethodNotAllowed(request.method))
+    ticket = request.GET.get("ticket")
+    if not ticket:
+        return error_response(exceptions.NotAuthenticated())
+    try:
+        user_id = await _redeem(ticket)
+    except exceptions.APIException as exc:
+        return error_response(exc)
+
+    response = StreamingHttpResponse(
+        _stream(user_channel(user_id)), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Disable proxy buffering (nginx) so events are flushed immediately
+    response["X-Accel-Buffering"] = "no"
+    return response
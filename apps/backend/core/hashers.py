@@ -0,0 +1,117 @@
+"""
+Password hashers with configurable cost and a bounded hashing pool.
+
+``PASSWORD_HASHER`` picks the algorithm new hashes use: ``scrypt`` (the
+default, standard library), ``argon2`` (needs ``argon2-cffi``) or
+``pbkdf2``. The other two stay in ``PASSWORD_HASHERS`` to check existing
+hashes, and Django rehashes a password with the preferred algorithm and cost
+the next time it is checked successfully (on login), so changing either
+needs no migration.
+
+Hashing is CPU-bound and releases the GIL (hashlib, argon2-cffi). These
+hashers run it on ``PASSWORD_HASHING_WORKERS`` threads, so a login burst
+uses at most that many cores and the request threads stay free for other
+requests; up to ``PASSWORD_HASHING_QUEUE`` more hashes wait for a thread.
+Beyond that, code running under ``reject_when_busy()`` (the login API) gets
+``HashingBusy``, which DRF answers with 503 and ``Retry-After`` instead of
+queueing without bound. Everywhere else (admin login, ``createsuperuser``,
+``changepassword``, other views) the hash runs inline on the caller's
+thread, since a DRF exception there would end up as a 500.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import exceptions
+
+_lock = threading.Lock()
+_local = threading.local()
+_pool = None
+_slots = None
+_reject_when_busy = ContextVar("reject_when_busy", default=False)
+
+
+class HashingBusy(exceptions.APIException):
+    status_code = 503
+    default_detail = "Too many password checks in progress, try again shortly."
+    default_code = "hashing_busy"
+    wait = 1  # DRF sends it as Retry-After
+
+
+def _executor():
+    global _pool, _slots
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                workers = settings.PASSWORD_HASHING_WORKERS
+                _slots = threading.BoundedSemaphore(
+                    workers + settings.PASSWORD_HASHING_QUEUE
+                )
+                _pool = ThreadPoolExecutor(workers, "password-hashing")
+    return _pool
+
+
+def _in_pool(func, *args):
+    _local.active = True
+    try:
+        return func(*args)
+    finally:
+        _local.active = False
+
+
+@contextmanager
+def reject_when_busy():
+    """Raise ``HashingBusy`` in the block when the hashing pool is full."""
+    token = _reject_when_busy.set(True)
+    try:
+        yield
+    finally:
+        _reject_when_busy.reset(token)
+
+
+def run_hashing(func, *args):
+    """``func(*args)`` on the hashing pool.
+
+    When the pool is full it raises ``HashingBusy`` under
+    ``reject_when_busy()`` and runs ``func`` inline otherwise.
+    """
+    if getattr(_local, "active", False):
+        return func(*args)  # verify() calls encode() on the pool thread
+    pool = _executor()
+    if not _slots.acquire(blocking=False):
+        if _reject_when_busy.get():
+            raise HashingBusy()
+        return func(*args)
+    try:
+        return pool.submit(_in_pool, func, *args).result()
+    finally:
+        _slots.release()
+
+
+class PooledHashingMixin:
+    def encode(self, password, salt, *args):
+        return run_hashing(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return run_hashing(super().verify, password, encoded)
+
+    def harden_runtime(self, password, encoded):
+        return run_hashing(super().harden_runtime, password, encoded)
+
+
+class ScryptPasswordHasher(PooledHashingMixin, hashers.ScryptPasswordHasher):
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+
+class Argon2PasswordHasher(PooledHashingMixin, hashers.Argon2PasswordHasher):
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_KB
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class PBKDF2PasswordHasher(PooledHashingMixin, hashers.PBKDF2PasswordHasher):
+    pass
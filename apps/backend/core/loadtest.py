@@ -0,0 +1,468 @@
+"""
+Load generator replaying the API collections as weighted user scenarios.
+
+Requests come from the collections shipped in the repo root, keyed by
+``"<group>: <name>"``:
+
+- ``api.http`` (REST Client format: ``@var = value`` lines, ``### name``
+  separated requests),
+- Postman v2.1 collections (folders become the group),
+- JSON lines with ``name``, ``method``, ``url`` and optional ``headers`` /
+  ``body`` (lines without ``method`` and ``url`` are ignored).
+
+``{{var}}`` placeholders are filled from the file's variables and each
+virtual user's session: ``username``/``password`` of its account, the
+tokens and ``user_id`` from the last login/refresh, and ids picked from
+earlier responses (``post`` from the feed, ``list``/``item`` from the
+user's todo lists; see ``CAPTURES``). A step whose placeholder has no value
+yet is skipped.
+
+Each virtual user logs in, then keeps picking a scenario by weight and
+running its steps until the deadline. The access token is refreshed shortly
+before it expires, and once after a 401; if the refresh fails the user logs
+in again. Requests go over one keep-alive HTTP/1.1 connection per virtual
+user (plain asyncio streams, no client library needed).
+"""
+
+import asyncio
+import base64
+import json
+import random
+import re
+import statistics
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+LOGIN = "Auth: Login"
+REFRESH = "Auth: Refresh"
+
+# name -> (weight, steps)
+SCENARIOS = {
+    "engage": (4, ["Posts: Feed", "Posts: Like", "Posts: Comment"]),
+    "browse": (4, ["Posts: Feed", "Posts: List", "Auth: Me"]),
+    "todos": (2, ["Todos: My lists", "Todos: Toggle item"]),
+}
+
+# Refresh the access token this many seconds before it expires
+REFRESH_MARGIN = 30
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class CollectionError(Exception):
+    pass
+
+
+class MissingVariable(Exception):
+    pass
+
+
+# -- Collections -------------------------------------------------------------
+
+
+def _request(method, url, headers, body):
+    return {"method": method.upper(), "url": url, "headers": headers, "body": body}
+
+
+def parse_http_file(text):
+    """``(variables, requests)`` of a REST Client ``.http`` file."""
+    variables, requests = {}, {}
+    for n, block in enumerate(re.split(r"^###", text, flags=re.M)):
+        lines = block.splitlines()
+        name = lines.pop(0).strip() if n else ""
+        request_line, headers, body = None, {}, None
+        for line in lines:
+            stripped = line.strip()
+            if body is not None:
+                body.append(line)
+            elif request_line is None:
+                if match := re.match(r"@(\w+)\s*=\s*(.*)", stripped):
+                    variables[match[1]] = match[2].strip()
+                elif stripped and not stripped.startswith(("#", "//")):
+                    request_line = stripped.split()
+            elif not stripped:  # blank line ends the headers
+                body = []
+            elif ":" in stripped:
+                key, value = stripped.split(":", 1)
+                headers[key.strip()] = value.strip()
+        if request_line is None:
+            continue
+        method, url = request_line[:2]
+        body = "\n".join(body or []).strip() or None
+        requests[name or f"{method} {url}"] = _request(method, url, headers, body)
+    return variables, requests
+
+
+def parse_postman(data):
+    """``(variables, requests)`` of a Postman v2.1 collection."""
+    variables = {v["key"]: v.get("value", "") for v in data.get("variable", [])}
+    requests = {}
+
+    def walk(items, group):
+        for item in items:
+            name = f"{group}: {item['name']}" if group else item["name"]
+            if "item" in item:
+                walk(item["item"], name)
+                continue
+            req = item["request"]
+            url = req["url"]["raw"] if isinstance(req["url"], dict) else req["url"]
+            headers = {
+                h["key"]: h["value"]
+                for h in req.get("header", [])
+                if not h.get("disabled")
+            }
+            body = (req.get("body") or {}).get("raw")
+            requests[name] = _request(req["method"], url, headers, body)
+
+    walk(data.get("item", []), "")
+    return variables, requests
+
+
+def parse_jsonl(text):
+    """``(variables, requests)`` of a JSON-lines request list."""
+    requests = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if not isinstance(entry, dict) or not {"method", "url"} <= entry.keys():
+            continue
+        body = entry.get("body")
+        if body is not None and not isinstance(body, str):
+            body = json.dumps(body)
+        name = entry.get("name") or f"{entry['method']} {entry['url']}"
+        requests[name] = _request(
+            entry["method"], entry["url"], entry.get("headers") or {}, body
+        )
+    return {}, requests
+
+
+def load_collection(path):
+    path = Path(path)
+    text = path.read_text()
+    if path.suffix == ".http":
+        variables, requests = parse_http_file(text)
+    elif path.suffix == ".jsonl":
+        variables, requests = parse_jsonl(text)
+    else:
+        variables, requests = parse_postman(json.loads(text))
+    if not requests:
+        raise CollectionError(f"No HTTP requests in {path}")
+    return variables, requests
+
+
+def load_collections(paths):
+    """Merge collections; later files override requests of the same name."""
+    variables, requests = {}, {}
+    for path in paths:
+        file_variables, file_requests = load_collection(path)
+        variables.update({k: v for k, v in file_variables.items() if v})
+        requests.update(file_requests)
+    return variables, requests
+
+
+def render(template, variables):
+    def value(match):
+        found = variables.get(match[1])
+        if found in (None, ""):
+            raise MissingVariable(match[1])
+        return str(found)
+
+    return _PLACEHOLDER.sub(value, template) if template else template
+
+
+# -- Captures ----------------------------------------------------------------
+
+
+def _jwt_claims(token):
+    payload = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+def _capture_tokens(data, rng):
+    found = {key: data[key] for key in ("access", "refresh") if data.get(key)}
+    if "access" in found:
+        claims = _jwt_claims(found["access"])
+        found.update(user_id=claims.get("user_id"), access_exp=claims.get("exp"))
+    return found
+
+
+def _capture_post(data, rng):
+    ids = [post["id"] for post in data.get("results", [])]
+    return {"post": rng.choice(ids)} if ids else {}
+
+
+def _capture_todo(data, rng):
+    lists = data.get("results", data) if isinstance(data, dict) else data
+    found = {}
+    if lists:
+        todo_list = rng.choice(lists)
+        found["list"] = todo_list["id"]
+        items = [item["id"] for item in todo_list.get("items", [])]
+        if items:
+            found["item"] = rng.choice(items)
+    return found
+
+
+# request name -> callable(json, rng) returning session variables
+CAPTURES = {
+    LOGIN: _capture_tokens,
+    REFRESH: _capture_tokens,
+    "Posts: Feed": _capture_post,
+    "Posts: List": _capture_post,
+    "Todos: My lists": _capture_todo,
+}
+
+
+# -- HTTP --------------------------------------------------------------------
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client over asyncio streams."""
+
+    def __init__(self, host, port, timeout):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.reader = self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers, body):
+        """``(status, body bytes)``; reconnects once if a kept-alive socket died."""
+        for retry in (True, False):
+            reused = self.writer is not None
+            if not reused:
+                self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout
+                )
+            try:
+                return await asyncio.wait_for(
+                    self._exchange(method, path, headers, body), self.timeout
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if not (reused and retry):
+                    raise
+            except BaseException:
+                self.close()
+                raise
+
+    async def _exchange(self, method, path, headers, body):
+        payload = body.encode() if body else b""
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        head += [f"{key}: {value}" for key, value in headers.items()]
+        head.append(f"Content-Length: {len(payload)}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            key, _, value = line.decode("latin-1").partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+
+        if "content-length" in response_headers:
+            data = await self.reader.readexactly(
+                int(response_headers["content-length"])
+            )
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while size := int((await self.reader.readline()).split(b";")[0], 16):
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            await self.reader.readline()
+            data = b"".join(chunks)
+        else:
+            data = await self.reader.read()
+            response_headers["connection"] = "close"
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, data
+
+
+# -- Runner ------------------------------------------------------------------
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.skipped = Counter()
+
+    def record(self, name, elapsed, status):
+        self.latencies[name].append(elapsed)
+        self.statuses[name][status] += 1
+
+    def summary(self, duration):
+        def describe(latencies, statuses):
+            latencies = sorted(latencies)
+            errors = sum(
+                n for s, n in statuses.items() if not isinstance(s, int) or s >= 400
+            )
+            return {
+                "requests": len(latencies),
+                "throughput": round(len(latencies) / duration, 2),
+                "error_rate": round(errors / len(latencies), 4),
+                "p50_ms": round(statistics.median(latencies) * 1000, 2),
+                "p90_ms": round(_percentile(latencies, 0.90) * 1000, 2),
+                "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+                "max_ms": round(latencies[-1] * 1000, 2),
+                "statuses": {str(s): n for s, n in sorted(statuses.items(), key=str)},
+            }
+
+        every = [x for values in self.latencies.values() for x in values]
+        overall = Counter()
+        for statuses in self.statuses.values():
+            overall.update(statuses)
+        return {
+            "duration_s": round(duration, 2),
+            "total": describe(every, overall) if every else {"requests": 0},
+            "requests": {
+                name: describe(self.latencies[name], self.statuses[name])
+                for name in sorted(self.latencies)
+            },
+            "skipped": dict(self.skipped),
+        }
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class VirtualUser:
+    def __init__(self, runner, number, account):
+        self.runner = runner
+        self.rng = random.Random(runner.seed * 100_003 + number)
+        username, password = account
+        self.variables = {
+            **runner.variables,
+            "baseUrl": runner.base_url,
+            "username": username,
+            "password": password,
+        }
+        self.conn = Connection(runner.host, runner.port, runner.timeout)
+
+    async def run(self, deadline):
+        try:
+            while time.monotonic() < deadline:
+                if not self.variables.get("access"):
+                    if not await self.call(LOGIN, authenticate=False):
+                        await asyncio.sleep(1)  # e.g. throttled; back off
+                        continue
+                steps = self.runner.pick_scenario(self.rng)
+                for step in steps:
+                    if time.monotonic() >= deadline:
+                        break
+                    await self.call(step)
+                    if self.runner.think_time:
+                        await asyncio.sleep(self.rng.uniform(0, self.runner.think_time))
+        finally:
+            self.conn.close()
+
+    async def call(self, name, authenticate=True):
+        """Send request ``name``; returns True on a 2xx response."""
+        if authenticate and self.access_expiring():
+            await self.refresh()
+        status, data = await self.send(name)
+        if status == 401 and authenticate:
+            await self.refresh()
+            status, data = await self.send(name)
+        ok = isinstance(status, int) and status < 300
+        if ok and name in CAPTURES and data:
+            try:
+                self.variables.update(CAPTURES[name](json.loads(data), self.rng))
+            except (ValueError, KeyError, TypeError, IndexError):
+                pass
+        return ok
+
+    def access_expiring(self):
+        exp = self.variables.get("access_exp")
+        return exp is not None and exp - time.time() < REFRESH_MARGIN
+
+    async def refresh(self):
+        if not self.variables.get("refresh") or not await self.call(
+            REFRESH, authenticate=False
+        ):
+            self.variables["access"] = ""
+            await self.call(LOGIN, authenticate=False)
+
+    async def send(self, name):
+        template = self.runner.requests[name]
+        try:
+            url = urlsplit(render(template["url"], self.variables))
+            headers = {
+                key: render(value, self.variables)
+                for key, value in template["headers"].items()
+            }
+            body = render(template["body"], self.variables)
+        except MissingVariable as missing:
+            self.runner.stats.skipped[f"{name} (no {missing})"] += 1
+            return None, None
+        path = url.path + (f"?{url.query}" if url.query else "")
+        started = time.perf_counter()
+        try:
+            status, data = await self.conn.request(
+                template["method"], path, headers, body
+            )
+        except asyncio.TimeoutError:
+            status, data = "timeout", None
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status, data = "error", None
+        self.runner.stats.record(name, time.perf_counter() - started, status)
+        return status, data
+
+
+class LoadTest:
+    def __init__(
+        self,
+        url,
+        collections,
+        accounts,
+        scenarios=None,
+        seed=0,
+        think_time=0.0,
+        timeout=30.0,
+    ):
+        parts = urlsplit(url)
+        self.base_url = url.rstrip("/")
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.variables, self.requests = load_collections(collections)
+        self.scenarios = scenarios or SCENARIOS
+        needed = {LOGIN, REFRESH} | {
+            step for _, steps in self.scenarios.values() for step in steps
+        }
+        missing = sorted(needed - self.requests.keys())
+        if missing:
+            raise CollectionError(f"Requests missing from the collections: {missing}")
+        self.accounts = accounts
+        self.seed = seed
+        self.think_time = think_time
+        self.timeout = timeout
+        self.stats = Stats()
+        self._names = list(self.scenarios)
+        self._weights = [self.scenarios[name][0] for name in self._names]
+
+    def pick_scenario(self, rng):
+        name = rng.choices(self._names, self._weights)[0]
+        return self.scenarios[name][1]
+
+    async def run(self, concurrency, duration, ramp_up=0.0):
+        started = time.monotonic()
+        deadline = started + duration
+
+        async def start(number):
+            if ramp_up:
+                await asyncio.sleep(ramp_up * number / concurrency)
+            account = self.accounts[number % len(self.accounts)]
+            await VirtualUser(self, number, account).run(deadline)
+
+        await asyncio.gather(*(start(n) for n in range(concurrency)))
+        return self.stats.summary(time.monotonic() - started)
@@ -0,0 +1,436 @@
+"""
+Latency, queries and memory of the main API endpoints, with baselines.
+
+Seeds an ``apibench_*`` fixture (users following each other, posts,
+comments, likes, albums with photos, todo lists with items), then runs each
+scenario in ``SCENARIOS`` through one or both drivers:
+
+- ``client``: DRF's ``APIClient`` in this process. Every request is timed;
+  afterwards ``--profile`` extra requests per scenario record the queries
+  (``CaptureQueriesContext``) and the peak Python allocation (tracemalloc),
+  which would skew the timings if measured on the same requests.
+- ``server``: a single-worker gunicorn ``core.wsgi`` server on
+  ``--port``, driven sequentially over one keep-alive connection. Memory is
+  the server's resident set size after the scenario (from ``/proc``).
+
+``--output results.json`` saves the results; ``--baseline results.json``
+compares against an earlier run and flags scenarios whose latency or memory
+grew more than ``--tolerance`` or whose query count grew at all.
+``--fail-on-regression`` turns flagged regressions into a non-zero exit.
+
+Requests are spread over the fixture users so the per-user throttle does
+not kick in; the fixture is removed afterwards.
+"""
+
+import http.client
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from core.authentication import UserClaimsRefreshToken
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from social import follow_graph
+from social.management.commands.bench_asgi_wsgi import _wait_for_port
+from social.models import Album, Comment, Follow, Like, Photo, Post
+from todos.models import TodoItem, TodoList
+from todos.signals import progress_signals_suspended
+
+User = get_user_model()
+
+PREFIX = "apibench_"
+PASSWORD = "apibench-password"
+
+# name -> (method, path, body); {post} is a post of another fixture user,
+# {n} the request number
+SCENARIOS = {
+    "feed": ("GET", "/api/feed/posts", None),
+    "posts": ("GET", "/api/posts/", None),
+    "my_posts": ("GET", "/api/my-posts", None),
+    "albums": ("GET", "/api/albums/", None),
+    "todo_lists": ("GET", "/api/todos/todo-lists/", None),
+    "user_search": ("GET", f"/api/users/?q={PREFIX}1", None),
+    "login": ("POST", "/api/auth/login/", {"password": PASSWORD}),
+    "like": ("POST", "/api/posts/{post}/like/", None),
+    "comment": ("POST", "/api/posts/{post}/comments/", {"body": "bench {n}"}),
+}
+EXPECTED_STATUS = {"comment": 201}
+
+# Metrics compared against the baseline; queries are exact counts
+COMPARED = ("p50_ms", "p95_ms", "peak_kb", "rss_kb")
+
+
+def _server_command(port):
+    return [
+        sys.executable, "-m", "gunicorn", "core.wsgi:application",
+        "--bind", f"127.0.0.1:{port}", "--workers", "1",
+        "--log-level", "warning",
+    ]  # fmt: skip
+
+
+def _rss_kb(pid):
+    """Resident set size of ``pid`` and its children (gunicorn workers)."""
+    pids = [pid]
+    try:
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+        pids += [int(child) for child in children]
+        total = 0
+        for p in pids:
+            for line in Path(f"/proc/{p}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+        return total
+    except (OSError, ValueError):  # no /proc (macOS) or process gone
+        return None
+
+
+def _summary(latencies, errors):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of ``results`` against ``baseline`` as readable strings."""
+    regressions = []
+    for mode, scenarios in results.items():
+        for name, current in scenarios.items():
+            before = baseline.get(mode, {}).get(name)
+            if not before:
+                continue
+            if (current.get("queries") or 0) > (before.get("queries") or 0):
+                regressions.append(
+                    f"{mode}/{name}: queries {before['queries']} -> {current['queries']}"
+                )
+            for metric in COMPARED:
+                old, new = before.get(metric), current.get(metric)
+                if old and new and new > old * (1 + tolerance):
+                    regressions.append(
+                        f"{mode}/{name}: {metric} {old} -> {new} "
+                        f"(+{(new / old - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "Benchmark API latency, queries and memory; compare with a baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--posts-per-user", type=int, default=10)
+        parser.add_argument("--follows-per-user", type=int, default=10)
+        parser.add_argument("--comments-per-post", type=int, default=2)
+        parser.add_argument("--likes-per-post", type=int, default=3)
+        parser.add_argument("--albums-per-user", type=int, default=2)
+        parser.add_argument("--photos-per-album", type=int, default=5)
+        parser.add_argument("--todo-lists-per-user", type=int, default=3)
+        parser.add_argument("--items-per-list", type=int, default=5)
+        parser.add_argument("--requests", type=int, default=100, help="Per scenario")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--profile",
+            type=int,
+            default=5,
+            help="Extra client requests per scenario recording queries and memory",
+        )
+        parser.add_argument(
+            "--driver", action="append", choices=["client", "server"], default=[]
+        )
+        parser.add_argument(
+            "--scenario", action="append", choices=list(SCENARIOS), default=[]
+        )
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--baseline", help="Compare with this results file")
+        parser.add_argument("--tolerance", type=float, default=0.25)
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(
+                f"{PREFIX}* users exist (interrupted run?); delete them first"
+            )
+        scenarios = options["scenario"] or list(SCENARIOS)
+        drivers = options["driver"] or ["client", "server"]
+        started = time.perf_counter()
+        try:
+            users, posts = self.create_fixture(options)
+            self.stdout.write(
+                f"Fixture: {len(users)} users, {len(posts)} posts "
+                f"({time.perf_counter() - started:.1f}s)"
+            )
+            clients = [self.client_for(u, n, posts) for n, u in enumerate(users)]
+            results = {}
+            for driver in drivers:
+                run = self.run_client if driver == "client" else self.run_server
+                results[driver] = run(scenarios, clients, options)
+        finally:
+            with progress_signals_suspended():
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+        for driver, scenario_results in results.items():
+            self.report(driver, scenario_results)
+        if options["output"]:
+            self.save(options["output"], results, options)
+        if options["baseline"]:
+            self.check_baseline(results, options)
+
+    def create_fixture(self, options):
+        count = options["users"]
+        password = make_password(PASSWORD)  # one hash for everyone
+        User.objects.bulk_create(
+            User(
+                username=f"{PREFIX}{i}",
+                email=f"{PREFIX}{i}@example.test",
+                password=password,
+            )
+            for i in range(count)
+        )
+        users = list(User.objects.filter(username__startswith=PREFIX).order_by("id"))
+        follows = min(count - 1, options["follows_per_user"])
+        Follow.objects.bulk_create(
+            Follow(follower=u, followed=users[(i + k) % count], status="accepted")
+            for i, u in enumerate(users)
+            for k in range(1, follows + 1)
+        )
+        follow_graph.recount(User.objects.filter(username__startswith=PREFIX))
+        Post.objects.bulk_create(
+            Post(
+                user=u,
+                title=f"bench {n}",
+                body="bench",
+                visibility=("public", "followers")[n % 2],
+            )
+            for u in users
+            for n in range(options["posts_per_user"])
+        )
+        posts = list(
+            Post.objects.filter(user__in=users)
+            .order_by("id")
+            .values_list("id", "user", "visibility")
+        )
+        index = {u.id: i for i, u in enumerate(users)}
+        # Comments and likes come from the author's followers
+        Comment.objects.bulk_create(
+            Comment(
+                post_id=post_id,
+                user=users[(index[author] - k) % count],
+                body=f"comment {k}",
+            )
+            for post_id, author, _ in posts
+            for k in range(1, options["comments_per_post"] + 1)
+        )
+        Like.objects.bulk_create(
+            Like(post_id=post_id, user=users[(index[author] - k) % count])
+            for post_id, author, _ in posts
+            for k in range(1, min(count - 1, options["likes_per_post"]) + 1)
+        )
+        Album.objects.bulk_create(
+            Album(user=u, title=f"album {n}")
+            for u in users
+            for n in range(options["albums_per_user"])
+        )
+        Photo.objects.bulk_create(
+            Photo(album=album, title=f"photo {n}", url=f"https://example.test/{n}.jpg")
+            for album in Album.objects.filter(user__in=users)
+            for n in range(options["photos_per_album"])
+        )
+        TodoList.objects.bulk_create(
+            TodoList(user=u, name=f"list {n}")
+            for u in users
+            for n in range(options["todo_lists_per_user"])
+        )
+        TodoItem.objects.bulk_create(
+            TodoItem(list=todo_list, title=f"item {n}", is_done=n % 2 == 0)
+            for todo_list in TodoList.objects.filter(user__in=users)
+            for n in range(options["items_per_list"])
+        )
+        return users, posts
+
+    def client_for(self, user, n, posts):
+        """Token, username and public posts by others for each user."""
+        public = [
+            post_id
+            for post_id, author, visibility in posts
+            if visibility == "public" and author != user.id
+        ]
+        return {
+            "token": str(UserClaimsRefreshToken.for_user(user).access_token),
+            "username": user.username,
+            "posts": public[n % len(public) :] + public[: n % len(public)],
+        }
+
+    def request_args(self, name, n, clients):
+        """(method, path, body, token) of request ``n`` of a scenario."""
+        client = clients[n % len(clients)]
+        method, path, body = SCENARIOS[name]
+        # Cycle through posts so likes are mostly new rows
+        post = client["posts"][(n // len(clients)) % len(client["posts"])]
+        path = path.format(post=post, n=n)
+        if body is not None:
+            body = {k: str(v).format(n=n) for k, v in body.items()}
+        if name == "login":
+            return method, path, {**body, "username": client["username"]}, None
+        return method, path, body, client["token"]
+
+    # -- Test client ---------------------------------------------------------
+
+    def run_client(self, scenarios, clients, options):
+        api = APIClient()
+        results = {}
+        for name in scenarios:
+            cache.clear()  # throttle history
+
+            def call(n):
+                method, path, body, token = self.request_args(name, n, clients)
+                if token:
+                    api.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+                else:
+                    api.credentials()
+                return getattr(api, method.lower())(path, body, format="json")
+
+            expected = EXPECTED_STATUS.get(name, 200)
+            total = options["warmup"] + options["requests"]
+            latencies, errors = [], 0
+            for n in range(total):
+                started = time.perf_counter()
+                resp = call(n)
+                elapsed = time.perf_counter() - started
+                if n >= options["warmup"]:
+                    latencies.append(elapsed)
+                    errors += resp.status_code != expected
+
+            queries, peaks = [], []
+            for n in range(total, total + options["profile"]):
+                tracemalloc.start()
+                try:
+                    with CaptureQueriesContext(connection) as captured:
+                        call(n)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+                queries.append(len(captured.captured_queries))
+
+            results[name] = _summary(latencies, errors)
+            if queries:
+                results[name]["queries"] = max(queries)
+                results[name]["peak_kb"] = round(max(peaks) / 1024)
+        api.credentials()
+        return results
+
+    # -- Local server --------------------------------------------------------
+
+    def run_server(self, scenarios, clients, options):
+        port = options["port"]
+        server = subprocess.Popen(
+            _server_command(port), cwd=settings.BASE_DIR, env=dict(os.environ)
+        )
+        try:
+            _wait_for_port(port)
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            results = {}
+            for name in scenarios:
+                expected = EXPECTED_STATUS.get(name, 200)
+                latencies, errors = [], 0
+                total = options["warmup"] + options["requests"]
+                for n in range(total):
+                    method, path, body, token = self.request_args(name, n, clients)
+                    headers = {"Content-Type": "application/json"}
+                    if token:
+                        headers["Authorization"] = f"Bearer {token}"
+                    payload = json.dumps(body) if body is not None else None
+                    started = time.perf_counter()
+                    try:
+                        conn.request(method, path, body=payload, headers=headers)
+                        resp = conn.getresponse()
+                        resp.read()
+                        ok = resp.status == expected
+                    except (OSError, http.client.HTTPException):
+                        ok = False
+                        conn.close()
+                        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                    elapsed = time.perf_counter() - started
+                    if n >= options["warmup"]:
+                        latencies.append(elapsed)
+                        errors += not ok
+                results[name] = _summary(latencies, errors)
+                results[name]["rss_kb"] = _rss_kb(server.pid)
+            conn.close()
+            return results
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    # -- Results -------------------------------------------------------------
+
+    def report(self, driver, results):
+        self.stdout.write(f"\n{driver}:")
+        for name, r in results.items():
+            memory = (
+                f"peak={r['peak_kb']:6d}KB"
+                if r.get("peak_kb") is not None
+                else f"rss={r['rss_kb'] or 0:7d}KB"
+            )
+            queries = f"queries={r['queries']:3d}  " if "queries" in r else ""
+            self.stdout.write(
+                f"  {name:12s} p50={r['p50_ms']:7.2f}ms  p95={r['p95_ms']:7.2f}ms  "
+                f"{queries}{memory}  errors={r['errors']}"
+            )
+
+    def save(self, path, results, options):
+        data = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "fixture": {
+                    key: options[key]
+                    for key in (
+                        "users",
+                        "posts_per_user",
+                        "follows_per_user",
+                        "comments_per_post",
+                        "likes_per_post",
+                        "albums_per_user",
+                        "photos_per_album",
+                        "todo_lists_per_user",
+                        "items_per_list",
+                    )
+                },
+                "requests": options["requests"],
+            },
+            "results": results,
+        }
+        Path(path).write_text(json.dumps(data, indent=2) + "\n")
+        self.stdout.write(f"\nResults written to {path}")
+
+    def check_baseline(self, results, options):
+        baseline = json.loads(Path(options["baseline"]).read_text())
+        regressions = compare(results, baseline["results"], options["tolerance"])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("\nNo regressions against baseline"))
+            return
+        self.stdout.write(self.style.WARNING("\nRegressions against baseline:"))
+        for line in regressions:
+            self.stdout.write(f"  {line}")
+        if options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} regression(s)")
@@ -0,0 +1,48 @@
+from core.query_budgets import (ENDPOINT_BUDGETS, N_PLUS_ONE_THRESHOLD,
+                                check_endpoint_budgets)
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+
+class Command(BaseCommand):
+    help = "Run the per-endpoint query budgets and fail on overruns or N+1 queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint", action="append", choices=list(ENDPOINT_BUDGETS), default=[]
+        )
+        parser.add_argument(
+            "--n-plus-one",
+            type=int,
+            default=N_PLUS_ONE_THRESHOLD,
+            help="Repeats of one query that count as N+1 (0 disables the check)",
+        )
+        parser.add_argument(
+            "--show-queries",
+            action="store_true",
+            default=False,
+            help="Print every endpoint's queries, not only the failing ones",
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        # A throwaway test database: never the configured one
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = check_endpoint_budgets(options["endpoint"], options["n_plus_one"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+        for name, (log, problems) in results.items():
+            budget = ENDPOINT_BUDGETS[name]["max_queries"]
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"✗ {name}: {'; '.join(problems)}"))
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(f"✓ {name}: {log.count}/{budget} queries")
+                )
+            if problems or options["show_queries"]:
+                self.stdout.write(str(log))
+
+        if failures:
+            raise CommandError(f"Query budget overruns in: {', '.join(failures)}")
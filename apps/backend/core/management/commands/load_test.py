@@ -0,0 +1,229 @@
+"""
+Replay the API collections as concurrent virtual users (see ``core.loadtest``).
+
+Virtual users log in as fixture accounts (``loadtest_*`` users following
+each other, with public posts and todo lists; removed afterwards), or as
+the ``--account user:password`` accounts given. The fixture is written to
+the configured database, so the server under test must use the same one:
+``--serve`` starts a gunicorn server for the run, otherwise ``--url`` points
+at one that is already running.
+
+Reports throughput, latency percentiles and error rates per request and in
+total; ``--output`` also writes them as JSON. Keep ``--users`` large
+enough that no account goes over the per-user throttle rate during the run.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from core.loadtest import SCENARIOS, CollectionError, LoadTest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from social import follow_graph
+from social.management.commands.bench_asgi_wsgi import _wait_for_port
+from social.models import Follow, Post
+from todos.models import TodoItem, TodoList
+from todos.signals import progress_signals_suspended
+
+User = get_user_model()
+
+PREFIX = "loadtest_"
+PASSWORD = "loadtest-password"
+DEFAULT_COLLECTION = settings.BASE_DIR.parent.parent / "api.http"
+
+
+def _server_command(port, workers, threads):
+    return [
+        sys.executable, "-m", "gunicorn", "core.wsgi:application",
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+        "--worker-class", "gthread", "--threads", str(threads),
+        "--log-level", "warning",
+    ]  # fmt: skip
+
+
+def _parse_weights(values):
+    """``["engage=5", "todos=0"]`` -> SCENARIOS with those weights."""
+    scenarios = dict(SCENARIOS)
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in scenarios or not weight.isdigit():
+            raise CommandError(
+                f"--scenario expects NAME=WEIGHT with NAME in {sorted(SCENARIOS)}"
+            )
+        scenarios[name] = (int(weight), scenarios[name][1])
+    scenarios = {name: s for name, s in scenarios.items() if s[0]}
+    if not scenarios:
+        raise CommandError("Every scenario has weight 0")
+    return scenarios
+
+
+class Command(BaseCommand):
+    help = "Load-test the API with weighted user scenarios from the collections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--serve", action="store_true", help="Start a gunicorn server for the run"
+        )
+        parser.add_argument("--port", type=int, default=8767)
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--collection",
+            action="append",
+            default=[],
+            help=f"api.http / Postman / JSONL file (default: {DEFAULT_COLLECTION.name})",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            default=[],
+            metavar="NAME=WEIGHT",
+            help=f"Override a scenario weight ({', '.join(SCENARIOS)}); 0 disables",
+        )
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--duration", type=float, default=30, help="Seconds")
+        parser.add_argument("--ramp-up", type=float, default=0, help="Seconds")
+        parser.add_argument(
+            "--think-time", type=float, default=0, help="Max pause between steps"
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--users", type=int, default=100, help="Fixture accounts")
+        parser.add_argument("--posts-per-user", type=int, default=5)
+        parser.add_argument("--items-per-user", type=int, default=5)
+        parser.add_argument(
+            "--account",
+            action="append",
+            default=[],
+            metavar="USER:PASSWORD",
+            help="Log in as these accounts instead of creating a fixture",
+        )
+        parser.add_argument("--output", help="Write the report to this JSON file")
+
+    def handle(self, *args, **options):
+        scenarios = _parse_weights(options["scenario"])
+        url = (
+            f"http://127.0.0.1:{options['port']}"
+            if options["serve"]
+            else options["url"]
+        )
+        try:
+            test = LoadTest(
+                url,
+                options["collection"] or [DEFAULT_COLLECTION],
+                accounts=[],
+                scenarios=scenarios,
+                seed=options["seed"],
+                think_time=options["think_time"],
+                timeout=options["timeout"],
+            )
+        except (CollectionError, OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        if options["account"]:
+            test.accounts = [tuple(a.split(":", 1)) for a in options["account"]]
+            if any(len(account) != 2 for account in test.accounts):
+                raise CommandError("--account expects USER:PASSWORD")
+            fixture = False
+        else:
+            if User.objects.filter(username__startswith=PREFIX).exists():
+                raise CommandError(
+                    f"{PREFIX}* users exist (interrupted run?); delete them first"
+                )
+            fixture = True
+
+        server = None
+        try:
+            if fixture:
+                test.accounts = self.create_fixture(options)
+            if options["serve"]:
+                server = subprocess.Popen(
+                    _server_command(
+                        options["port"], options["workers"], options["threads"]
+                    ),
+                    cwd=settings.BASE_DIR,
+                    env=dict(os.environ),
+                )
+                _wait_for_port(options["port"])
+            self.stdout.write(
+                f"{options['concurrency']} virtual users against {url} "
+                f"for {options['duration']:g}s ..."
+            )
+            report = asyncio.run(
+                test.run(
+                    options["concurrency"], options["duration"], options["ramp_up"]
+                )
+            )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+            if fixture:
+                with progress_signals_suspended():
+                    User.objects.filter(username__startswith=PREFIX).delete()
+
+        report["scenarios"] = {name: weight for name, (weight, _) in scenarios.items()}
+        report["concurrency"] = options["concurrency"]
+        self.report(report)
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(f"\nReport written to {options['output']}")
+
+    def create_fixture(self, options):
+        count = options["users"]
+        password = make_password(PASSWORD)  # one hash for everyone
+        User.objects.bulk_create(
+            User(
+                username=f"{PREFIX}{i}",
+                email=f"{PREFIX}{i}@example.test",
+                password=password,
+            )
+            for i in range(count)
+        )
+        users = list(User.objects.filter(username__startswith=PREFIX).order_by("id"))
+        # Everyone follows the next ten users
+        Follow.objects.bulk_create(
+            Follow(follower=u, followed=users[(i + k) % count], status="accepted")
+            for i, u in enumerate(users)
+            for k in range(1, min(count, 11))
+        )
+        follow_graph.recount(User.objects.filter(username__startswith=PREFIX))
+        Post.objects.bulk_create(
+            Post(user=u, title=f"load {n}", body="load", visibility="public")
+            for u in users
+            for n in range(options["posts_per_user"])
+        )
+        TodoList.objects.bulk_create(TodoList(user=u, name="load") for u in users)
+        TodoItem.objects.bulk_create(
+            TodoItem(list=todo_list, title=f"item {n}")
+            for todo_list in TodoList.objects.filter(user__in=users)
+            for n in range(options["items_per_user"])
+        )
+        return [(u.username, PASSWORD) for u in users]
+
+    def report(self, report):
+        total = report["total"]
+        if not total["requests"]:
+            self.stdout.write(self.style.WARNING("No requests were sent"))
+            return
+        self.stdout.write(
+            f"\n{total['requests']} requests in {report['duration_s']}s: "
+            f"{total['throughput']:.1f} req/s, errors {total['error_rate']:.2%}, "
+            f"p50={total['p50_ms']}ms p90={total['p90_ms']}ms p99={total['p99_ms']}ms\n"
+        )
+        for name, r in report["requests"].items():
+            statuses = " ".join(f"{s}:{n}" for s, n in r["statuses"].items())
+            self.stdout.write(
+                f"  {name:22s} {r['throughput']:7.1f}/s  errors={r['error_rate']:6.2%}  "
+                f"p50={r['p50_ms']:7.2f}ms  p90={r['p90_ms']:7.2f}ms  "
+                f"p99={r['p99_ms']:7.2f}ms  [{statuses}]"
+            )
+        for name, n in report["skipped"].items():
+            self.stdout.write(f"  skipped {name}: {n}")
@@ -0,0 +1,63 @@
+"""
+Save or restore a database snapshot (see ``core.snapshots``).
+
+    python manage.py snapshot save demo
+    python manage.py snapshot restore demo
+    python manage.py snapshot restore demo --seed "seed_demo --deterministic"
+
+``--seed`` makes ``restore`` self-healing: when the snapshot is missing or
+was taken at other migrations, the database is migrated, the given command
+is run and the result saved, so the next restore is fast again.
+"""
+
+import shlex
+import time
+
+from core import snapshots
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Save the database to a snapshot file or restore it from one"
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["save", "restore"])
+        parser.add_argument("name", help="Snapshot name (in SNAPSHOT_DIR) or path")
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--seed",
+            action="append",
+            default=[],
+            help="On restore: command to (re)build a missing or stale snapshot",
+        )
+
+    def handle(self, *args, **options):
+        name, using = options["name"], options["database"]
+        started = time.perf_counter()
+        if options["action"] == "save":
+            path = snapshots.save(name, using=using)
+            verb = "Saved"
+        else:
+            try:
+                path = snapshots.restore(name, using=using)
+                verb = "Restored"
+            except snapshots.SnapshotError as exc:
+                if not options["seed"]:
+                    raise CommandError(str(exc))
+                self.stdout.write(f"{exc}; rebuilding")
+                path = self.rebuild(name, using, options["seed"])
+                verb = "Rebuilt"
+        size = path.stat().st_size / 1024 / 1024
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {path} ({size:.1f} MB) in {time.perf_counter() - started:.2f}s"
+            )
+        )
+
+    def rebuild(self, name, using, seed_commands):
+        call_command("migrate", database=using, verbosity=0)
+        call_command("flush", database=using, interactive=False, verbosity=0)
+        for command in seed_commands:
+            call_command(*shlex.split(command))
+        return snapshots.save(name, using=using)
@@ -0,0 +1,137 @@
+"""
+Run queued ``core.tasks`` in a process pool.
+
+The main process claims due tasks (at most one per free pool slot), hands
+their ids to the pool and records nothing itself: each child runs
+``core.tasks.execute``, which stores the result or schedules the retry.
+Children are started with ``spawn`` so no database connection is shared
+across a fork. SIGINT/SIGTERM stop claiming and wait for running tasks.
+"""
+
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+# Children unpickle these by reference before Django is set up, so this
+# module must not import models (core.tasks) at import time
+
+
+def _init_child():
+    import django
+
+    django.setup()
+    # Ctrl-C reaches the whole process group; the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _execute(task_id):
+    from core.tasks import execute
+
+    return execute(task_id)
+
+
+class Command(BaseCommand):
+    help = "Run background tasks from the core_task table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=2)
+        parser.add_argument(
+            "--poll", type=float, default=1.0, help="Seconds between queue polls"
+        )
+        parser.add_argument(
+            "--burst", action="store_true", help="Exit when no task is due"
+        )
+        parser.add_argument(
+            "--stats", action="store_true", help="Print queue metrics and exit"
+        )
+
+    def handle(self, *args, **options):
+        from core import tasks
+
+        if options["stats"]:
+            self.print_stats(tasks.metrics())
+            return
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker = tasks.worker_id()
+        processes = options["processes"]
+        self.stdout.write(f"worker {worker}: {processes} processes")
+        pool = self.new_pool(processes)
+        in_flight = {}
+        last_requeue = 0.0
+        done = 0
+        try:
+            while not self.stopping or in_flight:
+                if time.monotonic() - last_requeue > 60:
+                    requeued, failed = tasks.requeue_stale()
+                    if requeued or failed:
+                        self.stdout.write(
+                            f"stale tasks: {requeued} requeued, {failed} failed"
+                        )
+                    last_requeue = time.monotonic()
+
+                free = processes - len(in_flight)
+                if free and not self.stopping:
+                    for pk in tasks.claim(worker, free):
+                        in_flight[pool.submit(_execute, pk)] = pk
+                    close_old_connections()
+
+                if not in_flight:
+                    if options["burst"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+
+                finished, _ = wait(
+                    in_flight, timeout=options["poll"], return_when=FIRST_COMPLETED
+                )
+                broken = False
+                for future in finished:
+                    pk = in_flight.pop(future)
+                    try:
+                        status = future.result()
+                    except BrokenProcessPool:
+                        # A child died mid-task; requeue_stale picks it up
+                        self.stderr.write(f"task {pk}: worker process died")
+                        broken = True
+                        continue
+                    done += 1
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"task {pk}: {status}")
+                if broken:
+                    in_flight.clear()
+                    pool.shutdown(cancel_futures=True)
+                    pool = self.new_pool(processes)
+        finally:
+            pool.shutdown(wait=True)
+        self.stdout.write(f"worker {worker}: {done} tasks processed")
+
+    def new_pool(self, processes):
+        return ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_child,
+        )
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def print_stats(self, data):
+        self.stdout.write(f"queue lag: {data['lag_seconds']:.1f}s")
+        for row in data["tasks"]:
+            avg = f"{row['avg_ms']:.0f}ms" if row["avg_ms"] is not None else "-"
+            peak = f"{row['max_ms']}ms" if row["max_ms"] is not None else "-"
+            self.stdout.write(
+                f"{row['name']}: queued={row['queued']} running={row['running']} "
+                f"succeeded={row['succeeded']} failed={row['failed']} "
+                f"retried={row['retried']} avg={avg} max={peak}"
+            )
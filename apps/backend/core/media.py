@@ -0,0 +1,195 @@
+"""
+Media (upload) delivery.
+
+Photo files are served through ``serve_media``. In development the worker
+streams the file itself (``FileResponse`` → ``wsgi.file_wrapper``/sendfile);
+in production the response only carries an ``X-Accel-Redirect`` or
+``X-Sendfile`` header and the front web server sends the bytes, so photo
+traffic does not hold a Django worker.
+
+Files stored under a content hash (see ``content_addressed_name``) never
+change and are served with a one-year ``immutable`` Cache-Control.
+"""
+
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+# sha256 hex digest at the start of the file stem (storage may append a suffix)
+_CONTENT_ADDRESSED_RE = re.compile(r"^[0-9a-f]{64}(?:_[A-Za-z0-9]+)?$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK_SIZE = 64 * 1024
+
+
+def content_addressed_name(prefix, field_file, filename):
+    """Build a storage name from the sha256 of the file contents.
+
+    Returns ``<prefix>/ab/ab12...ef.jpg``; identical content always maps to
+    the same name, so clients may cache it forever.
+    """
+    digest = hashlib.sha256()
+    for chunk in field_file.chunks():
+        digest.update(chunk)
+    hexdigest = digest.hexdigest()
+    ext = os.path.splitext(filename)[1].lower()
+    return posixpath.join(prefix, hexdigest[:2], f"{hexdigest}{ext}")
+
+
+def is_content_addressed(path):
+    stem = os.path.splitext(posixpath.basename(path))[0]
+    return bool(_CONTENT_ADDRESSED_RE.match(stem))
+
+
+def cache_control_for(path):
+    if is_content_addressed(path):
+        return f"public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_DEFAULT_MAX_AGE}"
+
+
+def parse_range(header, size):
+    """Parse a single-range ``Range`` header into inclusive ``(start, end)``.
+
+    Returns ``None`` when the header is absent or not a single byte range
+    (the full file is sent). Raises ``ValueError`` if it is unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # suffix range: last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        start = max(size - length, 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+class RangeFileWrapper:
+    """Iterate over ``length`` bytes of an open file starting at ``offset``."""
+
+    def __init__(self, filelike, offset, length, blksize=_CHUNK_SIZE):
+        self.filelike = filelike
+        self.filelike.seek(offset)
+        self.remaining = length
+        self.blksize = blksize
+
+    def __iter__(self):
+        while self.remaining > 0:
+            data = self.filelike.read(min(self.remaining, self.blksize))
+            if not data:
+                break
+            self.remaining -= len(data)
+            yield data
+
+    def close(self):
+        self.filelike.close()
+
+
+def _resolve(path):
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid media path")
+    if not os.path.isfile(fullpath):
+        raise Http404("Media file not found")
+    return path, fullpath
+
+
+def _offload_response(path, fullpath, content_type):
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    response = HttpResponse(content_type=content_type)
+    if backend == "nginx":
+        prefix = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/")
+        response["X-Accel-Redirect"] = f"{prefix}/{quote(path)}"
+    elif backend == "xsendfile":
+        response["X-Sendfile"] = fullpath
+    else:
+        raise ValueError(f"Unknown MEDIA_SENDFILE_BACKEND: {backend}")
+    return response
+
+
+def _worker_response(range_header, fullpath, size, content_type):
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        # Whole file: FileResponse goes through wsgi.file_wrapper (sendfile)
+        # when the server provides it
+        return FileResponse(open(fullpath, "rb"), content_type=content_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        RangeFileWrapper(open(fullpath, "rb"), start, length),
+        status=206,
+        content_type=content_type,
+    )
+    response["Content-Length"] = str(length)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file below MEDIA_ROOT with caching and range headers."""
+    path, fullpath = _resolve(path)
+    stat = os.stat(fullpath)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if conditional is not None:
+        conditional["ETag"] = etag
+        conditional["Cache-Control"] = cache_control_for(path)
+        return conditional
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    if settings.MEDIA_SENDFILE_BACKEND == "django":
+        range_header = request.META.get("HTTP_RANGE")
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if if_range and if_range != etag:
+            # Stale If-Range validator: the client gets the whole file
+            range_header = None
+        response = _worker_response(range_header, fullpath, stat.st_size, content_type)
+    else:
+        # The front server handles Range itself
+        response = _offload_response(path, fullpath, content_type)
+
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = cache_control_for(path)
+    return response
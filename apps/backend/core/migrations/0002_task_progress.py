@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="progress",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """A queued call of a ``core.tasks.task`` function (see core.tasks)."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, QUEUED),
+        (RUNNING, RUNNING),
+        (SUCCEEDED, SUCCEEDED),
+        (FAILED, FAILED),
+    )
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    # Enqueueing the same key again returns the existing task
+    idempotency_key = models.CharField(
+        max_length=200, unique=True, null=True, blank=True
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    # Checkpoint written by the task itself (core.tasks.report_progress)
+    progress = models.JSONField(default=dict, blank=True)
+    last_error = models.TextField(blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # claim: status = 'queued' AND run_at <= now ORDER BY run_at
+            models.Index(fields=["status", "run_at"], name="task_status_run_at_idx"),
+            # metrics: per task name and status
+            models.Index(fields=["name", "status"], name="task_name_status_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name}#{self.pk} ({self.status})"
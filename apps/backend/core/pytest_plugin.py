@@ -0,0 +1,146 @@
+"""
+pytest plugin for query budgets and fast test databases (loaded with
+``-p core.pytest_plugin``).
+
+- ``django_db_setup`` builds the test database from the template of
+  ``core.test_runner`` (migrated and seeded once, reused while migrations
+  are unchanged) when ``FAST_TESTS`` is on, and the session uses the cheap
+  test password hasher. With ``FAST_TESTS=0`` it migrates as usual and runs
+  ``TEST_SEED_COMMANDS`` afterwards.
+- ``seeded_data`` (session): the seeded users, posts and todo lists, loaded
+  once. ``seeded`` gives a test its own copies and the ``db`` transaction,
+  so whatever the test changes is rolled back after it::
+
+      def test_feed(seeded, client):
+          client.force_login(seeded.users[0])
+
+- ``@pytest.mark.query_budget(max_queries=5, n_plus_one=3)`` records the
+  queries the test function runs (not its fixtures) and fails the test on
+  more than ``max_queries`` or on an N+1 pattern; ``n_plus_one=0`` allows
+  repeats.
+- ``query_budget`` fixture, for a single block::
+
+      with query_budget(max_queries=4) as log:
+          api_client.get("/api/posts/")
+
+- ``endpoint_budget`` fixture: ``endpoint_budget("posts-list", client,
+  **context)`` requests an entry of ``core.query_budgets.ENDPOINT_BUDGETS``
+  and asserts its status and budget.
+"""
+
+import copy
+from contextlib import contextmanager
+
+import pytest
+
+_hashing = pytest.StashKey()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries=None, n_plus_one=3): fail on more queries "
+        "than max_queries or on N+1 query patterns",
+    )
+    # registered after pytest-django so this django_db_setup overrides its own
+    config.pluginmanager.register(FastDatabases(), "core-fast-databases")
+
+    from core.test_runner import fast_hashing
+    from django.conf import settings
+
+    if settings.configured and settings.FAST_TESTS:
+        config.stash[_hashing] = fast_hashing()
+        config.stash[_hashing].enable()
+
+
+def pytest_unconfigure(config):
+    if _hashing in config.stash:
+        config.stash[_hashing].disable()
+
+
+class FastDatabases:
+    @pytest.fixture(scope="session")
+    def django_db_setup(self, request, django_test_environment, django_db_blocker):
+        from core.test_runner import (run_seed_commands, setup_test_databases,
+                                      teardown_test_databases)
+        from django.conf import settings
+        from django.test.utils import setup_databases, teardown_databases
+
+        verbosity = request.config.option.verbose
+        keepdb = request.config.getvalue("reuse_db")
+        with django_db_blocker.unblock():
+            if settings.FAST_TESTS:
+                state = setup_test_databases(verbosity)
+            else:
+                old_config = setup_databases(verbosity, False, keepdb=keepdb)
+                run_seed_commands()
+        yield
+        with django_db_blocker.unblock():
+            if settings.FAST_TESTS:
+                teardown_test_databases(state, verbosity)
+            else:
+                teardown_databases(old_config, verbosity, keepdb=keepdb)
+
+
+@pytest.fixture(scope="session")
+def seeded_data(django_db_setup, django_db_blocker):
+    from core.test_runner import load_seeded_data
+
+    with django_db_blocker.unblock():
+        return load_seeded_data()
+
+
+@pytest.fixture
+def seeded(db, seeded_data):
+    return copy.deepcopy(seeded_data)
+
+
+def _fail(problems, log):
+    pytest.fail("Query budget exceeded:\n  " + "\n  ".join(problems) + f"\n{log}")
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    from core.query_budgets import record_queries
+
+    with record_queries() as log:
+        result = yield
+    problems = log.problems(*marker.args, **marker.kwargs)
+    if problems:
+        _fail(problems, log)
+    return result
+
+
+@pytest.fixture
+def query_budget():
+    from core.query_budgets import N_PLUS_ONE_THRESHOLD, record_queries
+
+    @contextmanager
+    def check(max_queries=None, n_plus_one=N_PLUS_ONE_THRESHOLD):
+        with record_queries() as log:
+            yield log
+        problems = log.problems(max_queries, n_plus_one)
+        if problems:
+            _fail(problems, log)
+
+    return check
+
+
+@pytest.fixture
+def endpoint_budget():
+    from core.query_budgets import ENDPOINT_BUDGETS, call_endpoint
+
+    def check(name, client, **context):
+        budget = ENDPOINT_BUDGETS[name]
+        response, log = call_endpoint(client, budget, **context)
+        expected = budget.get("status", 200)
+        assert response.status_code == expected, response.content
+        problems = log.problems(budget.get("max_queries"))
+        if problems:
+            _fail(problems, log)
+        return response
+
+    return check
@@ -0,0 +1,228 @@
+"""
+Query counts per request: recording, N+1 detection and per-endpoint budgets.
+
+``record_queries()`` captures the SQL a block runs. Each statement is
+reduced to a fingerprint (literals, placeholders and ``IN (...)`` lists
+replaced by ``?``), so the same query run for different rows compares
+equal; a fingerprint repeated ``N_PLUS_ONE_THRESHOLD`` times or more within
+one request is reported as an N+1 pattern.
+
+``ENDPOINT_BUDGETS`` declares, per endpoint of ``PostViewSet``,
+``TodoListViewSet`` and ``FollowViewSet``, the most queries a request may
+run against the budget fixture (pages of ten posts with comments and likes,
+todo lists with items and sub-items, a few dozen follows), sized so that a
+per-row query shows up as an N+1. ``check_endpoint_budgets`` runs them all
+inside a transaction that is rolled back, with a private locmem cache so the
+configured one (throttles, follow graph, auth users) is left alone;
+``manage.py check_query_budgets`` runs it on a test database and fails on
+any overrun. The same helpers back ``QueryBudgetMixin`` in
+``core.test_utils`` and the ``core.pytest_plugin`` fixtures.
+"""
+
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+N_PLUS_ONE_THRESHOLD = 3
+
+# Cleared before every endpoint for the same cold caches each time
+BUDGET_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "query-budgets",
+    }
+}
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\$\d+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+_IGNORED = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+# name -> budget: ``path`` (``{post}``, ``{todo_list}``, ``{other}``,
+# ``{others}`` and ``{stranger}`` come from the fixture), ``method``,
+# ``data``, ``status`` and ``max_queries``
+ENDPOINT_BUDGETS = {
+    "posts-list": {"path": "/api/posts/", "max_queries": 4},
+    "posts-user": {"path": "/api/posts/?user_id={other}", "max_queries": 5},
+    "posts-detail": {"path": "/api/posts/{post}/", "max_queries": 3},
+    "posts-comments": {"path": "/api/posts/{post}/comments/", "max_queries": 4},
+    "posts-like": {
+        "method": "post",
+        "path": "/api/posts/{post}/like/",
+        "max_queries": 5,
+    },
+    "posts-comment": {
+        "method": "post",
+        "path": "/api/posts/{post}/comments/",
+        "data": {"body": "budget"},
+        "status": 201,
+        "max_queries": 6,
+    },
+    "todo-lists-list": {"path": "/api/todos/todo-lists/", "max_queries": 4},
+    "todo-lists-detail": {
+        "path": "/api/todos/todo-lists/{todo_list}/",
+        "max_queries": 3,
+    },
+    "follows-followers": {"path": "/api/follows/followers/", "max_queries": 2},
+    "follows-following": {"path": "/api/follows/following/", "max_queries": 2},
+    "follows-status": {"path": "/api/follows/users/{other}/status/", "max_queries": 1},
+    "follows-statuses": {
+        "path": "/api/follows/statuses/?ids={others}",
+        "max_queries": 1,
+    },
+    "follows-follow": {
+        "method": "post",
+        "path": "/api/follows/users/{stranger}/follow/",
+        "status": 201,
+        "max_queries": 3,
+    },
+}
+
+
+def fingerprint(sql):
+    """``sql`` with literals and placeholders replaced by ``?``."""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(?)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+class QueryLog:
+    """The statements run inside ``record_queries``."""
+
+    def __init__(self, context):
+        self._context = context
+
+    @property
+    def statements(self):
+        return [
+            q["sql"]
+            for q in self._context.captured_queries
+            if not q["sql"].lstrip().upper().startswith(_IGNORED)
+        ]
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """``{fingerprint: times}`` of statements run ``threshold``+ times."""
+        counts = Counter(fingerprint(sql) for sql in self.statements)
+        return {fp: n for fp, n in counts.most_common() if n >= threshold}
+
+    def problems(self, max_queries=None, n_plus_one=N_PLUS_ONE_THRESHOLD):
+        """Budget overruns as readable strings (empty when within budget)."""
+        found = []
+        if max_queries is not None and self.count > max_queries:
+            found.append(f"{self.count} queries (budget {max_queries})")
+        if n_plus_one:
+            for fp, n in self.repeated(n_plus_one).items():
+                found.append(f"N+1: {n}x {fp[:200]}")
+        return found
+
+    def __str__(self):
+        return "\n".join(f"{n}. {sql}" for n, sql in enumerate(self.statements, 1))
+
+
+@contextmanager
+def record_queries(using="default"):
+    """Capture the queries run in the block; yields a ``QueryLog``."""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield QueryLog(context)
+
+
+def call_endpoint(client, budget, **context):
+    """Request ``budget``'s endpoint; returns ``(response, QueryLog)``."""
+    method = budget.get("method", "get")
+    path = budget["path"].format(**context)
+    with record_queries() as log:
+        response = getattr(client, method)(path, budget.get("data"), format="json")
+    return response, log
+
+
+def create_budget_fixture():
+    """Rows the budgets are sized for; returns the path context."""
+    from django.contrib.auth import get_user_model
+    from social import follow_graph
+    from social.models import Comment, Follow, Like, Post
+    from todos.models import TodoItem, TodoList, TodoSubItem
+
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(username=f"budget_{i}", email=f"budget_{i}@example.test")
+        for i in range(15)
+    )
+    users = list(User.objects.filter(username__startswith="budget_").order_by("id"))
+    viewer, others, stranger = users[0], users[1:12], users[14]
+    Follow.objects.bulk_create(
+        [Follow(follower=viewer, followed=u, status="accepted") for u in others]
+        + [Follow(follower=u, followed=viewer, status="accepted") for u in others]
+    )
+    follow_graph.recount(User.objects.filter(username__startswith="budget_"))
+    Post.objects.bulk_create(
+        Post(user=u, title=f"budget {n}", body="budget", visibility="public")
+        for u in [viewer, *others]
+        for n in range(2)
+    )
+    posts = list(Post.objects.filter(user__in=users).order_by("id"))
+    Comment.objects.bulk_create(
+        Comment(post=post, user=u, body="budget") for post in posts for u in others[:3]
+    )
+    Like.objects.bulk_create(
+        Like(post=post, user=u) for post in posts for u in others[:3]
+    )
+    TodoList.objects.bulk_create(
+        TodoList(user=viewer, name=f"list {n}") for n in range(5)
+    )
+    lists = list(TodoList.objects.filter(user=viewer))
+    TodoItem.objects.bulk_create(
+        TodoItem(list=todo_list, title=f"item {n}")
+        for todo_list in lists
+        for n in range(4)
+    )
+    TodoSubItem.objects.bulk_create(
+        TodoSubItem(parent=item, title=f"sub {n}")
+        for item in TodoItem.objects.filter(list__in=lists)
+        for n in range(2)
+    )
+    return {
+        "viewer": viewer,
+        "post": posts[-1].id,
+        "todo_list": lists[0].id,
+        "other": others[0].id,
+        "others": ",".join(str(u.id) for u in others),
+        "stranger": stranger.id,
+    }
+
+
+def check_endpoint_budgets(names=None, n_plus_one=N_PLUS_ONE_THRESHOLD):
+    """Run the budgets on a throwaway fixture; ``{name: (QueryLog, problems)}``."""
+    from django.core.cache import cache
+    from rest_framework.test import APIClient
+
+    results = {}
+    with override_settings(CACHES=BUDGET_CACHES), transaction.atomic():
+        context = create_budget_fixture()
+        client = APIClient()
+        client.force_authenticate(context.pop("viewer"))
+        for name, budget in ENDPOINT_BUDGETS.items():
+            if names and name not in names:
+                continue
+            cache.clear()  # the private BUDGET_CACHES, not the configured cache
+            response, log = call_endpoint(client, budget, **context)
+            problems = log.problems(budget.get("max_queries"), n_plus_one)
+            expected = budget.get("status", 200)
+            if response.status_code != expected:
+                problems.insert(
+                    0, f"status {response.status_code} (expected {expected})"
+                )
+            results[name] = (log, problems)
+        transaction.set_rollback(True)
+    return results
@@ -0,0 +1,130 @@
+"""
+Query-plan checks for the hot access paths.
+
+Each entry in ``ACCESS_PATHS`` builds the same predicate a view runs (feed,
+profile posts, follow status, followers, comments, todo progress). ``full_scans``
+EXPLAINs it and reports every table the planner reads without an index:
+
+- SQLite: ``SCAN <table>`` lines that are not ``USING [COVERING] INDEX``.
+- PostgreSQL: ``Seq Scan on <table>`` with ``enable_seqscan`` turned off, so a
+  sequential scan only shows up when no usable index exists (small or empty
+  tables would otherwise always be scanned).
+
+Paths marked ``index_ordered`` must also read rows in ORDER BY order straight
+from the index; an explicit sort step (``USE TEMP B-TREE FOR ORDER BY`` /
+``Sort``) is reported as well.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Count, Q
+
+_SQLITE_SCAN_RE = re.compile(r"\bSCAN (?:TABLE )?(\w+)\b(?! USING (?:COVERING )?INDEX)")
+_SQLITE_OK = {"CONSTANT"}
+_SQLITE_SORT_RE = re.compile(r"USE TEMP B-TREE FOR ORDER BY")
+_POSTGRES_SCAN_RE = re.compile(r"Seq Scan on (\w+)")
+_POSTGRES_SORT_RE = re.compile(r"^[\s>-]*Sort\b", re.MULTILINE)
+
+
+def _feed(user_id):
+    from social.models import Follow, Post
+
+    following = Follow.objects.filter(
+        follower_id=user_id, status="accepted"
+    ).values_list("followed_id", flat=True)
+    return (
+        Post.objects.filter(user_id__in=following)
+        .filter(Q(visibility="public") | Q(visibility="followers"))
+        .annotate(
+            likes_count=Count("likes", distinct=True),
+            comments_count=Count("comments", distinct=True),
+        )
+        .order_by("-created_at")[:5]
+    )
+
+
+def _user_posts(user_id):
+    from social.models import Post
+
+    return Post.objects.filter(user_id=user_id).order_by("-created_at")[:10]
+
+
+def _public_posts(user_id):
+    from social.models import Post
+
+    return Post.objects.filter(visibility="public").order_by("-created_at")[:10]
+
+
+def _follow_status(user_id):
+    from social.models import Follow
+
+    return Follow.objects.filter(
+        follower_id=user_id, followed_id=user_id + 1, status="accepted"
+    )
+
+
+def _followers(user_id):
+    from social.models import Follow
+
+    return Follow.objects.filter(followed_id=user_id, status="accepted")
+
+
+def _post_comments(user_id):
+    from social.models import Comment
+
+    return Comment.objects.filter(post_id=user_id).order_by("id")
+
+
+def _todo_progress(user_id):
+    from todos.models import TodoItem
+
+    return TodoItem.objects.filter(list_id=user_id, is_done=True)
+
+
+# name -> (queryset builder, index_ordered)
+ACCESS_PATHS = {
+    "feed": (_feed, False),
+    "user_posts": (_user_posts, True),
+    "public_posts": (_public_posts, True),
+    "follow_status": (_follow_status, False),
+    "followers": (_followers, False),
+    "post_comments": (_post_comments, True),
+    "todo_progress": (_todo_progress, False),
+}
+
+
+def explain(queryset):
+    if connection.vendor != "postgresql":
+        return queryset.explain()
+    with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+        try:
+            return queryset.explain()
+        finally:
+            cursor.execute("RESET enable_seqscan")
+
+
+def full_scans(plan):
+    """Return the table names the plan reads sequentially."""
+    if connection.vendor == "postgresql":
+        return _POSTGRES_SCAN_RE.findall(plan)
+    return [t for t in _SQLITE_SCAN_RE.findall(plan) if t not in _SQLITE_OK]
+
+
+def has_sort(plan):
+    if connection.vendor == "postgresql":
+        return bool(_POSTGRES_SORT_RE.search(plan))
+    return bool(_SQLITE_SORT_RE.search(plan))
+
+
+def check_access_paths(user_id=1):
+    """EXPLAIN every access path; returns ``{name: (plan, [problems])}``."""
+    results = {}
+    for name, (build, index_ordered) in ACCESS_PATHS.items():
+        plan = explain(build(user_id))
+        problems = [f"full scan on {table}" for table in full_scans(plan)]
+        if index_ordered and has_sort(plan):
+            problems.append("explicit sort instead of index order")
+        results[name] = (plan, problems)
+    return results
@@ -0,0 +1,13 @@
+"""
+drf-spectacular extensions for the project's own classes.
+
+``CoreConfig.ready`` imports this module so the extensions are registered
+before the schema is generated.
+"""
+
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    # Same bearer scheme as JWTAuthentication: one "jwtAuth" in the schema
+    target_class = "core.authentication.ClaimsJWTAuthentication"
@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import shlex
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +48,8 @@ INSTALLED_APPS = [
     "users",
     "todos",
     "social",
+    "search",
+    "core",
 ]
 
 REST_FRAMEWORK = {
@@ -53,7 +57,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "SEARCH_PARAM": "q",
@@ -73,7 +77,10 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": False,
+    "TOKEN_REFRESH_SERIALIZER": "core.authentication.ClaimsTokenRefreshSerializer",
 }
+# Writes authenticate against a cached copy of the user (core.authentication)
+AUTH_USER_CACHE_SECONDS = int(os.environ.get("AUTH_USER_CACHE_SECONDS", "60"))
 
 ALLOWED_HOSTS = ["*"]
 
@@ -110,6 +117,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "core.wsgi.application"
 
+# Native async feed/social read views (social.async_views); core.asgi turns
+# them on, WSGI deployments keep the DRF views
+ASYNC_SOCIAL_VIEWS = os.environ.get("ASYNC_SOCIAL_VIEWS", "0") == "1"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -131,18 +142,194 @@ def _postgres_config_from_env():
             "NAME": name,
             "USER": user,
             "PASSWORD": password,
+            **_postgres_connection_from_env(),
         }
     return None
 
 
-_pg = _postgres_config_from_env()
-DATABASES = {
-    "default": _pg
-    or {
+def _postgres_connection_from_env():
+    """Connection reuse for Postgres.
+
+    DB_CONN_MAX_AGE keeps a connection per worker thread open between requests
+    (CONN_HEALTH_CHECKS pings it before reuse). POSTGRES_POOL=1 switches to
+    Django's native psycopg 3 pool instead; requirements.txt only pins
+    psycopg2, so it needs ``pip install "psycopg[binary,pool]"``. Django
+    requires CONN_MAX_AGE=0 in that mode.
+    """
+    if os.environ.get("POSTGRES_POOL") == "1":
+        if not (find_spec("psycopg") and find_spec("psycopg_pool")):
+            from django.core.exceptions import ImproperlyConfigured
+
+            raise ImproperlyConfigured(
+                "POSTGRES_POOL=1 needs psycopg 3 with its pool "
+                '(pip install "psycopg[binary,pool]"), not psycopg2'
+            )
+        return {
+            "CONN_MAX_AGE": 0,
+            "OPTIONS": {
+                "pool": {
+                    "min_size": int(os.environ.get("POSTGRES_POOL_MIN_SIZE", "2")),
+                    "max_size": int(os.environ.get("POSTGRES_POOL_MAX_SIZE", "10")),
+                    "timeout": int(os.environ.get("POSTGRES_POOL_TIMEOUT", "10")),
+                },
+            },
+        }
+    return {
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": os.environ.get("DB_CONN_HEALTH_CHECKS", "1") == "1",
+    }
+
+
+def _sqlite_config_from_env():
+    """SQLite tuned for concurrent writers.
+
+    WAL lets readers run alongside the single writer, busy_timeout waits for
+    the write lock instead of failing with "database is locked", and
+    IMMEDIATE transactions take that lock up front so a read-then-write
+    transaction cannot deadlock on lock upgrade. SQLITE_TUNING=0 restores the
+    stock rollback-journal behaviour.
+    """
+    config = {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("SQLITE_PATH") or BASE_DIR / "db.sqlite3",
+    }
+    if os.environ.get("SQLITE_TUNING", "1") != "1":
+        return config
+    busy_timeout_ms = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    config["OPTIONS"] = {
+        "timeout": busy_timeout_ms / 1000,
+        "transaction_mode": "IMMEDIATE",
+        "init_command": ";".join(
+            [
+                "PRAGMA journal_mode=WAL",
+                f"PRAGMA busy_timeout={busy_timeout_ms}",
+                "PRAGMA synchronous=NORMAL",
+                "PRAGMA cache_size=-20000",
+                "PRAGMA temp_store=MEMORY",
+            ]
+        ),
     }
+    return config
+
+
+def _replica_configs_from_env(primary):
+    """Read replicas as ``{"replica_1": {...}, ...}``.
+
+    Postgres: POSTGRES_REPLICA_HOSTS="host1,host2:5433" reuses the primary's
+    credentials and database name. SQLite: SQLITE_REPLICA_PATH points at a
+    second file standing in for a replica (e.g. a copy of the primary) to
+    exercise the routing locally. Tests mirror every replica to default.
+    """
+    if primary["ENGINE"] == "django.db.backends.postgresql":
+        hosts = os.environ.get("POSTGRES_REPLICA_HOSTS", "")
+        targets = []
+        for entry in filter(None, (h.strip() for h in hosts.split(","))):
+            host, _, port = entry.partition(":")
+            targets.append({"HOST": host, "PORT": port or primary["PORT"]})
+    else:
+        path = os.environ.get("SQLITE_REPLICA_PATH")
+        targets = [{"NAME": path}] if path else []
+    return {
+        f"replica_{i}": {**primary, **target, "TEST": {"MIRROR": "default"}}
+        for i, target in enumerate(targets, start=1)
+    }
+
+
+_pg = _postgres_config_from_env()
+DATABASES = {"default": _pg or _sqlite_config_from_env()}
+DATABASES.update(_replica_configs_from_env(DATABASES["default"]))
+
+# Read replicas (core.db_router): opted-in views read from a replica unless
+# the user wrote within the last DB_REPLICA_PIN_SECONDS
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DB_REPLICA_PIN_SECONDS = int(os.environ.get("DB_REPLICA_PIN_SECONDS", "5"))
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["core.db_router.PrimaryReplicaRouter"]
+    MIDDLEWARE.append("core.db_router.PrimaryStickinessMiddleware")
+
+
+# Users typeahead prefix index (users.typeahead): delta sync from other
+# workers via updated_at and a deletion counter in the cache, plus a periodic
+# full rebuild
+TYPEAHEAD_SYNC_SECONDS = int(os.environ.get("TYPEAHEAD_SYNC_SECONDS", "5"))
+TYPEAHEAD_REBUILD_SECONDS = int(os.environ.get("TYPEAHEAD_REBUILD_SECONDS", "600"))
+
+# Cached follower/following id arrays (social.follow_graph); follow changes
+# invalidate them, the TTL only bounds staleness across cache backends
+FOLLOW_GRAPH_CACHE_SECONDS = int(os.environ.get("FOLLOW_GRAPH_CACHE_SECONDS", "300"))
+
+# Ranked feed (social.feed_ranking, /api/feed/posts?ranking=ranked): rankings
+# are cached per viewer; building one over the budget serves the
+# chronological feed instead, for FEED_RANK_FALLBACK_SECONDS
+FEED_RANK_TTL_SECONDS = int(os.environ.get("FEED_RANK_TTL_SECONDS", "60"))
+FEED_RANK_FALLBACK_SECONDS = int(os.environ.get("FEED_RANK_FALLBACK_SECONDS", "5"))
+FEED_RANK_BUDGET_MS = int(os.environ.get("FEED_RANK_BUDGET_MS", "150"))
+FEED_RANK_WINDOW_HOURS = int(os.environ.get("FEED_RANK_WINDOW_HOURS", "72"))
+FEED_RANK_CANDIDATES = int(os.environ.get("FEED_RANK_CANDIDATES", "500"))
+FEED_RANK_HALF_LIFE_HOURS = float(os.environ.get("FEED_RANK_HALF_LIFE_HOURS", "12"))
+
+# Server-sent events (core.events, /api/events/; ASGI only). The in-memory broker
+# only reaches clients of the same process; multi-worker deployments need a
+# shared one. Streams open with a one-time ticket valid for EVENTS_TICKET_SECONDS
+EVENTS_BROKER = os.environ.get("EVENTS_BROKER", "core.events.InMemoryBroker")
+EVENTS_KEEPALIVE_SECONDS = int(os.environ.get("EVENTS_KEEPALIVE_SECONDS", "15"))
+EVENTS_TICKET_SECONDS = int(os.environ.get("EVENTS_TICKET_SECONDS", "30"))
+
+# Notification inbox (social.notifications): events on the same post/verb
+# roll up within the window; recording runs as a background task (core.tasks)
+NOTIFICATION_WINDOW_SECONDS = int(os.environ.get("NOTIFICATION_WINDOW_SECONDS", "3600"))
+
+# Background tasks (core.tasks, `manage.py worker`). TASKS_EAGER runs them
+# inline after commit when no worker is running. Running tasks renew their lock
+# every TASK_HEARTBEAT_SECONDS; one not renewed for TASK_LOCK_TIMEOUT_SECONDS
+# is requeued
+TASKS_EAGER = os.environ.get("TASKS_EAGER", "0") == "1"
+TASK_HEARTBEAT_SECONDS = int(os.environ.get("TASK_HEARTBEAT_SECONDS", "60"))
+TASK_LOCK_TIMEOUT_SECONDS = int(os.environ.get("TASK_LOCK_TIMEOUT_SECONDS", "1800"))
+
+# Database snapshots (core.snapshots, `manage.py snapshot save|restore <name>`)
+SNAPSHOT_DIR = Path(os.environ.get("SNAPSHOT_DIR") or BASE_DIR / "snapshots")
+
+# Password hashing (core.hashers). PASSWORD_HASHER: scrypt | argon2 (needs
+# argon2-cffi) | pbkdf2; the other hashers still check existing hashes, which
+# are upgraded on the next login. Hashing runs on a bounded thread pool; only
+# views that opt in (login) answer 503 when it is full, the rest hash inline
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "scrypt")
+_PASSWORD_HASHERS = {
+    "scrypt": "core.hashers.ScryptPasswordHasher",
+    "argon2": "core.hashers.Argon2PasswordHasher",
+    "pbkdf2": "core.hashers.PBKDF2PasswordHasher",
 }
+if PASSWORD_HASHER not in _PASSWORD_HASHERS:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER={PASSWORD_HASHER!r}: expected one of "
+        + ", ".join(_PASSWORD_HASHERS)
+    )
+PASSWORD_HASHERS = [_PASSWORD_HASHERS.pop(PASSWORD_HASHER), *_PASSWORD_HASHERS.values()]
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get("PASSWORD_SCRYPT_WORK_FACTOR", 2**14))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", "2"))
+PASSWORD_ARGON2_MEMORY_KB = int(os.environ.get("PASSWORD_ARGON2_MEMORY_KB", "19456"))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", "1"))
+PASSWORD_HASHING_WORKERS = int(
+    os.environ.get("PASSWORD_HASHING_WORKERS") or max(1, (os.cpu_count() or 2) // 2)
+)
+PASSWORD_HASHING_QUEUE = int(os.environ.get("PASSWORD_HASHING_QUEUE", "32"))
+
+# Tests (core.test_runner): template database reuse, one worker per core and
+# a cheap password hasher while FAST_TESTS is on (the runner and the pytest
+# plugin switch the hasher, not this file). TEST_SEED_COMMANDS are management
+# commands run once into the template, separated by ";"; empty disables them
+TEST_RUNNER = "core.test_runner.FastTestRunner"
+FAST_TESTS = os.environ.get("FAST_TESTS", "1") == "1"
+TEST_SEED_COMMANDS = [
+    shlex.split(command)
+    for command in os.environ.get(
+        "TEST_SEED_COMMANDS", "seed_demo --users 10 --deterministic"
+    ).split(";")
+    if command.strip()
+]
 
 
 # Password validation
@@ -181,6 +368,21 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Media files (uploads)
+# MEDIA_SENDFILE_BACKEND:
+#   "django"    -> FileResponse from the worker (development, zero-copy via wsgi.file_wrapper)
+#   "nginx"     -> X-Accel-Redirect to MEDIA_ACCEL_REDIRECT_PREFIX (internal location)
+#   "xsendfile" -> X-Sendfile with the absolute path (Apache mod_xsendfile / lighttpd)
+MEDIA_URL = "/media/"
+MEDIA_ROOT = Path(os.environ.get("MEDIA_ROOT") or BASE_DIR / "media")
+MEDIA_SENDFILE_BACKEND = os.environ.get("MEDIA_SENDFILE_BACKEND", "django")
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/"
+)
+# Content-addressed files never change, mutable ones are revalidated hourly
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_DEFAULT_MAX_AGE = int(os.environ.get("MEDIA_DEFAULT_MAX_AGE", "3600"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
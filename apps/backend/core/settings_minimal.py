@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     "users",
     "social",
     "todos",
+    "core",
 ]
 
 MIDDLEWARE = [
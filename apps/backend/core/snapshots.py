@@ -0,0 +1,208 @@
+"""
+Database snapshots: save a seeded database once, restore it in seconds.
+
+- SQLite: the snapshot is a compacted copy of the database made with the
+  SQLite online backup API; restoring copies its pages back into the live
+  connection (this works for the in-memory test database too).
+- Other backends (PostgreSQL): a zip with one ``COPY ... (FORMAT binary)``
+  stream per table plus a manifest. Restoring truncates the tables, copies
+  the rows back in one transaction and resets the sequences.
+
+Each snapshot records the migrations it was taken at. Restoring into a
+database migrated differently raises ``StaleSnapshot``: re-seed and save
+again. A bare name (``"demo"``) means ``SNAPSHOT_DIR/demo.<ext>``.
+
+After a restore the default cache is cleared and ``snapshot_restored`` is
+sent, so in-process indexes built from the old rows can reset.
+"""
+
+import json
+import os
+import sqlite3
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.dispatch import Signal
+
+snapshot_restored = Signal()  # kwargs: path, using
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class StaleSnapshot(SnapshotError):
+    pass
+
+
+def resolve(name_or_path, using="default"):
+    """Path for ``name_or_path``; bare names live in ``SNAPSHOT_DIR``."""
+    path = Path(name_or_path)
+    if path.suffix or path.parent != Path("."):
+        return path
+    ext = "sqlite3" if connections[using].vendor == "sqlite" else "snapshot.zip"
+    return Path(settings.SNAPSHOT_DIR) / f"{name_or_path}.{ext}"
+
+
+def _applied_migrations(connection):
+    recorder = MigrationRecorder(connection)
+    if not recorder.has_table():
+        return []
+    return sorted(f"{app}.{name}" for app, name in recorder.applied_migrations())
+
+
+def save(name_or_path, using="default"):
+    """Snapshot the database to a file; returns its path."""
+    connection = connections[using]
+    path = resolve(name_or_path, using)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    connection.ensure_connection()
+    if connection.vendor == "sqlite":
+        _save_sqlite(connection, tmp)
+    else:
+        _save_copy(connection, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def restore(name_or_path, using="default"):
+    """Replace the database contents with a snapshot; returns its path."""
+    connection = connections[using]
+    path = resolve(name_or_path, using)
+    if not path.exists():
+        raise SnapshotError(f"No snapshot at {path}")
+    if connection.in_atomic_block:
+        raise SnapshotError("Cannot restore a snapshot inside a transaction")
+    connection.ensure_connection()
+    if connection.vendor == "sqlite":
+        _restore_sqlite(connection, path)
+    else:
+        _restore_copy(connection, path)
+    cache.clear()
+    snapshot_restored.send(sender=None, path=path, using=using)
+    return path
+
+
+# -- SQLite -----------------------------------------------------------------
+
+
+def _save_sqlite(connection, path):
+    if path.exists():
+        path.unlink()
+    dest = sqlite3.connect(path)
+    try:
+        connection.connection.backup(dest)
+        dest.execute("VACUUM")
+    finally:
+        dest.close()
+
+
+def _restore_sqlite(connection, path):
+    src = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        snapshot = sorted(
+            f"{app}.{name}"
+            for app, name in src.execute("SELECT app, name FROM django_migrations")
+        )
+        current = _applied_migrations(connection)
+        if current and snapshot != current:
+            raise StaleSnapshot(
+                f"{path} was taken at different migrations than the database"
+            )
+        src.backup(connection.connection)
+    finally:
+        src.close()
+
+
+# -- COPY (PostgreSQL) ------------------------------------------------------
+
+
+def _tables(connection):
+    """Django tables with their column order, migrations table excluded."""
+    with connection.cursor() as cursor:
+        names = sorted(
+            set(connection.introspection.django_table_names(include_auto_created=True))
+            & set(connection.introspection.table_names(cursor))
+        )
+        return {
+            name: [
+                col.name
+                for col in connection.introspection.get_table_description(cursor, name)
+            ]
+            for name in names
+            if name != MigrationRecorder.Migration._meta.db_table
+        }
+
+
+def _copy_sql(connection, table, columns, direction):
+    quote = connection.ops.quote_name
+    cols = ", ".join(quote(c) for c in columns)
+    return f"COPY {quote(table)} ({cols}) {direction} WITH (FORMAT binary)"
+
+
+def _save_copy(connection, path):
+    tables = _tables(connection)
+    manifest = {
+        "vendor": connection.vendor,
+        "migrations": _applied_migrations(connection),
+        "tables": tables,
+    }
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cur:
+            # One consistent view of every table
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            for table, columns in tables.items():
+                sql = _copy_sql(connection, table, columns, "TO STDOUT")
+                with archive.open(f"{table}.bin", "w") as out:
+                    raw = cur.cursor
+                    if hasattr(raw, "copy_expert"):  # psycopg2
+                        raw.copy_expert(sql, out)
+                    else:  # psycopg 3
+                        with raw.copy(sql) as copy:
+                            for chunk in copy:
+                                out.write(chunk)
+        archive.writestr("manifest.json", json.dumps(manifest))
+
+
+def _restore_copy(connection, path):
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        if manifest["migrations"] != _applied_migrations(connection):
+            raise StaleSnapshot(
+                f"{path} was taken at different migrations than the database"
+            )
+        tables = manifest["tables"]
+        quote = connection.ops.quote_name
+        with transaction.atomic(using=connection.alias), connection.cursor() as cur:
+            cur.execute(
+                "TRUNCATE "
+                + ", ".join(quote(t) for t in _tables(connection))
+                + " RESTART IDENTITY CASCADE"
+            )
+            for table, columns in tables.items():
+                sql = _copy_sql(connection, table, columns, "FROM STDIN")
+                with archive.open(f"{table}.bin") as data:
+                    raw = cur.cursor
+                    if hasattr(raw, "copy_expert"):  # psycopg2
+                        raw.copy_expert(sql, data)
+                    else:  # psycopg 3
+                        with raw.copy(sql) as copy:
+                            while chunk := data.read(1 << 20):
+                                copy.write(chunk)
+            models = [
+                m for m in _models() if m._meta.db_table in tables and not m._meta.proxy
+            ]
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cur.execute(sql)
+
+
+def _models():
+    from django.apps import apps
+
+    return apps.get_models(include_auto_created=True)
@@ -0,0 +1,317 @@
+"""
+Database-backed background tasks.
+
+Functions decorated with ``@task`` (in an app's ``tasks`` module, loaded by
+``CoreConfig.ready``) can be queued with ``fn.enqueue(*args, **kwargs)``; the
+call is stored as a ``core.models.Task`` row, in the caller's transaction,
+and run by ``manage.py worker`` in a process pool. No broker is needed: the
+queue is the ``core_task`` table on the configured database.
+
+- Claiming is a conditional ``UPDATE ... WHERE status = 'queued'`` per row, so
+  several workers can share the table on SQLite as well as PostgreSQL.
+- A failing task is retried ``max_attempts`` times with exponential backoff
+  (``backoff * 2**(attempt-1)`` seconds, jittered, at most ``backoff_max``).
+- ``idempotency_key``: enqueueing a key that already exists returns the
+  existing task instead of queueing the call twice.
+- A running task renews its lock (``locked_at``) every
+  ``TASK_HEARTBEAT_SECONDS`` from a heartbeat thread and on each
+  ``report_progress``; tasks left ``running`` by a worker that died stop
+  renewing and are requeued after ``TASK_LOCK_TIMEOUT_SECONDS``. A run that
+  lost its lock meanwhile does not record its outcome over the new claim.
+- ``metrics()`` aggregates counts, durations and queue lag per task name.
+- Long tasks checkpoint with ``report_progress``; a retried or requeued run
+  reads it back with ``current_progress`` to resume.
+
+With ``TASKS_EAGER=1`` (no worker running, e.g. local scripts) ``enqueue``
+runs the task inline after commit instead.
+"""
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_current_task = ContextVar("current_task", default=None)
+
+
+class TaskFunction:
+    def __init__(self, func, name, max_attempts, backoff, backoff_max):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, idempotency_key=None, delay=0, **kwargs):
+        """Queue ``func(*args, **kwargs)``; returns the ``Task`` row."""
+        fields = {
+            "name": self.name,
+            "args": list(args),
+            "kwargs": kwargs,
+            "max_attempts": self.max_attempts,
+            "run_at": timezone.now() + timedelta(seconds=delay),
+        }
+        if idempotency_key is None:
+            task_row = Task.objects.create(**fields)
+        else:
+            try:
+                with transaction.atomic():
+                    task_row, created = Task.objects.get_or_create(
+                        idempotency_key=idempotency_key, defaults=fields
+                    )
+            except IntegrityError:  # lost a race for the same key
+                return Task.objects.get(idempotency_key=idempotency_key)
+            if not created:
+                return task_row
+        if settings.TASKS_EAGER:
+            transaction.on_commit(lambda: _run_eager(task_row.pk))
+        return task_row
+
+    def retry_delay(self, attempt):
+        delay = min(self.backoff * 2 ** (attempt - 1), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+
+def task(func=None, *, name=None, max_attempts=3, backoff=5, backoff_max=600):
+    """Register ``func`` as a background task (usable with or without args)."""
+
+    def register(f):
+        task_name = name or f"{f.__module__}.{f.__qualname__}"
+        fn = TaskFunction(f, task_name, max_attempts, backoff, backoff_max)
+        _registry[task_name] = fn
+        return fn
+
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _locked(row):
+    """The task row, as long as this run still holds its claim."""
+    # A requeued task is claimed again with attempts + 1, possibly by the
+    # same worker id, so the attempt tells the two runs apart
+    return Task.objects.filter(
+        pk=row.pk, status=Task.RUNNING, locked_by=row.locked_by, attempts=row.attempts
+    )
+
+
+def report_progress(progress):
+    """Store ``progress`` on the running task (no-op outside a task)."""
+    row = _current_task.get()
+    if row is not None:
+        _locked(row).update(progress=progress, locked_at=timezone.now())
+
+
+def current_progress():
+    """Progress saved by an earlier attempt of the running task, or ``{}``."""
+    row = _current_task.get()
+    if row is None:
+        return {}
+    return (
+        Task.objects.filter(pk=row.pk).values_list("progress", flat=True).first() or {}
+    )
+
+
+class _Heartbeat(threading.Thread):
+    """Renews the lock of a running task until stopped."""
+
+    def __init__(self, row):
+        super().__init__(name=f"task-heartbeat-{row.pk}", daemon=True)
+        self.row = row
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.TASK_HEARTBEAT_SECONDS):
+                try:
+                    if not _locked(self.row).update(locked_at=timezone.now()):
+                        logger.warning(
+                            "task %s#%s lost its lock", self.row.name, self.row.pk
+                        )
+                        return
+                except Exception:  # e.g. SQLite busy; try again next beat
+                    logger.exception(
+                        "task %s#%s heartbeat failed", self.row.name, self.row.pk
+                    )
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def claim(worker, limit):
+    """Mark up to ``limit`` due tasks as running for ``worker``; returns ids."""
+    now = timezone.now()
+    candidates = list(
+        Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+        .order_by("run_at", "id")
+        .values_list("id", flat=True)[: limit * 2]
+    )
+    claimed = []
+    for pk in candidates:
+        won = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            started_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if won:
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def requeue_stale():
+    """Return tasks whose worker stopped responding to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_LOCK_TIMEOUT_SECONDS)
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Task.FAILED,
+        finished_at=timezone.now(),
+        last_error="worker lost (lock timed out)",
+    )
+    requeued = stale.update(status=Task.QUEUED, locked_by="", locked_at=None)
+    return requeued, failed
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def execute(task_id, manage_connections=True):
+    """Run a claimed task and record the outcome; returns the new status."""
+    if manage_connections:
+        close_old_connections()
+    try:
+        row = Task.objects.get(pk=task_id)
+        fn = get_task(row.name)
+        started = time.perf_counter()
+        try:
+            if fn is None:
+                raise LookupError(f"Unknown task {row.name!r}")
+            heartbeat = _Heartbeat(row)
+            heartbeat.start()
+            token = _current_task.set(row)
+            try:
+                result = fn.func(*row.args, **row.kwargs)
+            finally:
+                _current_task.reset(token)
+                heartbeat.stop()
+        except Exception:
+            error = traceback.format_exc()
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            logger.warning(
+                "task %s#%s failed (attempt %s)", row.name, row.pk, row.attempts
+            )
+            if fn is not None and row.attempts < row.max_attempts:
+                delay = fn.retry_delay(row.attempts)
+                return _finish(
+                    row,
+                    status=Task.QUEUED,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                    locked_by="",
+                    locked_at=None,
+                    last_error=error,
+                    duration_ms=elapsed_ms,
+                )
+            return _finish(
+                row,
+                status=Task.FAILED,
+                finished_at=timezone.now(),
+                last_error=error,
+                duration_ms=elapsed_ms,
+            )
+        return _finish(
+            row,
+            status=Task.SUCCEEDED,
+            result=_jsonable(result),
+            finished_at=timezone.now(),
+            duration_ms=int((time.perf_counter() - started) * 1000),
+        )
+    finally:
+        if manage_connections:
+            close_old_connections()
+
+
+def _finish(row, **fields):
+    """Record the outcome unless the claim was lost; returns the status."""
+    if _locked(row).update(**fields):
+        return fields["status"]
+    logger.warning(
+        "task %s#%s lost its lock; outcome %s not recorded",
+        row.name,
+        row.pk,
+        fields["status"],
+    )
+    return Task.objects.filter(pk=row.pk).values_list("status", flat=True).first()
+
+
+def _run_eager(task_id):
+    if Task.objects.filter(pk=task_id, status=Task.QUEUED).update(
+        status=Task.RUNNING,
+        locked_by="eager",
+        locked_at=timezone.now(),
+        started_at=timezone.now(),
+        attempts=F("attempts") + 1,
+    ):
+        # Inside the request: leave its connection alone
+        execute(task_id, manage_connections=False)
+
+
+def metrics():
+    """Queue depth/lag and per-task counts and durations."""
+    now = timezone.now()
+    oldest = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).aggregate(
+        oldest=Min("run_at")
+    )["oldest"]
+    per_task = (
+        Task.objects.values("name")
+        .annotate(
+            queued=Count("id", filter=Q(status=Task.QUEUED)),
+            running=Count("id", filter=Q(status=Task.RUNNING)),
+            succeeded=Count("id", filter=Q(status=Task.SUCCEEDED)),
+            failed=Count("id", filter=Q(status=Task.FAILED)),
+            retried=Count("id", filter=Q(attempts__gt=1)),
+            avg_ms=Avg("duration_ms", filter=Q(status=Task.SUCCEEDED)),
+            max_ms=Max("duration_ms", filter=Q(status=Task.SUCCEEDED)),
+        )
+        .order_by("name")
+    )
+    return {
+        "lag_seconds": (now - oldest).total_seconds() if oldest else 0.0,
+        "tasks": list(per_task),
+    }
@@ -0,0 +1,241 @@
+"""
+Fast test mode: template database reuse and parallel runs.
+
+The first run migrates the test database once and runs
+``TEST_SEED_COMMANDS`` into it, then keeps it as a template, keyed by a hash
+of every migration file, the seed commands and their command modules' source.
+Later runs copy the template (an SQLite file copy, ``CREATE DATABASE ...
+TEMPLATE`` on PostgreSQL) and start with ``keepdb``, so ``migrate`` has
+nothing left to apply. Editing a migration, the seed list or a seed command
+builds a new template.
+
+Seeded rows are shared by the whole run. ``TestCase`` rolls back what each
+test changes; ``TransactionTestCase`` flushes the tables, seeds included.
+
+The SQLite test database is a file (in ``/dev/shm`` when available) so
+the parallel workers can clone it. Tests run on every core unless
+``--parallel`` says otherwise. ``FAST_TESTS=0`` falls back to Django's
+default runner behaviour. While ``FAST_TESTS`` is on, the runner and the
+pytest plugin also switch to a cheap password hasher (``fast_hashing``).
+
+``load_seeded_data`` returns the seeded rows for the pytest ``seeded_data``
+fixture.
+
+``setup_test_databases`` / ``teardown_test_databases`` are shared with the
+pytest plugin (``core.pytest_plugin``).
+"""
+
+import hashlib
+import inspect
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import (call_command, get_commands,
+                                     load_command_class)
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.test.runner import DiscoverRunner, get_max_test_processes
+from django.test.utils import (override_settings, setup_databases,
+                               teardown_databases)
+
+ALIAS = "default"
+TEST_PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+# fixture attribute -> model of the rows the seed commands create
+SEEDED_MODELS = {
+    "users": "users.User",
+    "posts": "social.Post",
+    "todo_lists": "todos.TodoList",
+}
+
+
+def fast_hashing():
+    """``override_settings`` with the cheap hasher; enable()/disable() it."""
+    return override_settings(PASSWORD_HASHERS=TEST_PASSWORD_HASHERS)
+
+
+def run_seed_commands():
+    for command in settings.TEST_SEED_COMMANDS:
+        call_command(*command, verbosity=0)
+
+
+def load_seeded_data():
+    """The rows of ``SEEDED_MODELS`` currently in the test database."""
+    return SimpleNamespace(
+        **{
+            name: list(apps.get_model(label).objects.order_by("pk"))
+            for name, label in SEEDED_MODELS.items()
+        }
+    )
+
+
+def template_key(vendor):
+    """Hash of the migration files, the seed commands, their source and the backend."""
+    digest = hashlib.sha1(vendor.encode())
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    for key in sorted(loader.disk_migrations):
+        migration = loader.disk_migrations[key]
+        module = __import__(migration.__module__, fromlist=["_"])
+        digest.update(repr(key).encode())
+        digest.update(Path(module.__file__).read_bytes())
+    digest.update(repr(settings.TEST_SEED_COMMANDS).encode())
+    for path in _seed_command_files():
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def _seed_command_files():
+    """Source files of the ``TEST_SEED_COMMANDS`` commands (unknown ones skipped)."""
+    commands = get_commands()
+    files = []
+    for name, *_ in settings.TEST_SEED_COMMANDS:
+        if name not in commands:
+            continue  # call_command reports it when the template is built
+        command = load_command_class(commands[name], name)
+        files.append(Path(inspect.getfile(type(command))))
+    return files
+
+
+def _run_dir():
+    shm = Path("/dev/shm")
+    return Path(tempfile.mkdtemp(prefix="tests-", dir=shm if shm.is_dir() else None))
+
+
+def _set_test_name(connection, name):
+    connection.close()
+    connection.settings_dict.setdefault("TEST", {})["NAME"] = name
+    settings.DATABASES[connection.alias].setdefault("TEST", {})["NAME"] = name
+
+
+def _build_template(connection, name, verbosity):
+    """Migrate and seed a test database called ``name``."""
+    original = connection.settings_dict["NAME"]
+    _set_test_name(connection, name)
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False, keepdb=False
+    )
+    run_seed_commands()
+    connection.close()
+    connection.settings_dict["NAME"] = original
+    settings.DATABASES[connection.alias]["NAME"] = original
+
+
+def _prepare_sqlite(connection, key, run_dir, verbosity):
+    # built next to the template so os.replace stays on one filesystem
+    template = Path(settings.SNAPSHOT_DIR) / f"test-template-{key}.sqlite3"
+    if not template.exists():
+        template.parent.mkdir(parents=True, exist_ok=True)
+        for stale in template.parent.glob("test-template-*.sqlite3"):
+            stale.unlink()
+        building = template.with_suffix(f".{os.getpid()}.tmp")
+        _build_template(connection, str(building), verbosity)
+        os.replace(building, template)  # atomic: parallel builders can race
+    test_db = run_dir / "test.sqlite3"
+    shutil.copyfile(template, test_db)
+    _set_test_name(connection, str(test_db))
+
+
+def _postgres_test_names(connection, parallel):
+    """The test database and its parallel clones."""
+    creation = connection.creation
+    return [creation._get_test_db_name()] + [
+        creation.get_test_db_clone_settings(str(n))["NAME"]
+        for n in range(1, parallel + 1)
+    ]
+
+
+def _prepare_postgres(connection, key, parallel, verbosity):
+    quote = connection.ops.quote_name
+    test_name, *clones = _postgres_test_names(connection, parallel)
+    template = f"{test_name}_tpl_{key}"[:63]
+    with connection._nodb_cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", [template])
+        exists = cursor.fetchone()
+    if not exists:
+        _build_template(connection, template, verbosity)
+        with connection._nodb_cursor() as cursor:
+            cursor.execute(
+                "SELECT datname FROM pg_database WHERE datname LIKE %s AND datname <> %s",
+                [f"{test_name}_tpl_%", template],
+            )
+            for (stale,) in cursor.fetchall():
+                cursor.execute(f"DROP DATABASE IF EXISTS {quote(stale)}")
+    with connection._nodb_cursor() as cursor:
+        # keepdb would reuse leftover clones of an earlier run
+        for name in [test_name, *clones]:
+            cursor.execute(f"DROP DATABASE IF EXISTS {quote(name)}")
+        cursor.execute(f"CREATE DATABASE {quote(test_name)} TEMPLATE {quote(template)}")
+    _set_test_name(connection, test_name)
+
+
+def setup_test_databases(verbosity=1, parallel=0, **kwargs):
+    """Test databases from the template; returns state for teardown."""
+    connection = connections[ALIAS]
+    state = {
+        "run_dir": _run_dir(),
+        "test_settings": dict(connection.settings_dict.get("TEST", {})),
+        "parallel": parallel,
+    }
+    key = template_key(connection.vendor)
+    if connection.vendor == "sqlite":
+        _prepare_sqlite(connection, key, state["run_dir"], verbosity)
+    elif connection.vendor == "postgresql":
+        _prepare_postgres(connection, key, parallel, verbosity)
+    state["old_config"] = setup_databases(
+        verbosity, False, keepdb=True, parallel=parallel, **kwargs
+    )
+    return state
+
+
+def teardown_test_databases(state, verbosity=1):
+    """Drop what ``setup_test_databases`` created (keepdb leaves it behind)."""
+    connection = connections[ALIAS]
+    names = None
+    if connection.vendor == "postgresql":
+        names = _postgres_test_names(connection, state["parallel"])
+    teardown_databases(
+        state["old_config"], verbosity, parallel=state["parallel"], keepdb=True
+    )
+    for name in names or []:
+        connection.creation._destroy_test_db(name, verbosity)
+    shutil.rmtree(state["run_dir"], ignore_errors=True)
+    connection.settings_dict["TEST"] = state["test_settings"]
+    settings.DATABASES[ALIAS]["TEST"] = dict(state["test_settings"])
+
+
+class FastTestRunner(DiscoverRunner):
+    def __init__(self, *args, parallel=0, **kwargs):
+        if settings.FAST_TESTS and not parallel:
+            parallel = get_max_test_processes()
+        super().__init__(*args, parallel=parallel, **kwargs)
+        self._hashing = fast_hashing() if settings.FAST_TESTS else None
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        if self._hashing is not None:
+            self._hashing.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        if self._hashing is not None:
+            self._hashing.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        if not settings.FAST_TESTS:
+            return super().setup_databases(**kwargs)
+        return setup_test_databases(
+            self.verbosity,
+            parallel=self.parallel,
+            time_keeper=self.time_keeper,
+            debug_sql=self.debug_sql,
+            **kwargs,
+        )
+
+    def teardown_databases(self, old_config, **kwargs):
+        if not settings.FAST_TESTS:
+            return super().teardown_databases(old_config, **kwargs)
+        teardown_test_databases(old_config, self.verbosity)
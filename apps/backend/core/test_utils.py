@@ -1,18 +1,53 @@
+import itertools
 import logging
-
+import shutil
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from core.authentication import UserClaimsRefreshToken
+from core.query_budgets import (ENDPOINT_BUDGETS, N_PLUS_ONE_THRESHOLD,
+                                call_endpoint, create_budget_fixture,
+                                record_queries)
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import Client, TestCase
-from factory import Faker
+from factory import Faker, Sequence
 from factory.django import DjangoModelFactory
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
-from rest_framework_simplejwt.tokens import RefreshToken
 
 # Disable logging during tests
 logging.disable(logging.CRITICAL)
 
 User = get_user_model()
 
+TEST_PASSWORD = "TestPass123!"
+_user_numbers = itertools.count(1)
+
+
+@lru_cache(maxsize=None)
+def hashed_password(raw_password=TEST_PASSWORD):
+    """``make_password`` once per password and run; hashing dominates user setup"""
+    return make_password(raw_password)
+
+
+def create_test_user(**kwargs):
+    """Create a user with a unique username/email and a cached password hash"""
+    n = next(_user_numbers)
+    defaults = {
+        "username": f"test_user_{n}",
+        "email": f"test_user_{n}@example.test",
+        "is_active": True,
+    }
+    defaults.update(kwargs)
+    defaults["password"] = hashed_password(defaults.pop("password", TEST_PASSWORD))
+    return User.objects.create(**defaults)
+
 
 class BaseTestCase(TestCase):
     """Base test case with common utilities"""
@@ -24,15 +59,7 @@ class BaseTestCase(TestCase):
 
     def create_user(self, **kwargs):
         """Create a test user"""
-        defaults = {
-            "username": Faker("user_name").generate(),
-            "email": Faker("email").generate(),
-            "password": "TestPass123!",
-            "is_active": True,
-        }
-        defaults.update(kwargs)
-
-        user = User.objects.create_user(**defaults)
+        user = create_test_user(**kwargs)
         if kwargs.get("is_superuser", False):
             user.is_superuser = True
             user.is_staff = True
@@ -83,15 +110,7 @@ class BaseAPITestCase(APITestCase):
 
     def create_user(self, **kwargs):
         """Create a test user"""
-        defaults = {
-            "username": Faker("user_name").generate(),
-            "email": Faker("email").generate(),
-            "password": "TestPass123!",
-            "is_active": True,
-        }
-        defaults.update(kwargs)
-
-        user = User.objects.create_user(**defaults)
+        user = create_test_user(**kwargs)
         if kwargs.get("is_superuser", False):
             user.is_superuser = True
             user.is_staff = True
@@ -107,7 +126,7 @@ class BaseAPITestCase(APITestCase):
         if user is None:
             user = self.user or self.create_user()
 
-        refresh = RefreshToken.for_user(user)
+        refresh = UserClaimsRefreshToken.for_user(user)
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
         return user
 
@@ -160,34 +179,116 @@ class BaseAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
 
 
+class SnapshotTestMixin:
+    """Start every test of the class from a saved database snapshot.
+
+    ``snapshot`` names the file (see ``core.snapshots``); ``snapshot_seed``
+    lists management commands that build it when it is missing or stale,
+    once, so later runs only restore it. The test database is restored to
+    its previous contents after the class.
+
+        class FeedTests(SnapshotTestMixin, BaseAPITestCase):
+            snapshot = "test-demo"
+            snapshot_seed = [("seed_demo", "--deterministic")]
+    """
+
+    snapshot = None
+    snapshot_seed = ()
+
+    @classmethod
+    def setUpClass(cls):
+        from core import snapshots
+
+        cls._snapshot_baseline = Path(tempfile.mkdtemp()) / "baseline.sqlite3"
+        if connection.vendor != "sqlite":
+            cls._snapshot_baseline = cls._snapshot_baseline.with_suffix(".zip")
+        snapshots.save(cls._snapshot_baseline)
+        try:
+            snapshots.restore(cls.snapshot)
+        except snapshots.SnapshotError:
+            if not cls.snapshot_seed:
+                raise
+            for command in cls.snapshot_seed:
+                call_command(*command, verbosity=0)
+            snapshots.save(cls.snapshot)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        from core import snapshots
+
+        super().tearDownClass()
+        snapshots.restore(cls._snapshot_baseline)
+        shutil.rmtree(cls._snapshot_baseline.parent, ignore_errors=True)
+
+
+class QueryBudgetMixin:
+    """Assertions on the queries a request runs (see ``core.query_budgets``).
+
+        with self.assertQueryBudget(max_queries=4):
+            self.client.get("/api/posts/")
+
+        self.assertEndpointBudget("posts-list", post=post.id)
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries=None, n_plus_one=N_PLUS_ONE_THRESHOLD):
+        """Fail on more than ``max_queries`` or on an N+1 pattern in the block"""
+        with record_queries() as log:
+            yield log
+        problems = log.problems(max_queries, n_plus_one)
+        if problems:
+            self.fail("Query budget exceeded:\n  " + "\n  ".join(problems) + f"\n{log}")
+
+    def assertNoNPlusOne(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Fail when one query repeats ``threshold`` or more times in the block"""
+        return self.assertQueryBudget(n_plus_one=threshold)
+
+    def assertEndpointBudget(self, name, **context):
+        """Request ``ENDPOINT_BUDGETS[name]`` and assert its status and budget"""
+        budget = ENDPOINT_BUDGETS[name]
+        response, log = call_endpoint(self.client, budget, **context)
+        self.assertEqual(response.status_code, budget.get("status", 200))
+        problems = log.problems(budget.get("max_queries"))
+        if problems:
+            self.fail(f"{name}: " + "; ".join(problems) + f"\n{log}")
+        return response
+
+
+class BudgetTestCase(QueryBudgetMixin, BaseAPITestCase):
+    """Budget fixture, authenticated as its viewer, with cold caches"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.context = create_budget_fixture()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()  # follow graph and throttle state from earlier tests
+        self.client.force_authenticate(self.context["viewer"])
+
+    def assertEndpointBudget(self, name, **context):
+        return super().assertEndpointBudget(name, **{**self.context, **context})
+
+
 class UserFactory(DjangoModelFactory):
     """Factory for creating test users"""
 
     class Meta:
         model = User
 
-    username = Faker("user_name")
-    email = Faker("email")
-    password = Faker(
-        "password",
-        length=12,
-        special_chars=True,
-        digits=True,
-        upper_case=True,
-        lower_case=True,
-    )
+    username = Sequence(lambda n: f"factory_user_{n}")
+    email = Sequence(lambda n: f"factory_user_{n}@example.test")
+    password = TEST_PASSWORD
     first_name = Faker("first_name")
     last_name = Faker("last_name")
     is_active = True
 
     @classmethod
     def _create(cls, model_class, *args, **kwargs):
-        """Create user with proper password hashing"""
-        password = kwargs.pop("password", "TestPass123!")
-        user = super()._create(model_class, *args, **kwargs)
-        user.set_password(password)
-        user.save()
-        return user
+        """Create user with a hashed password (one hash per distinct password)"""
+        kwargs["password"] = hashed_password(kwargs.get("password") or TEST_PASSWORD)
+        return super()._create(model_class, *args, **kwargs)
 
 
 class AdminUserFactory(UserFactory):
@@ -0,0 +1,65 @@
+from core.authentication import (
+    ClaimsJWTAuthentication,
+    UserClaimsRefreshToken,
+    _key,
+    cached_user,
+)
+from core.test_utils import BaseAPITestCase, create_test_user
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+ME_URL = "/api/users/me/"
+
+
+class TestClaimsJWTAuthentication(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user(is_premium=True, is_private=True)
+        token = UserClaimsRefreshToken.for_user(self.user).access_token
+        self.factory = APIRequestFactory(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def authenticate(self, method):
+        request = getattr(self.factory, method)("/api/anything/")
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_safe_requests_issue_no_user_query(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate("get")
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_premium and user.is_private and user.is_active)
+        # Other fields are deferred and load on access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, self.user.username)
+
+    def test_writes_get_the_user_from_the_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate("post").pk, self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.authenticate("patch")
+        self.assertEqual(user.username, self.user.username)
+
+    def test_inactive_cached_user_is_rejected(self):
+        self.user.is_active = False
+        cache.set(_key(self.user.pk), self.user)
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            self.authenticate("post")
+
+
+class TestInvalidateUser(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = self.authenticate_user()
+        cache.set(_key(self.user.pk), self.user)
+
+    def test_profile_update_drops_the_cached_user(self):
+        response = self.client.patch(ME_URL, {"full_name": "Yeni Ad"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(_key(self.user.pk)))
+
+    def test_deleting_the_account_drops_the_cached_user(self):
+        self.assertEqual(self.client.delete(ME_URL).status_code, 204)
+        self.assertIsNone(cache.get(_key(self.user.pk)))
+        self.assertFalse(cached_user(self.user.pk).is_active)
@@ -0,0 +1,106 @@
+import tempfile
+from pathlib import Path
+
+from core.db_router import PrimaryReplicaRouter, is_pinned, replica_reads
+from core.test_utils import BaseAPITestCase, create_test_user
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import override_settings
+from social.models import Post
+
+REPLICA = "replica_test"
+
+User = get_user_model()
+
+
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA],
+    DATABASE_ROUTERS=["core.db_router.PrimaryReplicaRouter"],
+    MIDDLEWARE=[*settings.MIDDLEWARE, "core.db_router.PrimaryStickinessMiddleware"],
+)
+class TestReplicaRouting(BaseAPITestCase):
+    """A second SQLite file stands in for the replica.
+
+    It holds different posts than the primary, so the titles in a response
+    tell which database served it.
+    """
+
+    databases = {"default", REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls._replica_dir = tempfile.TemporaryDirectory()
+        primary = connections["default"].settings_dict
+        connections.settings[REPLICA] = {
+            **primary,
+            "NAME": str(Path(cls._replica_dir.name) / "replica.sqlite3"),
+            "TEST": {**primary["TEST"], "MIRROR": None},
+        }
+        call_command("migrate", database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        cls._replica_dir.cleanup()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()  # pins and throttle state
+        self.user = self.authenticate_user()
+        # bulk_create: no signals, whose side effects would land on the primary
+        User.objects.using(REPLICA).bulk_create([self.user])
+        Post.objects.using(REPLICA).bulk_create(
+            [Post(user_id=self.user.pk, title="on replica")]
+        )
+        self.post = Post.objects.create(user=self.user, title="on primary")
+
+    def my_post_titles(self):
+        response = self.client.get("/api/my-posts")
+        self.assertEqual(response.status_code, 200)
+        return [post["title"] for post in response.data["results"]]
+
+    def test_opted_in_reads_go_to_the_replica(self):
+        self.assertEqual(self.my_post_titles(), ["on replica"])
+
+    def test_reads_outside_opted_in_views_stay_on_the_primary(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), "default")
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Post), REPLICA)
+            self.assertEqual(router.db_for_write(Post), "default")
+
+    def test_writes_go_to_the_primary(self):
+        response = self.client.post(
+            "/api/posts/", {"title": "written", "body": "text"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Post.objects.using("default").filter(title="written").exists())
+        self.assertFalse(Post.objects.using(REPLICA).filter(title="written").exists())
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        other = create_test_user()
+        writes = {
+            "like": f"/api/posts/{self.post.pk}/like/",
+            "comment": f"/api/posts/{self.post.pk}/comments/",
+            "follow": f"/api/follows/users/{other.pk}/follow/",
+        }
+        for name, url in writes.items():
+            with self.subTest(name):
+                cache.clear()
+                response = self.client.post(url, {"body": "hi"}, format="json")
+                self.assertLess(response.status_code, 400)
+                self.assertTrue(is_pinned(self.user.pk))
+                self.assertEqual(self.my_post_titles(), ["on primary"])
+
+    def test_failed_writes_do_not_pin(self):
+        response = self.client.post("/api/posts/999999/like/")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(is_pinned(self.user.pk))
+        self.assertEqual(self.my_post_titles(), ["on replica"])
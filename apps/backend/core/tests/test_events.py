@@ -0,0 +1,162 @@
+import asyncio
+import threading
+from unittest import mock
+
+from core import events
+from core.test_utils import create_test_user
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory, force_authenticate
+from social.models import Comment, Follow, Like, Post
+
+
+class TestInMemoryBroker(TestCase):
+    def test_delivers_to_the_channel_subscribers_only(self):
+        broker = events.InMemoryBroker()
+
+        async def scenario():
+            mine, other = broker.subscribe("user:1"), broker.subscribe("user:2")
+            # Publishers run in sync threads (views, signal handlers)
+            thread = threading.Thread(
+                target=broker.publish, args=("user:1", {"type": "ping"})
+            )
+            thread.start()
+            thread.join()
+            message = await asyncio.wait_for(mine.get(), timeout=1)
+            self.assertTrue(other.queue.empty())
+            mine.close()
+            other.close()
+            return message
+
+        self.assertEqual(asyncio.run(scenario()), {"type": "ping"})
+        self.assertEqual(broker.subscriber_count("user:1"), 0)
+
+    def test_full_queue_drops_the_oldest_message(self):
+        broker = events.InMemoryBroker(maxsize=2)
+
+        async def scenario():
+            sub = broker.subscribe("user:1")
+            for n in range(3):
+                broker.publish("user:1", {"n": n})
+            await asyncio.sleep(0)  # deliveries run on the loop
+            received = [await sub.get(), await sub.get()]
+            sub.close()
+            return received
+
+        self.assertEqual(asyncio.run(scenario()), [{"n": 1}, {"n": 2}])
+
+    def test_publishing_without_subscribers_is_a_no_op(self):
+        events.InMemoryBroker().publish("user:1", {"type": "ping"})
+
+
+class TestTickets(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+
+    def issue_ticket(self):
+        request = APIRequestFactory().post("/api/events/ticket/")
+        force_authenticate(request, user=self.user)
+        return events.event_ticket(request).data["ticket"]
+
+    def test_ticket_is_redeemed_once(self):
+        ticket = self.issue_ticket()
+        self.assertEqual(asyncio.run(events._redeem(ticket)), self.user.id)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            asyncio.run(events._redeem(ticket))
+
+    def test_unknown_ticket_is_rejected(self):
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            asyncio.run(events._redeem("not-a-ticket"))
+
+    def test_stream_needs_the_asgi_application(self):
+        request = RequestFactory().get("/api/events/", {"ticket": self.issue_ticket()})
+        response = asyncio.run(events.event_stream(request))
+        self.assertEqual(response.status_code, 501)
+
+
+class TestSignalWiring(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = create_test_user()
+        self.reader = create_test_user()
+        patcher = mock.patch.multiple(
+            events, publish=mock.DEFAULT, publish_many=mock.DEFAULT
+        )
+        self.published = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent(self, event):
+        calls = self.published["publish"].call_args_list
+        return [args for args, _ in calls if args[1] == event]
+
+    def test_new_post_reaches_accepted_followers(self):
+        Follow.objects.create(
+            follower=self.reader, followed=self.author, status="accepted"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(user=self.author, title="t")
+            Post.objects.create(user=self.author, title="p", visibility="private")
+        (user_ids, event, data), _ = self.published["publish_many"].call_args
+        self.assertEqual(list(user_ids), [self.reader.id])
+        self.assertEqual(event, "post.created")
+        self.assertEqual(data, {"post_id": post.id, "user_id": self.author.id})
+        self.published["publish_many"].assert_called_once()
+
+    def test_like_and_comment_notify_the_post_owner(self):
+        post = Post.objects.create(user=self.author, title="t")
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(post=post, user=self.reader)
+            comment = Comment.objects.create(post=post, user=self.reader, body="b")
+            Like.objects.create(post=post, user=self.author)  # own like: silent
+        self.assertEqual(
+            self.sent("post.liked"),
+            [
+                (
+                    self.author.id,
+                    "post.liked",
+                    {"post_id": post.id, "user_id": self.reader.id},
+                )
+            ],
+        )
+        self.assertEqual(
+            self.sent("post.commented"),
+            [
+                (
+                    self.author.id,
+                    "post.commented",
+                    {
+                        "post_id": post.id,
+                        "comment_id": comment.id,
+                        "user_id": self.reader.id,
+                    },
+                )
+            ],
+        )
+
+    def test_follow_request_and_acceptance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            follow = Follow.objects.create(follower=self.reader, followed=self.author)
+        self.assertEqual(
+            self.sent("follow.requested"),
+            [
+                (
+                    self.author.id,
+                    "follow.requested",
+                    {"follow_id": follow.id, "user_id": self.reader.id},
+                )
+            ],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.status = "accepted"
+            follow.save()
+        self.assertEqual(
+            self.sent("follow.accepted"),
+            [(self.reader.id, "follow.accepted", {"user_id": self.author.id})],
+        )
+
+    def test_nothing_is_published_before_commit(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            Post.objects.create(user=self.author, title="t")
+        self.published["publish_many"].assert_not_called()
@@ -0,0 +1,72 @@
+import threading
+from unittest import mock
+
+from core import hashers
+from core.test_utils import create_test_user
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+POOLED = "core.hashers.PBKDF2PasswordHasher"
+
+
+def full_pool():
+    """Patch the pool's slots with a semaphore that has none left."""
+    hashers._executor()
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    return mock.patch.object(hashers, "_slots", slots)
+
+
+def pbkdf2(password):
+    # One iteration: the tests check routing, not cost
+    return hashers.PBKDF2PasswordHasher().encode(password, "salt", 1)
+
+
+class TestRunHashing(TestCase):
+    def test_runs_on_the_pool(self):
+        name = hashers.run_hashing(lambda: threading.current_thread().name)
+        self.assertTrue(name.startswith("password-hashing"), name)
+
+    def test_full_pool_hashes_inline_by_default(self):
+        with full_pool():
+            name = hashers.run_hashing(lambda: threading.current_thread().name)
+        self.assertEqual(name, threading.current_thread().name)
+
+    def test_full_pool_rejects_under_reject_when_busy(self):
+        with full_pool(), hashers.reject_when_busy():
+            with self.assertRaises(hashers.HashingBusy):
+                hashers.run_hashing(lambda: None)
+
+    @override_settings(PASSWORD_HASHERS=[POOLED])
+    def test_password_checks_outside_drf_still_work_when_full(self):
+        encoded = pbkdf2("secret")
+        with full_pool():
+            self.assertTrue(check_password("secret", encoded))
+
+
+@override_settings(PASSWORD_HASHERS=[POOLED])
+class TestLoginWhenBusy(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        type(self.user).objects.filter(pk=self.user.pk).update(
+            password=pbkdf2("secret")
+        )
+
+    def login(self):
+        return APIClient().post(
+            "/api/auth/login/",
+            {"username": self.user.username, "password": "secret"},
+            format="json",
+        )
+
+    def test_login_answers_503_with_retry_after(self):
+        with full_pool():
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_login_succeeds_when_the_pool_has_room(self):
+        self.assertEqual(self.login().status_code, 200)
@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from core import snapshots
+from core.test_utils import SnapshotTestMixin, create_test_user
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+User = get_user_model()
+
+ADMIN_ARGS = ("--username", "snap_admin", "--email", "snap_admin@example.test")
+
+
+class SnapshotRoundTripTestCase(SimpleTestCase):
+    # No transaction around the tests: restore() refuses to run inside one
+    databases = {"default"}
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.baseline = snapshots.save(self.dir / "baseline.sqlite3")
+        self.addCleanup(snapshots.restore, self.baseline)
+
+    def exists(self, username):
+        return User.objects.filter(username=username).exists()
+
+
+class TestSaveRestore(SnapshotRoundTripTestCase):
+    def test_restore_brings_back_the_saved_rows(self):
+        create_test_user(username="snap_saved")
+        snapshot = snapshots.save(self.dir / "saved.sqlite3")
+        User.objects.filter(username="snap_saved").delete()
+        create_test_user(username="snap_later")
+
+        snapshots.restore(snapshot)
+        self.assertTrue(self.exists("snap_saved"))
+        self.assertFalse(self.exists("snap_later"))
+        snapshots.restore(self.baseline)
+        self.assertFalse(self.exists("snap_saved"))
+
+    def test_missing_snapshot_raises(self):
+        with self.assertRaises(snapshots.SnapshotError):
+            snapshots.restore(self.dir / "missing.sqlite3")
+
+
+class TestSnapshotTestMixin(SnapshotRoundTripTestCase):
+    def run_class(self, test_class):
+        # A suite runs the class fixtures (setUpClass/tearDownClass) too
+        result = unittest.TestResult()
+        unittest.TestSuite([test_class("test_rows")]).run(result)
+        self.assertTrue(result.wasSuccessful(), result.errors + result.failures)
+
+    def test_class_runs_on_the_snapshot_and_restores_the_baseline(self):
+        create_test_user(username="snap_fixture")
+        path = snapshots.save(self.dir / "fixture.sqlite3")
+        User.objects.filter(username="snap_fixture").delete()
+
+        class OnSnapshot(SnapshotTestMixin, TestCase):
+            snapshot = str(path)
+
+            def test_rows(self):
+                self.assertTrue(User.objects.filter(username="snap_fixture").exists())
+
+        self.run_class(OnSnapshot)
+        self.assertFalse(self.exists("snap_fixture"))
+
+    def test_missing_snapshot_is_seeded_and_saved(self):
+        path = self.dir / "seeded.sqlite3"
+
+        class Seeded(SnapshotTestMixin, TestCase):
+            snapshot = str(path)
+            snapshot_seed = [("createsuperuser", "--noinput", *ADMIN_ARGS)]
+
+            def test_rows(self):
+                self.assertTrue(User.objects.filter(username="snap_admin").exists())
+
+        self.run_class(Seeded)
+        self.assertTrue(path.exists())
+        self.assertFalse(self.exists("snap_admin"))
+        # The next class restores the saved file instead of seeding again
+        Seeded.snapshot_seed = ()
+        self.run_class(Seeded)
@@ -0,0 +1,159 @@
+from datetime import timedelta
+
+from core import tasks
+from core.models import Task
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+calls = []
+
+
+@tasks.task(name="core.tests.add", backoff=5, backoff_max=60)
+def add(a, b):
+    calls.append((a, b))
+    return a + b
+
+
+@tasks.task(name="core.tests.fail", max_attempts=2, backoff=5)
+def fail():
+    raise ValueError("boom")
+
+
+@tasks.task(name="core.tests.steal")
+def steal():
+    # The lock timed out mid-run: requeue_stale and another worker took it
+    Task.objects.filter(name="core.tests.steal").update(status=Task.QUEUED)
+    tasks.claim("second", 1)
+
+
+class TaskTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def claim_one(self, worker="test-worker"):
+        claimed = tasks.claim(worker, 1)
+        self.assertEqual(len(claimed), 1)
+        return claimed[0]
+
+
+class TestEnqueue(TaskTestCase):
+    def test_stores_the_call(self):
+        row = add.enqueue(1, b=2)
+        self.assertEqual(row.status, Task.QUEUED)
+        self.assertEqual((row.name, row.args, row.kwargs), (add.name, [1], {"b": 2}))
+        self.assertEqual(calls, [])
+
+    def test_idempotency_key_returns_the_existing_task(self):
+        first = add.enqueue(1, 2, idempotency_key="add:1:2")
+        second = add.enqueue(1, 2, idempotency_key="add:1:2")
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.filter(name=add.name).count(), 1)
+
+    def test_delay_postpones_the_task(self):
+        add.enqueue(1, 2, delay=60)
+        self.assertEqual(tasks.claim("test-worker", 5), [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            row = add.enqueue(1, 2)
+            self.assertEqual(calls, [])
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.result), (Task.SUCCEEDED, 3))
+
+
+class TestClaim(TaskTestCase):
+    def test_claims_due_tasks_in_order_up_to_the_limit(self):
+        rows = [add.enqueue(n, n) for n in range(3)]
+        claimed = tasks.claim("test-worker", 2)
+        self.assertEqual(claimed, [rows[0].pk, rows[1].pk])
+        row = Task.objects.get(pk=rows[0].pk)
+        self.assertEqual((row.status, row.locked_by), (Task.RUNNING, "test-worker"))
+        self.assertEqual(row.attempts, 1)
+
+    def test_claimed_tasks_are_not_claimed_again(self):
+        add.enqueue(1, 2)
+        self.claim_one("first")
+        self.assertEqual(tasks.claim("second", 5), [])
+
+
+class TestExecute(TaskTestCase):
+    def test_success_records_the_result(self):
+        row = add.enqueue(2, 3)
+        self.claim_one()
+        self.assertEqual(tasks.execute(row.pk, manage_connections=False), "succeeded")
+        row.refresh_from_db()
+        self.assertEqual((row.result, row.locked_by), (5, "test-worker"))
+        self.assertIsNotNone(row.finished_at)
+
+    def test_failure_is_retried_with_backoff(self):
+        row = fail.enqueue()
+        self.claim_one()
+        before = timezone.now()
+        self.assertEqual(tasks.execute(row.pk, manage_connections=False), "queued")
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.locked_by), (Task.QUEUED, ""))
+        self.assertIn("ValueError: boom", row.last_error)
+        # backoff * 2**0, jittered down to half
+        delay = (row.run_at - before).total_seconds()
+        self.assertTrue(2.5 <= delay <= 5.1, delay)
+
+    def test_failure_after_the_last_attempt_is_final(self):
+        row = fail.enqueue()
+        Task.objects.filter(pk=row.pk).update(attempts=1)
+        self.claim_one()
+        self.assertEqual(tasks.execute(row.pk, manage_connections=False), "failed")
+        self.assertEqual(Task.objects.get(pk=row.pk).attempts, 2)
+
+    def test_retry_delay_doubles_up_to_the_maximum(self):
+        for attempt, (low, high) in {1: (2.5, 5), 3: (10, 20), 10: (30, 60)}.items():
+            delay = add.retry_delay(attempt)
+            self.assertTrue(low <= delay <= high, (attempt, delay))
+
+    def test_lost_claim_does_not_overwrite_the_new_one(self):
+        row = steal.enqueue()
+        self.claim_one("first")
+        self.assertEqual(tasks.execute(row.pk, manage_connections=False), "running")
+        row.refresh_from_db()
+        self.assertEqual((row.locked_by, row.attempts), ("second", 2))
+
+
+class TestRequeueStale(TaskTestCase):
+    def test_requeues_tasks_whose_lock_timed_out(self):
+        stale, fresh = add.enqueue(1, 2), add.enqueue(3, 4)
+        tasks.claim("test-worker", 2)
+        expired = timezone.now() - timedelta(hours=1)
+        Task.objects.filter(pk=stale.pk).update(locked_at=expired)
+
+        self.assertEqual(tasks.requeue_stale(), (1, 0))
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), (Task.QUEUED, ""))
+        self.assertEqual(fresh.status, Task.RUNNING)
+
+    def test_fails_stale_tasks_out_of_attempts(self):
+        row = fail.enqueue()
+        Task.objects.filter(pk=row.pk).update(attempts=1)
+        self.claim_one()
+        expired = timezone.now() - timedelta(hours=1)
+        Task.objects.filter(pk=row.pk).update(locked_at=expired)
+
+        self.assertEqual(tasks.requeue_stale(), (0, 1))
+        row.refresh_from_db()
+        self.assertEqual(row.status, Task.FAILED)
+        self.assertIn("lock timed out", row.last_error)
+
+    def test_progress_renews_the_lock(self):
+        row = add.enqueue(1, 2)
+        self.claim_one()
+        expired = timezone.now() - timedelta(hours=1)
+        Task.objects.filter(pk=row.pk).update(locked_at=expired)
+        row.refresh_from_db()
+        token = tasks._current_task.set(row)
+        try:
+            tasks.report_progress({"done": 1})
+        finally:
+            tasks._current_task.reset(token)
+
+        self.assertEqual(tasks.requeue_stale(), (0, 0))
+        self.assertEqual(Task.objects.get(pk=row.pk).progress, {"done": 1})
@@ -0,0 +1,27 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from core import test_runner
+from django.test import SimpleTestCase, override_settings
+
+
+@override_settings(TEST_SEED_COMMANDS=[["seed_demo", "--users", "10"]])
+class TestTemplateKey(SimpleTestCase):
+    def test_seed_command_source_changes_the_key(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "seed_demo.py"
+            source.write_text("v1")
+            with mock.patch.object(test_runner.inspect, "getfile", return_value=source):
+                before = test_runner.template_key("sqlite")
+                self.assertEqual(test_runner.template_key("sqlite"), before)
+                source.write_text("v2")
+                self.assertNotEqual(test_runner.template_key("sqlite"), before)
+
+    def test_seed_command_modules_are_found(self):
+        files = test_runner._seed_command_files()
+        self.assertEqual([f.name for f in files], ["seed_demo.py"])
+
+    @override_settings(TEST_SEED_COMMANDS=[["no_such_command"]])
+    def test_unknown_commands_are_skipped(self):
+        self.assertEqual(test_runner._seed_command_files(), [])
@@ -1,5 +1,8 @@
+from core.events import event_stream, event_ticket
+from core.media import serve_media
+from django.conf import settings
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.views.generic import TemplateView
 
 urlpatterns = [
@@ -10,5 +13,18 @@ urlpatterns = [
     ),  # This will include both /api/users/ and /api/auth/
     path("api/todos/", include("todos.urls")),
     path("api/", include("social.urls")),
+    path("api/", include("search.urls")),
     path("api/admin-tools/", include("users.admin_urls")),
+    re_path(
+        rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.+)$",
+        serve_media,
+        name="media",
+    ),
 ]
+
+if settings.ASYNC_SOCIAL_VIEWS:
+    # Long-lived streams need the event loop; under WSGI each would hold a worker
+    urlpatterns = [
+        path("api/events/ticket/", event_ticket, name="events-ticket"),
+        path("api/events/", event_stream, name="events"),
+    ] + urlpatterns
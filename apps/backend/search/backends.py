@@ -0,0 +1,101 @@
+"""
+Veritabanına özgü tam metin sorguları.
+
+SQLite'ta FTS5 (`bm25` sıralaması), PostgreSQL'de `to_tsvector`/`ts_rank`
+kullanılır. İki arka uç da aynı görünürlük kuralını SQL içinde uygular:
+kendi içeriği, kabul edilmiş takip edilenin public/`followers` içeriği veya
+gizli olmayan (`is_private`) bir kullanıcının public içeriği
+(`users.policies.filter_queryset_by_visibility` ile aynı sahip kuralı).
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from social.models import Follow
+
+from .models import SearchEntry
+
+ENTRY_TABLE = SearchEntry._meta.db_table
+USER_TABLE = get_user_model()._meta.db_table
+FTS_TABLE = f"{ENTRY_TABLE}_fts"
+
+
+class BaseSearchBackend:
+    def match(self, tokens):
+        """`(from_sql, where_sql, score_sql, params)` döner.
+
+        `params` FROM ve WHERE parçalarındaki yer tutucuları bu sırayla
+        karşılar; `score_sql` parametre almaz.
+        """
+        raise NotImplementedError
+
+    def _filters(self, tokens, user, kinds):
+        from_sql, where_sql, score_sql, params = self.match(tokens)
+        # Kullanıcı belgeleri profil kartıdır: gizli hesaplar da bulunur
+        where = [
+            where_sql,
+            f"""(e.owner_id = %s
+                OR (e.visibility IN ('public', 'followers') AND e.owner_id IN (
+                    SELECT followed_id FROM {Follow._meta.db_table}
+                    WHERE follower_id = %s AND status = 'accepted'))
+                OR (e.visibility = 'public' AND (e.kind = 'user' OR NOT EXISTS (
+                    SELECT 1 FROM {USER_TABLE} u
+                    WHERE u.id = e.owner_id AND u.is_private))))""",
+        ]
+        params = [*params, user.id, user.id]
+        if kinds:
+            where.append(f"e.kind IN ({', '.join(['%s'] * len(kinds))})")
+            params.extend(kinds)
+        return from_sql, " AND ".join(where), score_sql, params
+
+    def count(self, tokens, user, kinds=None) -> int:
+        from_sql, where_sql, _, params = self._filters(tokens, user, kinds)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {from_sql} WHERE {where_sql}", params)
+            return cursor.fetchone()[0]
+
+    def search(self, tokens, user, kinds=None, limit=10, offset=0):
+        """Sıralı `(kind, object_id, score)` satırlarını döner."""
+        from_sql, where_sql, score_sql, params = self._filters(tokens, user, kinds)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""SELECT e.kind, e.object_id, {score_sql} AS score
+                    FROM {from_sql} WHERE {where_sql}
+                    ORDER BY score DESC, e.id DESC LIMIT %s OFFSET %s""",
+                [*params, limit, offset],
+            )
+            return cursor.fetchall()
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    def match(self, tokens):
+        # Son kelime yazılmakta olabilir: önek araması
+        terms = [f'"{t}"' for t in tokens[:-1]] + [f'"{tokens[-1]}"*']
+        return (
+            f"{FTS_TABLE} JOIN {ENTRY_TABLE} e ON e.id = {FTS_TABLE}.rowid",
+            f"{FTS_TABLE} MATCH %s",
+            f"-bm25({FTS_TABLE})",
+            [" ".join(terms)],
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    def match(self, tokens):
+        # Metin zaten katlandığı için "simple" sözlük yeterli (kök bulma yok)
+        query = " & ".join([*tokens[:-1], f"{tokens[-1]}:*"])
+        return (
+            f"{ENTRY_TABLE} e, to_tsquery('simple', %s) q",
+            "to_tsvector('simple', e.body) @@ q",
+            "ts_rank(to_tsvector('simple', e.body), q)",
+            [query],
+        )
+
+
+def get_backend() -> BaseSearchBackend:
+    if connection.vendor == "sqlite":
+        return SQLiteSearchBackend()
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    raise ImproperlyConfigured(
+        f"Full-text search is not supported on '{connection.vendor}'"
+    )
@@ -0,0 +1,121 @@
+"""
+Arama indeksinin yazma tarafı.
+
+Sinyaller ve `rebuild_search_index` komutu aynı fonksiyonları kullanır.
+"""
+
+from django.contrib.auth import get_user_model
+from social.models import Comment, Post
+
+from .models import SearchEntry
+from .normalization import normalize
+
+POST_FIELDS = {"title", "body", "visibility", "user"}
+COMMENT_FIELDS = {"body"}
+USER_FIELDS = {"username", "full_name", "is_active"}
+
+
+def touches(update_fields, fields) -> bool:
+    """`save(update_fields=...)` aranabilir bir alanı değiştiriyor mu?"""
+    return update_fields is None or bool(set(update_fields) & fields)
+
+
+def _upsert(kind, object_id, **values):
+    SearchEntry.objects.update_or_create(
+        kind=kind, object_id=object_id, defaults=values
+    )
+
+
+def index_post(post: Post) -> None:
+    _upsert(
+        SearchEntry.KIND_POST,
+        post.id,
+        owner_id=post.user_id,
+        visibility=post.visibility,
+        body=normalize(post.title, post.body),
+    )
+    # Yorumlar gönderinin görünürlüğünü miras alır
+    SearchEntry.objects.filter(
+        kind=SearchEntry.KIND_COMMENT, parent_id=post.id
+    ).exclude(visibility=post.visibility).update(visibility=post.visibility)
+
+
+def index_comment(comment: Comment) -> None:
+    post = comment.post
+    _upsert(
+        SearchEntry.KIND_COMMENT,
+        comment.id,
+        parent_id=post.id,
+        owner_id=post.user_id,
+        visibility=post.visibility,
+        body=normalize(comment.body),
+    )
+
+
+def index_user(user) -> None:
+    if not user.is_active:
+        remove(SearchEntry.KIND_USER, user.id)
+        return
+    _upsert(
+        SearchEntry.KIND_USER,
+        user.id,
+        owner_id=user.id,
+        visibility="public",
+        body=normalize(user.username, user.full_name),
+    )
+
+
+def remove(kind, object_id) -> None:
+    SearchEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild(batch_size=1000) -> int:
+    """İndeksi sıfırdan kurar ve yazılan belge sayısını döner."""
+    User = get_user_model()
+    SearchEntry.objects.all().delete()
+
+    def entries():
+        for post in Post.objects.only(
+            "id", "user_id", "visibility", "title", "body"
+        ).iterator(chunk_size=batch_size):
+            yield SearchEntry(
+                kind=SearchEntry.KIND_POST,
+                object_id=post.id,
+                owner_id=post.user_id,
+                visibility=post.visibility,
+                body=normalize(post.title, post.body),
+            )
+        comments = Comment.objects.select_related("post").only(
+            "id", "body", "post__id", "post__user_id", "post__visibility"
+        )
+        for comment in comments.iterator(chunk_size=batch_size):
+            yield SearchEntry(
+                kind=SearchEntry.KIND_COMMENT,
+                object_id=comment.id,
+                parent_id=comment.post.id,
+                owner_id=comment.post.user_id,
+                visibility=comment.post.visibility,
+                body=normalize(comment.body),
+            )
+        users = User.objects.filter(is_active=True).only("id", "username", "full_name")
+        for user in users.iterator(chunk_size=batch_size):
+            yield SearchEntry(
+                kind=SearchEntry.KIND_USER,
+                object_id=user.id,
+                owner_id=user.id,
+                visibility="public",
+                body=normalize(user.username, user.full_name),
+            )
+
+    total = 0
+    batch = []
+    for entry in entries():
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            SearchEntry.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        SearchEntry.objects.bulk_create(batch)
+        total += len(batch)
+    return total
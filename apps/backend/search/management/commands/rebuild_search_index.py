@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from search.indexing import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for posts, comments and users"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} documents"))
@@ -0,0 +1,105 @@
+from django.db import migrations
+
+ENTRY = "search_searchentry"
+FTS = f"{ENTRY}_fts"
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS} USING fts5(
+        body, content='{ENTRY}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {ENTRY}_ai AFTER INSERT ON {ENTRY} BEGIN
+        INSERT INTO {FTS}(rowid, body) VALUES (new.id, new.body);
+    END""",
+    f"""CREATE TRIGGER {ENTRY}_ad AFTER DELETE ON {ENTRY} BEGIN
+        INSERT INTO {FTS}({FTS}, rowid, body) VALUES ('delete', old.id, old.body);
+    END""",
+    f"""CREATE TRIGGER {ENTRY}_au AFTER UPDATE OF body ON {ENTRY} BEGIN
+        INSERT INTO {FTS}({FTS}, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO {FTS}(rowid, body) VALUES (new.id, new.body);
+    END""",
+]
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {ENTRY}_au",
+    f"DROP TRIGGER IF EXISTS {ENTRY}_ad",
+    f"DROP TRIGGER IF EXISTS {ENTRY}_ai",
+    f"DROP TABLE IF EXISTS {FTS}",
+]
+
+POSTGRES_FORWARD = [
+    f"CREATE INDEX {ENTRY}_body_gin ON {ENTRY} "
+    f"USING GIN (to_tsvector('simple', body))",
+]
+POSTGRES_BACKWARD = [
+    f"DROP INDEX IF EXISTS {ENTRY}_body_gin",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def create_fulltext(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD})
+
+
+def drop_fulltext(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD})
+
+
+def backfill(apps, schema_editor):
+    from search.normalization import normalize
+
+    SearchEntry = apps.get_model("search", "SearchEntry")
+    Post = apps.get_model("social", "Post")
+    Comment = apps.get_model("social", "Comment")
+    User = apps.get_model("users", "User")
+    db_alias = schema_editor.connection.alias
+
+    entries = [
+        SearchEntry(
+            kind="post",
+            object_id=post.id,
+            owner_id=post.user_id,
+            visibility=post.visibility,
+            body=normalize(post.title, post.body),
+        )
+        for post in Post.objects.using(db_alias).iterator()
+    ]
+    entries += [
+        SearchEntry(
+            kind="comment",
+            object_id=comment.id,
+            parent_id=comment.post_id,
+            owner_id=comment.post.user_id,
+            visibility=comment.post.visibility,
+            body=normalize(comment.body),
+        )
+        for comment in Comment.objects.using(db_alias).select_related("post").iterator()
+    ]
+    entries += [
+        SearchEntry(
+            kind="user",
+            object_id=user.id,
+            owner_id=user.id,
+            visibility="public",
+            body=normalize(user.username, user.full_name),
+        )
+        for user in User.objects.using(db_alias).filter(is_active=True).iterator()
+    ]
+    SearchEntry.objects.using(db_alias).bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+        ("social", "0007_photo_content_addressed_upload"),
+        ("users", "0006_user_created_at_user_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext, drop_fulltext),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
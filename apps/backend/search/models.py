@@ -0,0 +1,44 @@
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """Arama indeksindeki tek bir belge (gönderi, yorum veya kullanıcı).
+
+    Notes
+    -----
+    `body` normalize edilmiş metindir; asıl tam metin indeksi veritabanına
+    göre migration ile kurulur (SQLite: FTS5 sanal tablo, PostgreSQL:
+    `to_tsvector` üzerinde GIN indeks). `owner_id` ve `visibility` görünürlük
+    kararını verir; yorumlar bağlı oldukları gönderinin sahibini ve
+    görünürlüğünü taşır.
+    """
+
+    KIND_POST = "post"
+    KIND_COMMENT = "comment"
+    KIND_USER = "user"
+    KIND_CHOICES = (
+        (KIND_POST, "Post"),
+        (KIND_COMMENT, "Comment"),
+        (KIND_USER, "User"),
+    )
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    parent_id = models.BigIntegerField(null=True, blank=True)
+    owner_id = models.BigIntegerField()
+    visibility = models.CharField(max_length=16, default="public")
+    body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="uniq_search_entry_object"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "parent_id"], name="search_entry_parent_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.object_id}"
@@ -0,0 +1,32 @@
+"""
+Türkçe duyarlı metin normalizasyonu.
+
+Hem indekslenen metin hem de arama sorgusu aynı katlamadan geçer; böylece
+"İstanbul", "ISTANBUL", "istanbul" ve "Istanbul" aynı terime düşer, "ş/ğ/ç/ö/ü/ı"
+ise ASCII karşılıklarıyla eşleşir.
+"""
+
+import re
+import unicodedata
+
+# str.lower() "I" → "i" ve "İ" → "i̇" üretir; Türkçe kurallarını önce uygula
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_FOLD = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ç": "c", "ö": "o", "ü": "u"})
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+    """Metni Türkçe kurallarıyla küçük harfe çevirip aksanlardan arındırır."""
+    text = (text or "").translate(_TURKISH_LOWER).lower().translate(_FOLD)
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list[str]:
+    """Katlanmış metni kelime parçalarına ayırır."""
+    return _TOKEN_RE.findall(fold(text))
+
+
+def normalize(*parts: str) -> str:
+    """İndekse yazılacak tek satırlık gövdeyi üretir."""
+    return " ".join(token for part in parts for token in tokenize(part))
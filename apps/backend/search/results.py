@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from social.models import Comment, Post
+
+from .models import SearchEntry
+
+
+class SearchResults:
+    """Django `Paginator` ile kullanılabilen tembel arama sonucu.
+
+    `count()` ve dilimleme ayrı SQL sorgularıdır; yalnızca istenen sayfa
+    veritabanından okunur ve nesnelere dönüştürülür.
+    """
+
+    def __init__(self, backend, tokens, user, kinds=None):
+        self.backend = backend
+        self.tokens = tokens
+        self.user = user
+        self.kinds = kinds
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.tokens, self.user, self.kinds)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("SearchResults only supports slicing")
+        offset = key.start or 0
+        limit = (key.stop if key.stop is not None else self.count()) - offset
+        rows = self.backend.search(
+            self.tokens, self.user, self.kinds, limit=limit, offset=offset
+        )
+        return hydrate(rows)
+
+
+def hydrate(rows):
+    """`(kind, object_id, score)` satırlarını serileştirilebilir sözlüklere çevirir.
+
+    İndekste kalmış ama silinmiş nesneler sessizce atlanır.
+    """
+    ids = {kind: [] for kind, _ in SearchEntry.KIND_CHOICES}
+    for kind, object_id, _ in rows:
+        ids[kind].append(object_id)
+
+    objects = {
+        SearchEntry.KIND_POST: Post.objects.select_related("user").in_bulk(
+            ids[SearchEntry.KIND_POST]
+        ),
+        SearchEntry.KIND_COMMENT: Comment.objects.select_related("user").in_bulk(
+            ids[SearchEntry.KIND_COMMENT]
+        ),
+        SearchEntry.KIND_USER: get_user_model().objects.in_bulk(
+            ids[SearchEntry.KIND_USER]
+        ),
+    }
+
+    results = []
+    for kind, object_id, score in rows:
+        obj = objects[kind].get(object_id)
+        if obj is None:
+            continue
+        if kind == SearchEntry.KIND_USER:
+            result = {
+                "title": obj.full_name or obj.username,
+                "excerpt": "",
+                "user": obj,
+                "post_id": None,
+                "created_at": obj.date_joined,
+            }
+        elif kind == SearchEntry.KIND_POST:
+            result = {
+                "title": obj.title,
+                "excerpt": obj.body,
+                "user": obj.user,
+                "post_id": obj.id,
+                "created_at": obj.created_at,
+            }
+        else:
+            result = {
+                "title": "",
+                "excerpt": obj.body,
+                "user": obj.user,
+                "post_id": obj.post_id,
+                "created_at": obj.created_at,
+            }
+        results.append({"type": kind, "id": object_id, "score": score, **result})
+    return results
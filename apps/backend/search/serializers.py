@@ -0,0 +1,27 @@
+from rest_framework import serializers
+from social.serializers import AuthorSerializer
+
+EXCERPT_LENGTH = 200
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    score = serializers.FloatField()
+    title = serializers.CharField()
+    excerpt = serializers.SerializerMethodField()
+    user = AuthorSerializer()
+    post_id = serializers.IntegerField(allow_null=True)
+    created_at = serializers.DateTimeField()
+
+    def get_excerpt(self, obj) -> str:
+        return obj["excerpt"][:EXCERPT_LENGTH]
+
+
+class SearchPageSerializer(serializers.Serializer):
+    """Sayfalanmış arama cevabı (yalnızca şema için)."""
+
+    count = serializers.IntegerField()
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = SearchResultSerializer(many=True)
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from social.models import Comment, Post
+
+from . import indexing
+from .models import SearchEntry
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+def index_post_on_save(sender, instance: Post, update_fields=None, **kwargs):
+    if indexing.touches(update_fields, indexing.POST_FIELDS):
+        indexing.index_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment_on_save(sender, instance: Comment, update_fields=None, **kwargs):
+    if indexing.touches(update_fields, indexing.COMMENT_FIELDS):
+        indexing.index_comment(instance)
+
+
+@receiver(post_save, sender=User)
+def index_user_on_save(sender, instance, update_fields=None, **kwargs):
+    if indexing.touches(update_fields, indexing.USER_FIELDS):
+        indexing.index_user(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance: Post, **kwargs):
+    indexing.remove(SearchEntry.KIND_POST, instance.id)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance: Comment, **kwargs):
+    indexing.remove(SearchEntry.KIND_COMMENT, instance.id)
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    indexing.remove(SearchEntry.KIND_USER, instance.id)
@@ -0,0 +1,174 @@
+from unittest import skipUnless
+
+from core.test_utils import BaseAPITestCase, create_test_user
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from search.backends import PostgresSearchBackend, SQLiteSearchBackend, get_backend
+from search.normalization import fold, normalize, tokenize
+from social.models import Comment, Follow, Post
+
+
+class TestNormalization(TestCase):
+    def test_dotted_and_dotless_i_fold_to_the_same_term(self):
+        for word in ("İstanbul", "ISTANBUL", "istanbul", "Istanbul", "ıstanbul"):
+            self.assertEqual(fold(word), "istanbul", word)
+
+    def test_turkish_letters_match_their_ascii_forms(self):
+        self.assertEqual(fold("ŞĞÇÖÜ şğçöü"), "sgcou sgcou")
+        self.assertEqual(tokenize("Çağrı, IŞIK-ölçümü!"), ["cagri", "isik", "olcumu"])
+
+    def test_other_accents_are_stripped(self):
+        self.assertEqual(fold("Café Noël"), "cafe noel")
+
+    def test_normalize_joins_all_parts(self):
+        self.assertEqual(normalize("Güneş", None, "Ay"), "gunes ay")
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = create_test_user()
+        self.author = create_test_user()
+
+    def post(self, title, user=None, visibility="public", body=""):
+        return Post.objects.create(
+            user=user or self.author, title=title, body=body, visibility=visibility
+        )
+
+    def search(self, query, user=None, kinds=None):
+        rows = get_backend().search(tokenize(query), user or self.viewer, kinds)
+        return [(kind, object_id) for kind, object_id, _ in rows]
+
+    def count(self, query, user=None, kinds=None):
+        return get_backend().count(tokenize(query), user or self.viewer, kinds)
+
+
+class TestBackend(SearchTestCase):
+    def test_picks_the_backend_of_the_database(self):
+        expected = {"sqlite": SQLiteSearchBackend, "postgresql": PostgresSearchBackend}
+        self.assertIsInstance(get_backend(), expected[connection.vendor])
+
+    def test_matches_every_token_and_a_prefix_of_the_last(self):
+        post = self.post("Zeplinkuşu gözlemi", body="Boğaziçi kıyısında")
+        self.post("Zeplinkuşu")
+        self.assertIn(("post", post.id), self.search("zeplinkusu bogazic"))
+        self.assertEqual(self.count("zeplinkusu bogazic"), 1)
+        self.assertEqual(self.count("zeplinku"), 2)
+        # Only the last token is a prefix
+        self.assertEqual(self.count("zeplinku bogazici"), 0)
+
+    def test_finds_the_indexed_text_in_any_case(self):
+        post = self.post("IĞDIRLIKARPUZ")
+        self.assertEqual(self.search("ığdırlıkarpuz"), [("post", post.id)])
+
+    def test_filters_by_kind(self):
+        post = self.post("Mürekkepbalığı")
+        comment = Comment.objects.create(
+            post=post, user=self.viewer, body="mürekkepbalığı yorum"
+        )
+        self.assertEqual(self.count("murekkepbaligi"), 2)
+        self.assertEqual(
+            self.search("murekkepbaligi", kinds=["comment"]), [("comment", comment.id)]
+        )
+
+    def test_limit_and_offset_page_through_the_ranking(self):
+        for n in range(3):
+            self.post(f"Kaplumbağaterzi {n}")
+        first = get_backend().search(tokenize("kaplumbagaterzi"), self.viewer, limit=2)
+        rest = get_backend().search(
+            tokenize("kaplumbagaterzi"), self.viewer, limit=2, offset=2
+        )
+        self.assertEqual((len(first), len(rest)), (2, 1))
+        self.assertFalse({row[1] for row in first} & {row[1] for row in rest})
+
+    @skipUnless(connection.vendor == "postgresql", "tsvector needs PostgreSQL")
+    def test_postgres_ranks_with_ts_rank(self):
+        self.post("Yengeçkabuğu yengeçkabuğu")
+        rows = PostgresSearchBackend().search(tokenize("yengeckab"), self.viewer)
+        self.assertEqual(len(rows), 1)
+        self.assertGreater(rows[0][2], 0)
+
+
+class TestVisibility(SearchTestCase):
+    def follow(self, status="accepted", follower=None, followed=None):
+        Follow.objects.create(
+            follower=follower or self.viewer,
+            followed=followed or self.author,
+            status=status,
+        )
+
+    def test_public_posts_are_found_by_everyone(self):
+        self.post("Salyangozpazarı")
+        self.assertEqual(self.count("salyangozpazari"), 1)
+
+    def test_own_posts_are_found_in_any_visibility(self):
+        for visibility in ("public", "followers", "private"):
+            self.post("Kendimekuş", user=self.viewer, visibility=visibility)
+        self.assertEqual(self.count("kendimekus"), 3)
+
+    def test_followers_posts_need_an_accepted_follow(self):
+        self.post("Takipçiyeözel", visibility="followers")
+        self.follow(status="pending")
+        self.assertEqual(self.count("takipciyeozel"), 0)
+        Follow.objects.filter(follower=self.viewer).update(status="accepted")
+        self.assertEqual(self.count("takipciyeozel"), 1)
+
+    def test_private_posts_are_found_only_by_the_owner(self):
+        self.post("Gizligünlük", visibility="private")
+        self.follow()
+        self.assertEqual(self.count("gizligunluk"), 0)
+        self.assertEqual(self.count("gizligunluk", user=self.author), 1)
+
+    def test_comments_inherit_the_visibility_of_their_post(self):
+        post = self.post("Ebeveyngönderi")
+        Comment.objects.create(post=post, user=self.author, body="Mirasyorumu")
+        self.assertEqual(self.count("mirasyorumu"), 1)
+        post.visibility = "followers"
+        post.save()
+        self.assertEqual(self.count("mirasyorumu"), 0)
+
+    def test_private_accounts_do_not_leak_public_posts(self):
+        hidden = create_test_user(is_private=True)
+        self.post("Kapalıhesap", user=hidden)
+        comment_on = self.post("Açıkgönderi", user=hidden)
+        Comment.objects.create(post=comment_on, user=self.viewer, body="Sızıntıyorum")
+
+        self.assertEqual(self.count("kapalihesap"), 0)
+        self.assertEqual(self.count("sizintiyorum"), 0)
+        self.follow(followed=hidden, status="pending")
+        self.assertEqual(self.count("kapalihesap"), 0)
+        Follow.objects.filter(follower=self.viewer).update(status="accepted")
+        self.assertEqual(self.count("kapalihesap"), 1)
+        self.assertEqual(self.count("sizintiyorum"), 1)
+
+    def test_private_accounts_can_still_be_found_by_name(self):
+        hidden = create_test_user(username="gizlikedi", is_private=True)
+        self.assertEqual(self.search("gizlikedi"), [("user", hidden.id)])
+
+
+class TestSearchApi(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get("/api/search?q=x").status_code, 401)
+
+    def test_returns_a_page_of_visible_results(self):
+        self.authenticate_user()
+        author = create_test_user()
+        post = Post.objects.create(user=author, title="Pelikanadası")
+        Post.objects.create(user=author, title="Pelikanadası", visibility="private")
+
+        response = self.client.get("/api/search", {"q": "PELİKAN", "type": "post"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["id"], post.id)
+
+    def test_empty_query_returns_no_results(self):
+        self.authenticate_user()
+        response = self.client.get("/api/search", {"q": "  !? "})
+        self.assertEqual(
+            response.data, {"count": 0, "next": None, "previous": None, "results": []}
+        )
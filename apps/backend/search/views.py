@@ -0,0 +1,65 @@
+"""
+Arama API görünümü.
+
+`GET /api/search?q=...&type=post,comment,user&page=N`
+"""
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import permissions, response
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.views import APIView
+
+from .backends import get_backend
+from .models import SearchEntry
+from .normalization import tokenize
+from .results import SearchResults
+from .serializers import SearchPageSerializer, SearchResultSerializer
+
+MAX_QUERY_TOKENS = 8
+
+
+class SearchPagination(PageNumberPagination):
+    page_size_query_param = "page_size"
+    page_size = 10
+    max_page_size = 50
+
+
+class SearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = SearchResultSerializer
+
+    @extend_schema(
+        tags=["Search"],
+        summary="Tam metin arama",
+        description="Gönderi, yorum ve kullanıcılarda arama; görünürlük "
+        "kuralına uymayan içerik dönmez.",
+        parameters=[
+            OpenApiParameter("q", OpenApiTypes.STR, description="Arama sorgusu"),
+            OpenApiParameter(
+                "type",
+                OpenApiTypes.STR,
+                description="Virgülle ayrılmış türler: post, comment, user",
+            ),
+            OpenApiParameter("page", OpenApiTypes.INT),
+            OpenApiParameter("page_size", OpenApiTypes.INT),
+        ],
+        responses=SearchPageSerializer,
+    )
+    def get(self, request):
+        tokens = tokenize(request.query_params.get("q", ""))[:MAX_QUERY_TOKENS]
+        kinds = [
+            kind
+            for kind in request.query_params.get("type", "").split(",")
+            if kind in dict(SearchEntry.KIND_CHOICES)
+        ]
+        if not tokens:
+            return response.Response(
+                {"count": 0, "next": None, "previous": None, "results": []}
+            )
+
+        results = SearchResults(get_backend(), tokens, request.user, kinds)
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        ser = SearchResultSerializer(page, many=True)
+        return paginator.get_paginated_response(ser.data)
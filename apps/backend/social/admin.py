@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Album, Comment, Follow, Like, Photo, Post
+from .models import (Album, Comment, Follow, FollowSuggestion, Like,
+                     Notification, Photo, Post)
 
 
 @admin.register(Post)
@@ -40,3 +41,26 @@ class FollowAdmin(admin.ModelAdmin):
     list_display = ("id", "follower", "followed", "status", "created_at")
     search_fields = ("follower__username", "followed__username")
     list_filter = ("status",)
+
+
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "candidate", "score", "computed_at")
+    search_fields = ("user__username", "candidate__username")
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "recipient",
+        "verb",
+        "post",
+        "actor",
+        "actor_count",
+        "is_read",
+        "updated_at",
+    )
+    list_filter = ("verb", "is_read")
+    search_fields = ("recipient__username",)
+    raw_id_fields = ("recipient", "post", "actor")
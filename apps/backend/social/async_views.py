@@ -0,0 +1,145 @@
+"""
+ASGI-native variants of the feed and social read endpoints.
+
+With ``ASYNC_SOCIAL_VIEWS`` on (the default under ``core.asgi``) these
+coroutines answer GET requests for the feed, my-posts, post list/retrieve and
+follow status/followers/following routes instead of the DRF views, so the
+request no longer runs the whole view in a sync worker thread. Writes on the
+same URLs are handed to the DRF viewsets. Response bodies, pagination and
+error shapes match the synchronous endpoints.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from core.async_api import apaginate, async_api_view
+from django.db.models import Count, Q
+from rest_framework import exceptions
+
+from . import feed_ranking
+from .models import Follow, Post
+from .serializers import FollowSerializer, PostSerializer
+from .views import (FeedPagination, FollowPagination, MyPostsPagination,
+                    PostPagination, PostViewSet, _visible_posts_for)
+
+
+def _annotated_posts():
+    return Post.objects.select_related("user").annotate(
+        likes_count=Count("likes", distinct=True),
+        comments_count=Count("comments", distinct=True),
+    )
+
+
+def _accepted_following(user):
+    return Follow.objects.filter(follower=user, status="accepted").values_list(
+        "followed_id", flat=True
+    )
+
+
+# -- posts ------------------------------------------------------------------
+
+
+@async_api_view(replica=True)
+async def feed_posts(request):
+    qs = (
+        _annotated_posts()
+        .filter(user_id__in=_accepted_following(request.user))
+        .filter(Q(visibility="public") | Q(visibility="followers"))
+        .order_by("-created_at")
+    )
+    ranked = feed_ranking.wants_ranking(request)
+    if ranked:
+        data = await sync_to_async(feed_ranking.ranked_page)(
+            request, qs, FeedPagination, PostSerializer
+        )
+        if data is not None:
+            return data
+    data = await apaginate(request, qs, FeedPagination, PostSerializer)
+    if ranked:
+        data["ranking"] = "chronological"
+    return data
+
+
+@async_api_view(replica=True)
+async def my_posts(request):
+    qs = _annotated_posts().filter(user=request.user).order_by("-created_at")
+    return await apaginate(request, qs, MyPostsPagination, PostSerializer)
+
+
+@async_api_view(fallback=PostViewSet.as_view({"get": "list", "post": "create"}))
+async def post_list(request):
+    qs = _annotated_posts()
+    try:
+        uid = int(request.query_params.get("user_id") or 0)
+    except ValueError:
+        uid = 0
+    if uid and uid == request.user.id:
+        qs = qs.filter(user_id=uid)
+    elif uid:
+        is_following = await Follow.objects.filter(
+            follower=request.user, followed_id=uid, status="accepted"
+        ).aexists()
+        if is_following:
+            qs = qs.filter(user_id=uid, visibility__in=["public", "followers"])
+        else:
+            qs = qs.filter(user_id=uid, visibility="public")
+    else:
+        qs = qs.filter(_visible_posts_for(request.user))
+    qs = qs.order_by("-created_at")
+    return await apaginate(request, qs, PostPagination, PostSerializer)
+
+
+@async_api_view(
+    fallback=PostViewSet.as_view(
+        {"put": "update", "patch": "partial_update", "delete": "destroy"}
+    )
+)
+async def post_detail(request, pk):
+    user = request.user
+    # The post and the viewer's follow edge to its author are looked up
+    # together; visibility is then decided in Python
+    post, follows_author = await asyncio.gather(
+        _annotated_posts().filter(pk=pk).afirst(),
+        Follow.objects.filter(
+            follower=user, status="accepted", followed__posts=pk
+        ).aexists(),
+    )
+    visible = post is not None and (
+        post.visibility == "public"
+        or post.user_id == user.id
+        or (post.visibility == "followers" and follows_author)
+    )
+    if not visible:
+        # Same message as get_object_or_404 in the DRF view
+        raise exceptions.NotFound("No Post matches the given query.")
+    return PostSerializer(post).data
+
+
+# -- follows ----------------------------------------------------------------
+
+
+@async_api_view()
+async def follow_status(request, user_id):
+    status = (
+        await Follow.objects.filter(follower=request.user, followed_id=user_id)
+        .values_list("status", flat=True)
+        .afirst()
+    )
+    return {"status": status or "none"}
+
+
+async def _paginated_follows(request, qs):
+    qs = qs.select_related("follower", "followed").order_by("-id")
+    return await apaginate(request, qs, FollowPagination, FollowSerializer)
+
+
+@async_api_view()
+async def followers(request):
+    qs = Follow.objects.filter(followed=request.user, status="accepted")
+    return await _paginated_follows(request, qs)
+
+
+@async_api_view()
+async def following(request):
+    qs = Follow.objects.filter(follower=request.user, status="accepted")
+    return await _paginated_follows(request, qs)
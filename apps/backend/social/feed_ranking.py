@@ -0,0 +1,154 @@
+"""
+Ranked feed mode (``/api/feed/posts?ranking=ranked``).
+
+Candidates are the viewer's visible followee posts from the last
+``FEED_RANK_WINDOW_HOURS`` (at most ``FEED_RANK_CANDIDATES``). Each is scored
+in one vectorized pass::
+
+    score = recency * (1 + ENGAGEMENT_WEIGHT * log1p(velocity)
+                         + AFFINITY_WEIGHT * log1p(affinity))
+
+- recency: exponential decay with a ``FEED_RANK_HALF_LIFE_HOURS`` half-life
+- velocity: (likes + 2 * comments) per hour since the post was created
+- affinity: the likes and comments the viewer has left on the author's
+  posts (likes carry no timestamp, so this is all-time)
+
+The ranked id list is cached per viewer for ``FEED_RANK_TTL_SECONDS`` and
+paged from the cache. If building it exceeds ``FEED_RANK_BUDGET_MS`` (checked
+between stages), or the window has no candidates, ``ranked_post_ids`` returns
+``None`` and the caller serves the chronological feed instead; that outcome
+is cached as ``False`` for ``FEED_RANK_FALLBACK_SECONDS``, so a viewer whose
+ranking is too slow to build does not pay the budget on every request.
+"""
+
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Comment, Follow, Like, Post
+
+ENGAGEMENT_WEIGHT = 0.6
+AFFINITY_WEIGHT = 0.4
+
+
+def _cache_key(user_id):
+    return f"feed-ranked:{user_id}"
+
+
+def score(age_hours, likes, comments, affinity, half_life_hours):
+    """Vectorized score over equal-length arrays."""
+    recency = np.exp2(-age_hours / half_life_hours)
+    velocity = (likes + 2.0 * comments) / (age_hours + 1.0)
+    return recency * (
+        1.0
+        + ENGAGEMENT_WEIGHT * np.log1p(velocity)
+        + AFFINITY_WEIGHT * np.log1p(affinity)
+    )
+
+
+def _affinity(user, author_ids):
+    counts = dict.fromkeys(author_ids, 0)
+    for model in (Like, Comment):
+        rows = (
+            model.objects.filter(user=user, post__user_id__in=author_ids)
+            .values_list("post__user_id")
+            .annotate(n=Count("id"))
+        )
+        for author_id, n in rows:
+            counts[author_id] += n
+    return counts
+
+
+def build_ranking(user, budget_ms=None):
+    """Rank the viewer's candidate posts; ``None`` if over the budget or empty."""
+    budget_ms = settings.FEED_RANK_BUDGET_MS if budget_ms is None else budget_ms
+    deadline = time.perf_counter() + budget_ms / 1000
+    now = timezone.now()
+
+    following = Follow.objects.filter(follower=user, status="accepted").values_list(
+        "followed_id", flat=True
+    )
+    rows = list(
+        Post.objects.filter(
+            user_id__in=following,
+            visibility__in=["public", "followers"],
+            created_at__gte=now - timedelta(hours=settings.FEED_RANK_WINDOW_HOURS),
+        )
+        .annotate(
+            n_likes=Count("likes", distinct=True),
+            n_comments=Count("comments", distinct=True),
+        )
+        .order_by("-created_at")
+        .values_list("id", "user_id", "created_at", "n_likes", "n_comments")[
+            : settings.FEED_RANK_CANDIDATES
+        ]
+    )
+    # No recent posts: the chronological feed still has older ones
+    if not rows or time.perf_counter() > deadline:
+        return None
+
+    ids, author_ids, created, likes, comments = zip(*rows)
+    affinity_by_author = _affinity(user, set(author_ids))
+    if time.perf_counter() > deadline:
+        return None
+
+    age_hours = np.fromiter(
+        ((now - c).total_seconds() / 3600 for c in created), dtype=float, count=len(ids)
+    )
+    scores = score(
+        np.maximum(age_hours, 0.0),
+        np.asarray(likes, dtype=float),
+        np.asarray(comments, dtype=float),
+        np.fromiter((affinity_by_author[a] for a in author_ids), dtype=float),
+        settings.FEED_RANK_HALF_LIFE_HOURS,
+    )
+    # Stable sort keeps newer posts first among equal scores
+    order = np.argsort(-scores, kind="stable")
+    if time.perf_counter() > deadline:
+        return None
+    return [ids[i] for i in order]
+
+
+def ranked_post_ids(user):
+    """Cached ranked post ids for the viewer, or ``None`` to fall back."""
+    key = _cache_key(user.id)
+    ids = cache.get(key)
+    if ids is False:
+        return None
+    if ids is None:
+        ids = build_ranking(user)
+        if ids is None:
+            cache.set(key, False, timeout=settings.FEED_RANK_FALLBACK_SECONDS)
+        else:
+            cache.set(key, ids, timeout=settings.FEED_RANK_TTL_SECONDS)
+    return ids
+
+
+def wants_ranking(request):
+    return request.query_params.get("ranking") == "ranked"
+
+
+def ranked_page(request, queryset, pagination_class, serializer_class):
+    """Paginated response data for the ranked feed, or ``None`` to fall back.
+
+    ``queryset`` supplies the page's posts (annotations, select_related);
+    only the ids of the cached ranking are paginated.
+    """
+    ids = ranked_post_ids(request.user)
+    if ids is None:
+        return None
+    paginator = pagination_class()
+    page_ids = paginator.paginate_queryset(ids, request)
+    by_id = queryset.in_bulk(page_ids)
+    # Posts deleted since the ranking was cached are skipped
+    posts = [by_id[i] for i in page_ids if i in by_id]
+    data = paginator.get_paginated_response(
+        serializer_class(posts, many=True).data
+    ).data
+    data["ranking"] = "ranked"
+    return data
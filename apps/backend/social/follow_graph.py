@@ -0,0 +1,119 @@
+"""
+Follow graph helpers: denormalized counters and cached id arrays.
+
+- ``User.followers_count`` / ``following_count`` hold the number of accepted
+  follows. ``social.signals`` adjusts them with ``F()`` updates whenever a
+  follow becomes accepted or an accepted follow is deleted (unfollow, user
+  deletion cascades), never below 0; ``recount`` rebuilds them from the
+  Follow table.
+- ``following_ids`` / ``follower_ids`` return the sorted ids of a user's
+  accepted follows from the cache (``FOLLOW_GRAPH_CACHE_SECONDS``); the same
+  signals drop the affected entries. Mutual queries intersect these arrays in
+  Python instead of joining the Follow table with itself.
+"""
+
+from array import array
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Follow
+
+User = get_user_model()
+
+
+def _key(direction, user_id):
+    return f"follow-graph:{direction}:{user_id}"
+
+
+def _ids(direction, user_id):
+    key = _key(direction, user_id)
+    ids = cache.get(key)
+    if ids is None:
+        if direction == "following":
+            qs = Follow.objects.filter(follower_id=user_id, status="accepted")
+            column = "followed_id"
+        else:
+            qs = Follow.objects.filter(followed_id=user_id, status="accepted")
+            column = "follower_id"
+        ids = array("q", sorted(qs.values_list(column, flat=True)))
+        cache.set(key, ids, timeout=settings.FOLLOW_GRAPH_CACHE_SECONDS)
+    return ids
+
+
+def following_ids(user_id):
+    """Sorted ids of the users ``user_id`` follows (accepted)."""
+    return _ids("following", user_id)
+
+
+def follower_ids(user_id):
+    """Sorted ids of the users following ``user_id`` (accepted)."""
+    return _ids("followers", user_id)
+
+
+def intersect(a, b):
+    """Sorted ids present in both sorted id arrays."""
+    small, large = (a, b) if len(a) <= len(b) else (b, a)
+    wanted = set(small)
+    return [i for i in large if i in wanted]
+
+
+def followed_by_following(viewer_id, target_id):
+    """People ``viewer_id`` follows who also follow ``target_id``."""
+    return intersect(following_ids(viewer_id), follower_ids(target_id))
+
+
+def mutual_follows(user_id):
+    """Users that ``user_id`` follows and who follow ``user_id`` back."""
+    return intersect(following_ids(user_id), follower_ids(user_id))
+
+
+def statuses(viewer_id, user_ids):
+    """``{user_id: status}`` of ``viewer_id``'s follows, in one query.
+
+    Users without a follow row map to ``"none"`` (as the status endpoint).
+    """
+    found = dict(
+        Follow.objects.filter(
+            follower_id=viewer_id, followed_id__in=user_ids
+        ).values_list("followed_id", "status")
+    )
+    return {user_id: found.get(user_id, "none") for user_id in user_ids}
+
+
+def forget(follower_id, followed_id):
+    cache.delete_many([_key("following", follower_id), _key("followers", followed_id)])
+
+
+def adjust_counts(follower_id, followed_id, delta):
+    # Clamped at 0: after drift a decrement would fail the unsigned CHECK
+    User.objects.filter(pk=followed_id).update(
+        followers_count=Greatest(F("followers_count") + delta, 0)
+    )
+    User.objects.filter(pk=follower_id).update(
+        following_count=Greatest(F("following_count") + delta, 0)
+    )
+
+
+def recount(users=None):
+    """Recompute the counters from the Follow table (all users by default)."""
+    accepted = Follow.objects.filter(status="accepted")
+
+    def count_by(field):
+        return Coalesce(
+            Subquery(
+                accepted.filter(**{field: OuterRef("pk")})
+                .values(field)
+                .annotate(n=Count("id"))
+                .values("n")
+            ),
+            0,
+        )
+
+    qs = User.objects.all() if users is None else users
+    return qs.update(
+        followers_count=count_by("followed"), following_count=count_by("follower")
+    )
@@ -0,0 +1,184 @@
+"""
+Per-worker throughput of the social read endpoints: WSGI vs ASGI.
+
+Starts one single-worker server per mode against the configured database
+and drives the same GET mix through it from ``--concurrency`` keep-alive
+client threads:
+
+- ``wsgi``: gunicorn ``core.wsgi`` with a gthread worker (one thread per
+  client) serving the DRF views.
+- ``asgi``: uvicorn ``core.asgi`` serving ``social.async_views``.
+
+Fixture rows (``asgibench_*`` users, their follows and posts) are removed
+afterwards. Requests are spread over the fixture users so the per-user
+throttle does not kick in.
+"""
+
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from core.authentication import UserClaimsRefreshToken
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from social.models import Follow, Post
+
+User = get_user_model()
+
+PATHS = [
+    "/api/feed/posts",
+    "/api/my-posts",
+    "/api/posts/",
+    "/api/follows/followers/",
+    "/api/follows/users/{other}/status/",
+]
+
+
+def _server_command(mode, port, concurrency):
+    if mode == "wsgi":
+        return [
+            sys.executable, "-m", "gunicorn", "core.wsgi:application",
+            "--bind", f"127.0.0.1:{port}", "--workers", "1",
+            "--worker-class", "gthread", "--threads", str(concurrency),
+            "--log-level", "warning",
+        ]  # fmt: skip
+    return [
+        sys.executable, "-m", "uvicorn", "core.asgi:application",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+        "--log-level", "warning", "--no-access-log",
+    ]  # fmt: skip
+
+
+def _wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"Server did not start on port {port}")
+
+
+class Command(BaseCommand):
+    help = "Compare per-worker throughput of social reads under WSGI and ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--posts-per-user", type=int, default=10)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--mode", action="append", choices=["wsgi", "asgi"], default=[]
+        )
+
+    def handle(self, *args, **options):
+        users = self.create_fixture(options["users"], options["posts_per_user"])
+        try:
+            tokens = [
+                (str(UserClaimsRefreshToken.for_user(u).access_token), users[i - 1].id)
+                for i, u in enumerate(users)
+            ]
+            for mode in options["mode"] or ["wsgi", "asgi"]:
+                result = self.run_server(mode, tokens, options)
+                self.report(mode, result)
+        finally:
+            User.objects.filter(id__in=[u.id for u in users]).delete()
+
+    def create_fixture(self, count, posts_per_user):
+        users = [
+            User(username=f"asgibench_{i}", email=f"asgibench_{i}@example.test")
+            for i in range(count)
+        ]
+        for user in users:
+            user.set_unusable_password()
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith="asgibench_"))
+        # Everyone follows the next ten users
+        Follow.objects.bulk_create(
+            Follow(follower=u, followed=users[(i + k) % count], status="accepted")
+            for i, u in enumerate(users)
+            for k in range(1, min(count, 11))
+        )
+        Post.objects.bulk_create(
+            Post(
+                user=u,
+                title=f"bench {n}",
+                body="bench",
+                visibility=("public", "followers")[n % 2],
+            )
+            for u in users
+            for n in range(posts_per_user)
+        )
+        return users
+
+    def run_server(self, mode, tokens, options):
+        port = options["port"]
+        env = {**os.environ, "ASYNC_SOCIAL_VIEWS": "1" if mode == "asgi" else "0"}
+        server = subprocess.Popen(
+            _server_command(mode, port, options["concurrency"]),
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        try:
+            _wait_for_port(port)
+            self.drive(port, tokens, options["concurrency"], options["concurrency"])
+            return self.drive(port, tokens, options["requests"], options["concurrency"])
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    def drive(self, port, tokens, total, concurrency):
+        latencies, errors = [], []
+        lock = threading.Lock()
+        counter = iter(range(total))
+
+        def worker():
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            local_latencies, local_errors = [], 0
+            for n in counter:
+                token, other = tokens[n % len(tokens)]
+                path = PATHS[n % len(PATHS)].format(other=other)
+                started = time.perf_counter()
+                try:
+                    conn.request(
+                        "GET", path, headers={"Authorization": f"Bearer {token}"}
+                    )
+                    resp = conn.getresponse()
+                    resp.read()
+                    if resp.status != 200:
+                        local_errors += 1
+                except (OSError, http.client.HTTPException):
+                    local_errors += 1
+                    conn.close()
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                local_latencies.append(time.perf_counter() - started)
+            conn.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - started, latencies, sum(errors)
+
+    def report(self, mode, result):
+        elapsed, latencies, errors = result
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{mode}: {len(latencies) / elapsed:8.1f} req/s per worker  "
+            f"p50={statistics.median(latencies) * 1000:6.2f}ms  "
+            f"p95={p95 * 1000:6.2f}ms  errors={errors}"
+        )
@@ -0,0 +1,194 @@
+"""
+Offline benchmark for the ranked feed against the chronological one.
+
+Seeds a reproducible (``--seed``) social graph: ``feedbench_*`` users with
+skewed follows, posts spread over ``FEED_RANK_WINDOW_HOURS`` and likes and
+comments biased towards popular authors. It then replays the first feed page
+of ``--viewers`` users through ``FeedPosts`` in three modes and reports
+latency percentiles and query counts:
+
+- ``chronological``: the default feed
+- ``ranked-cold``: ``?ranking=ranked`` with the viewer's ranking uncached
+- ``ranked-warm``: the same request again, served from the cached ranking
+
+Cold requests that ran over the latency budget (and fell back to the
+chronological feed) are counted separately. The fixture is removed afterwards
+unless ``--keep`` is given.
+"""
+
+import statistics
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from social import follow_graph
+from social.feed_ranking import _cache_key
+from social.models import Comment, Follow, Like, Post
+from social.views import FeedPosts
+
+User = get_user_model()
+
+PREFIX = "feedbench_"
+
+
+MODES = ("chronological", "ranked-cold", "ranked-warm")
+
+
+class Command(BaseCommand):
+    help = "Replay seeded feed requests in chronological and ranked mode"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--follows", type=int, default=80, help="Per user")
+        parser.add_argument("--posts", type=int, default=6, help="Per user")
+        parser.add_argument("--likes", type=int, default=40, help="Per user")
+        parser.add_argument("--comments", type=int, default=8, help="Per user")
+        parser.add_argument("--viewers", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true", help="Keep the fixture")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        started = time.perf_counter()
+        users = self.create_fixture(rng, options)
+        self.stdout.write(
+            f"seeded {len(users)} users in {time.perf_counter() - started:.1f}s "
+            f"(budget {settings.FEED_RANK_BUDGET_MS}ms, "
+            f"{settings.FEED_RANK_CANDIDATES} candidates)"
+        )
+        try:
+            viewers = rng.choice(
+                users, size=min(options["viewers"], len(users)), replace=False
+            )
+            self.replay(viewers)
+        finally:
+            if not options["keep"]:
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+    def create_fixture(self, rng, options):
+        n = options["users"]
+        accounts = [
+            User(username=f"{PREFIX}{i}", email=f"{PREFIX}{i}@example.test")
+            for i in range(n)
+        ]
+        for user in accounts:
+            user.set_unusable_password()
+        User.objects.bulk_create(accounts, batch_size=1000)
+        users = list(User.objects.filter(username__startswith=PREFIX).order_by("id"))
+        ids = np.array([u.id for u in users])
+
+        # Popularity skew shared by follows, likes and comments
+        weights = 1.0 / np.arange(1, n + 1) ** 0.8
+        weights /= weights.sum()
+
+        src = np.repeat(np.arange(n), options["follows"])
+        dst = rng.choice(n, size=len(src), p=weights)
+        keys = np.unique(src * n + dst)
+        keys = keys[keys // n != keys % n]
+        Follow.objects.bulk_create(
+            (
+                Follow(follower_id=ids[a], followed_id=ids[b], status="accepted")
+                for a, b in zip((keys // n).tolist(), (keys % n).tolist())
+            ),
+            batch_size=5000,
+        )
+        # bulk_create skips the counter signals; deleting the fixture needs them
+        follow_graph.recount(User.objects.filter(username__startswith=PREFIX))
+
+        authors = np.repeat(np.arange(n), options["posts"])
+        visibility = rng.choice(["public", "followers"], size=len(authors))
+        posts = Post.objects.bulk_create(
+            (
+                Post(user_id=ids[a], title="bench", body="bench", visibility=v)
+                for a, v in zip(authors.tolist(), visibility.tolist())
+            ),
+            batch_size=5000,
+        )
+        # created_at is auto_now_add: spread it over the ranking window
+        now = timezone.now()
+        ages = rng.uniform(0, settings.FEED_RANK_WINDOW_HOURS, size=len(posts))
+        for post, age in zip(posts, ages.tolist()):
+            post.created_at = now - timedelta(hours=age)
+        Post.objects.bulk_update(posts, ["created_at"], batch_size=5000)
+
+        # Engagement goes to posts of popular authors
+        post_weights = weights[authors] / weights[authors].sum()
+        post_ids = np.array([p.id for p in posts])
+
+        def interactions(per_user):
+            likers = np.repeat(np.arange(n), per_user)
+            targets = rng.choice(len(posts), size=len(likers), p=post_weights)
+            return likers, targets
+
+        likers, targets = interactions(options["likes"])
+        keys = np.unique(likers * len(posts) + targets)
+        Like.objects.bulk_create(
+            (
+                Like(user_id=ids[u], post_id=post_ids[p])
+                for u, p in zip(
+                    (keys // len(posts)).tolist(), (keys % len(posts)).tolist()
+                )
+            ),
+            batch_size=5000,
+        )
+        commenters, targets = interactions(options["comments"])
+        Comment.objects.bulk_create(
+            (
+                Comment(user_id=ids[u], post_id=post_ids[p], body="bench")
+                for u, p in zip(commenters.tolist(), targets.tolist())
+            ),
+            batch_size=5000,
+        )
+        return users
+
+    def replay(self, viewers):
+        factory = APIRequestFactory()
+        view = FeedPosts.as_view()
+        timings = {mode: [] for mode in MODES}
+        queries = {mode: [] for mode in MODES}
+        fallbacks = 0
+
+        def request(user, query):
+            req = factory.get("/api/feed/posts", query)
+            force_authenticate(req, user=user)
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = view(req)
+                response.render()
+                elapsed = time.perf_counter() - started
+            return response, elapsed, len(ctx.captured_queries)
+
+        for viewer in viewers:
+            cache.delete(_cache_key(viewer.id))
+            for mode, query in (
+                ("chronological", {}),
+                ("ranked-cold", {"ranking": "ranked"}),
+                ("ranked-warm", {"ranking": "ranked"}),
+            ):
+                response, elapsed, count = request(viewer, query)
+                timings[mode].append(elapsed)
+                queries[mode].append(count)
+                if (
+                    mode == "ranked-cold"
+                    and response.data.get("ranking") == "chronological"
+                ):
+                    fallbacks += 1
+            cache.delete(_cache_key(viewer.id))
+
+        for mode in MODES:
+            latencies = sorted(timings[mode])
+            p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+            self.stdout.write(
+                f"{mode:>13}: p50={statistics.median(latencies) * 1000:7.2f}ms  "
+                f"p95={p95 * 1000:7.2f}ms  "
+                f"queries={statistics.mean(queries[mode]):.1f}"
+            )
+        self.stdout.write(f"budget fallbacks: {fallbacks}/{len(viewers)}")
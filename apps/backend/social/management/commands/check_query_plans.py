@@ -0,0 +1,28 @@
+from core.query_plans import check_access_paths
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot feed/follow/todo queries and fail on full scans or sorts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--show-plans",
+            action="store_true",
+            default=False,
+            help="Print every query plan, not only the failing ones",
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, (plan, problems) in check_access_paths().items():
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"✗ {name}: {'; '.join(problems)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {name}"))
+            if problems or options["show_plans"]:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f"Query plan regressions in: {', '.join(failures)}")
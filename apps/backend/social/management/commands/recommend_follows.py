@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from social import recommendations
+
+
+class Command(BaseCommand):
+    help = "Recompute people-you-may-know suggestions from the follow graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--k", type=int, default=recommendations.DEFAULT_K)
+        parser.add_argument(
+            "--max-fanout",
+            type=int,
+            default=recommendations.DEFAULT_MAX_FANOUT,
+            help="Skip intermediaries following more accounts than this",
+        )
+        parser.add_argument(
+            "--max-pairs",
+            type=int,
+            default=recommendations.DEFAULT_MAX_PAIRS,
+            help="Two-hop paths expanded per batch (bounds memory)",
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            metavar="EDGES",
+            help="Time the computation on a synthetic graph; nothing is stored",
+        )
+
+    def handle(self, *args, **options):
+        params = {
+            "k": options["k"],
+            "max_fanout": options["max_fanout"],
+            "max_pairs": options["max_pairs"],
+        }
+        started = time.perf_counter()
+        if options["benchmark"]:
+            src, dst, n = recommendations.synthetic_graph(options["benchmark"])
+            rows = sum(
+                len(users)
+                for users, _, _ in recommendations.friend_of_friend(
+                    src, dst, n, **params
+                )
+            )
+            self.stdout.write(
+                f"{len(src)} edges / {n} users -> {rows} suggestions "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            return
+        rows = recommendations.rebuild_suggestions(**params)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {rows} suggestions in {time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from social import follow_graph
+
+
+class Command(BaseCommand):
+    help = "Recompute User.followers_count / following_count from accepted follows"
+
+    def handle(self, *args, **options):
+        updated = follow_graph.recount()
+        self.stdout.write(self.style.SUCCESS(f"Recounted follows for {updated} users"))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:45
+
+import social.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0006_photo_image_alter_photo_url"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="photo",
+            name="image",
+            field=models.ImageField(
+                blank=True, null=True, upload_to=social.models.photo_upload_to
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0007_photo_content_addressed_upload"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["post", "id"], name="comment_post_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["follower", "status", "followed"],
+                name="follow_follower_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["followed", "status"], name="follow_followed_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["user", "-created_at"], name="post_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["visibility", "created_at"], name="post_visibility_created_idx"
+            ),
+        ),
+    ]
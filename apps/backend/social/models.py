@@ -1,3 +1,4 @@
+from core.media import content_addressed_name
 from django.conf import settings
 from django.db import models
 
@@ -15,6 +16,14 @@ class Post(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # profile / my-posts / feed: user_id = X ORDER BY created_at DESC
+            models.Index(fields=["user", "-created_at"], name="post_user_created_idx"),
+            # public listings: visibility = 'public' ORDER BY created_at
+            models.Index(
+                fields=["visibility", "created_at"], name="post_visibility_created_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -30,6 +39,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            # post comments: post_id = X ORDER BY id
+            models.Index(fields=["post", "id"], name="comment_post_id_idx"),
+        ]
 
 
 class Like(models.Model):
@@ -63,10 +76,15 @@ class Album(models.Model):
         return self.title
 
 
+def photo_upload_to(instance, filename):
+    # Content-addressed names let the media view send immutable cache headers
+    return content_addressed_name("photos", instance.image, filename)
+
+
 class Photo(models.Model):
     album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name="photos")
     title = models.CharField(max_length=200, blank=True)
-    image = models.ImageField(upload_to='photos/', blank=True, null=True)
+    image = models.ImageField(upload_to=photo_upload_to, blank=True, null=True)
     url = models.URLField(blank=True)
     thumbnail_url = models.URLField(blank=True)
     metadata = models.JSONField(default=dict, blank=True)
@@ -101,3 +119,103 @@ class Follow(models.Model):
                 fields=["follower", "followed"], name="uniq_follow_pair"
             ),
         ]
+        indexes = [
+            # following ids / status: follower_id = X AND status = ... [AND followed_id]
+            models.Index(
+                fields=["follower", "status", "followed"],
+                name="follow_follower_status_idx",
+            ),
+            # followers / pending requests: followed_id = X AND status = ...
+            models.Index(
+                fields=["followed", "status"], name="follow_followed_status_idx"
+            ),
+        ]
+
+
+class FollowSuggestion(models.Model):
+    """Precomputed "people you may know" (see social.recommendations)."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions",
+    )
+    candidate = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    # Number of people the user follows who follow the candidate
+    score = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "candidate"], name="uniq_follow_suggestion"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-score"], name="followsugg_user_score_idx"),
+        ]
+
+
+class Notification(models.Model):
+    """Inbox entry; repeated events on the same target within
+    ``NOTIFICATION_WINDOW_SECONDS`` roll up into one row (see
+    social.notifications)."""
+
+    VERB_CHOICES = (
+        ("like", "like"),
+        ("comment", "comment"),
+        ("follow_request", "follow_request"),
+        ("follow_accept", "follow_accept"),
+    )
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="notifications",
+    )
+    verb = models.CharField(max_length=32, choices=VERB_CHOICES)
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    # Most recent actor and the number of distinct actors rolled up; the
+    # notification outlives a deleted actor (the other actors still count)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+    actor_count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # inbox: recipient_id = X ORDER BY updated_at DESC, id DESC
+            models.Index(
+                fields=["recipient", "-updated_at", "-id"],
+                name="notif_recipient_updated_idx",
+            ),
+            # roll-up target: recipient_id = X AND verb = ... AND post_id = ...
+            models.Index(fields=["recipient", "verb", "post"], name="notif_rollup_idx"),
+        ]
+
+
+class NotificationActor(models.Model):
+    """Distinct actors of a rolled-up notification."""
+
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name="actors"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["notification", "actor"], name="uniq_notification_actor"
+            ),
+        ]
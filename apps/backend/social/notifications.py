@@ -0,0 +1,127 @@
+"""
+Notification inbox: recording, roll-up and the unread counter.
+
+``notify`` is called from ``social.signals`` and queues ``record`` as a
+``core.tasks`` task once the triggering write commits, so likes, comments
+and follow requests do not pay for the roll-up in the request. ``manage.py
+worker`` runs it with retries; ``TASKS_EAGER=1`` runs it inline instead
+(development, scripts).
+
+``record`` rolls an event into the recipient's unread notification for the
+same verb and post if it was started within ``NOTIFICATION_WINDOW_SECONDS``
+("12 people liked your post"); distinct actors are kept in
+``NotificationActor`` so repeat actions by one person count once. Otherwise
+it opens a new notification. Calls for one recipient are serialized on a
+lock of the recipient's user row. ``User.unread_notifications`` changes only
+when a row is created or read, so reading the unread count is a single
+column.
+"""
+
+from datetime import timedelta
+
+from core import events
+from core.tasks import task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Notification, NotificationActor
+
+User = get_user_model()
+
+
+def adjust_unread(user_id, delta):
+    if delta:
+        # Clamped at 0: after drift a decrement would fail the unsigned CHECK
+        User.objects.filter(pk=user_id).update(
+            unread_notifications=Greatest(F("unread_notifications") + delta, 0)
+        )
+
+
+@task(max_attempts=3)
+def record(recipient_id, verb, actor_id, post_id=None):
+    """Add ``actor_id``'s event to the recipient's inbox; returns the row
+    (None if the recipient no longer exists)."""
+    now = timezone.now()
+    since = now - timedelta(seconds=settings.NOTIFICATION_WINDOW_SECONDS)
+    with transaction.atomic():
+        # Lock the recipient: a missing notification row cannot be locked, so
+        # concurrent first events would each open their own notification
+        if not User.objects.select_for_update().filter(pk=recipient_id).exists():
+            return None  # recipient deleted since the event
+        notification = (
+            Notification.objects.filter(
+                recipient_id=recipient_id,
+                verb=verb,
+                post_id=post_id,
+                is_read=False,
+                created_at__gte=since,
+            )
+            .order_by("-id")
+            .first()
+        )
+        if notification is None:
+            notification = Notification.objects.create(
+                recipient_id=recipient_id, verb=verb, post_id=post_id, actor_id=actor_id
+            )
+            NotificationActor.objects.create(
+                notification=notification, actor_id=actor_id
+            )
+            adjust_unread(recipient_id, 1)
+        else:
+            _, added = NotificationActor.objects.get_or_create(
+                notification=notification, actor_id=actor_id
+            )
+            Notification.objects.filter(pk=notification.pk).update(
+                actor_id=actor_id,
+                actor_count=F("actor_count") + int(added),
+                updated_at=now,
+            )
+    transaction.on_commit(
+        lambda: events.publish(
+            recipient_id, "notification", {"notification_id": notification.id}
+        )
+    )
+    return notification
+
+
+def notify(recipient_id, verb, actor_id, post_id=None):
+    """Queue a notification once the current transaction commits."""
+    if recipient_id == actor_id:
+        return
+    args = (recipient_id, verb, actor_id, post_id)
+    transaction.on_commit(lambda: record.enqueue(*args))
+
+
+def mark_read(user, ids=None):
+    """Mark the user's notifications (or only ``ids``) read; returns the count."""
+    qs = Notification.objects.filter(recipient=user, is_read=False)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    with transaction.atomic():
+        updated = qs.update(is_read=True)
+        adjust_unread(user.id, -updated)
+    return updated
+
+
+def recount_unread(users):
+    """Recompute ``unread_notifications`` for a User queryset."""
+    unread = (
+        Notification.objects.filter(recipient=OuterRef("pk"), is_read=False)
+        .values("recipient")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return users.update(unread_notifications=Coalesce(Subquery(unread), 0))
+
+
+def unread_count(user_id):
+    return (
+        User.objects.filter(pk=user_id)
+        .values_list("unread_notifications", flat=True)
+        .first()
+        or 0
+    )
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
-from .models import Album, Comment, Follow, Photo, Post
+from .models import (Album, Comment, Follow, FollowSuggestion, Notification,
+                     Photo, Post)
+from .tasks import process_photo
 
 
 class AuthorSerializer(serializers.Serializer):
@@ -88,8 +90,10 @@ class PhotoCreateSerializer(serializers.ModelSerializer):
         photo = super().create(validated_data)
         if photo.image:
             photo.url = photo.image.url
-            photo.thumbnail_url = photo.image.url  # For now, use same URL
+            # Original until the worker has made the thumbnail
+            photo.thumbnail_url = photo.image.url
             photo.save()
+            process_photo.enqueue(photo.id, idempotency_key=f"process_photo:{photo.id}")
         return photo
 
 
@@ -114,3 +118,47 @@ class FollowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Follow
         fields = ["id", "follower", "followed", "status", "created_at"]
+
+
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    user = AuthorSerializer(source="candidate", read_only=True)
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ["user", "score"]
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    actor = AuthorSerializer(read_only=True)
+    summary = serializers.SerializerMethodField()
+
+    PHRASES = {
+        "like": "liked your post",
+        "comment": "commented on your post",
+        "follow_request": "requested to follow you",
+        "follow_accept": "accepted your follow request",
+    }
+
+    class Meta:
+        model = Notification
+        fields = [
+            "id",
+            "verb",
+            "post",
+            "actor",
+            "actor_count",
+            "summary",
+            "is_read",
+            "created_at",
+            "updated_at",
+        ]
+
+    def get_summary(self, obj):
+        # "alice liked your post" / "alice and 11 others liked your post"
+        others = obj.actor_count - 1
+        who = obj.actor.username if obj.actor else "Someone"
+        if others == 1:
+            who += " and 1 other"
+        elif others > 1:
+            who += f" and {others} others"
+        return f"{who} {self.PHRASES[obj.verb]}"
@@ -0,0 +1,139 @@
+from core import events
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import follow_graph, notifications
+from .models import Comment, Follow, Like, Notification, Post
+
+
+@receiver(pre_save, sender=Follow)
+def remember_follow_status(sender, instance: Follow, **kwargs):
+    # Status before this save, to tell pending -> accepted transitions apart
+    instance._previous_status = (
+        Follow.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Follow)
+def count_accepted_follow(sender, instance: Follow, **kwargs):
+    was_accepted = getattr(instance, "_previous_status", None) == "accepted"
+    is_accepted = instance.status == "accepted"
+    if was_accepted != is_accepted:
+        delta = 1 if is_accepted else -1
+        follow_graph.adjust_counts(instance.follower_id, instance.followed_id, delta)
+        follow_graph.forget(instance.follower_id, instance.followed_id)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_deleted_follow(sender, instance: Follow, **kwargs):
+    if instance.status == "accepted":
+        follow_graph.adjust_counts(instance.follower_id, instance.followed_id, -1)
+        follow_graph.forget(instance.follower_id, instance.followed_id)
+
+
+# -- push events (core.events) ----------------------------------------------
+
+
+def _publish_on_commit(user_id, event, data):
+    transaction.on_commit(lambda: events.publish(user_id, event, data))
+
+
+@receiver(post_save, sender=Follow)
+def push_follow_event(sender, instance: Follow, created, **kwargs):
+    previous = getattr(instance, "_previous_status", None)
+    if instance.status == "pending" and previous != "pending":
+        _publish_on_commit(
+            instance.followed_id,
+            "follow.requested",
+            {"follow_id": instance.id, "user_id": instance.follower_id},
+        )
+    elif instance.status == "accepted" and previous != "accepted":
+        _publish_on_commit(
+            instance.follower_id, "follow.accepted", {"user_id": instance.followed_id}
+        )
+
+
+@receiver(post_save, sender=Post)
+def push_new_post(sender, instance: Post, created, **kwargs):
+    if not created or instance.visibility not in ("public", "followers"):
+        return
+    author_id = instance.user_id
+    data = {"post_id": instance.id, "user_id": author_id}
+    # Followers are resolved after commit, from the cached follower ids
+    transaction.on_commit(
+        lambda: events.publish_many(
+            follow_graph.follower_ids(author_id), "post.created", data
+        )
+    )
+
+
+@receiver(post_save, sender=Like)
+def push_like(sender, instance: Like, created, **kwargs):
+    if not created:
+        return
+    owner_id = instance.post.user_id
+    if owner_id != instance.user_id:
+        _publish_on_commit(
+            owner_id,
+            "post.liked",
+            {"post_id": instance.post_id, "user_id": instance.user_id},
+        )
+
+
+@receiver(post_save, sender=Comment)
+def push_comment(sender, instance: Comment, created, **kwargs):
+    if not created:
+        return
+    owner_id = instance.post.user_id
+    if owner_id != instance.user_id:
+        _publish_on_commit(
+            owner_id,
+            "post.commented",
+            {
+                "post_id": instance.post_id,
+                "comment_id": instance.id,
+                "user_id": instance.user_id,
+            },
+        )
+
+
+# -- notification inbox (social.notifications) ------------------------------
+
+
+@receiver(post_save, sender=Follow)
+def notify_follow(sender, instance: Follow, **kwargs):
+    previous = getattr(instance, "_previous_status", None)
+    if instance.status == "pending" and previous != "pending":
+        notifications.notify(
+            instance.followed_id, "follow_request", instance.follower_id
+        )
+    elif instance.status == "accepted" and previous != "accepted":
+        notifications.notify(
+            instance.follower_id, "follow_accept", instance.followed_id
+        )
+
+
+@receiver(post_save, sender=Like)
+def notify_like(sender, instance: Like, created, **kwargs):
+    if created:
+        notifications.notify(
+            instance.post.user_id, "like", instance.user_id, instance.post_id
+        )
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment(sender, instance: Comment, created, **kwargs):
+    if created:
+        notifications.notify(
+            instance.post.user_id, "comment", instance.user_id, instance.post_id
+        )
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance: Notification, **kwargs):
+    # e.g. the post was deleted; the recipient's own deletion makes this a no-op
+    if not instance.is_read:
+        notifications.adjust_unread(instance.recipient_id, -1)
@@ -0,0 +1,45 @@
+"""Background tasks for the social app (run by ``manage.py worker``)."""
+
+import io
+
+from core.media import content_addressed_name
+from core.tasks import task
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import Photo
+
+THUMBNAIL_SIZE = (400, 400)
+
+
+@task(max_attempts=3)
+def process_photo(photo_id):
+    """Read the uploaded image's metadata and store a JPEG thumbnail."""
+    photo = Photo.objects.filter(pk=photo_id).first()
+    if photo is None or not photo.image:
+        return None
+
+    with photo.image.open("rb") as fh:
+        image = Image.open(fh)
+        image.load()
+    metadata = {
+        "width": image.width,
+        "height": image.height,
+        "format": image.format,
+    }
+
+    thumb = ImageOps.exif_transpose(image)
+    thumb.thumbnail(THUMBNAIL_SIZE)
+    buffer = io.BytesIO()
+    thumb.convert("RGB").save(buffer, format="JPEG", quality=85)
+    content = ContentFile(buffer.getvalue())
+    name = content_addressed_name("thumbnails", content, "thumb.jpg")
+    if not default_storage.exists(name):
+        name = default_storage.save(name, content)
+
+    Photo.objects.filter(pk=photo_id).update(
+        thumbnail_url=default_storage.url(name),
+        metadata={**photo.metadata, **metadata},
+    )
+    return {"thumbnail": name, **metadata}
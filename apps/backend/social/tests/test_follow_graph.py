@@ -0,0 +1,96 @@
+from core.test_utils import create_test_user
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from social import follow_graph, notifications
+from social.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.follower = create_test_user()
+        self.followed = create_test_user()
+
+    def counts(self):
+        follower = User.objects.get(pk=self.follower.pk)
+        followed = User.objects.get(pk=self.followed.pk)
+        return follower.following_count, followed.followers_count
+
+    def follow(self, status="pending"):
+        return Follow.objects.create(
+            follower=self.follower, followed=self.followed, status=status
+        )
+
+
+class TestCounterSignals(FollowGraphTestCase):
+    def test_accepted_follow_counts_on_both_sides(self):
+        self.follow(status="accepted")
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_pending_follow_does_not_count(self):
+        self.follow()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_status_transitions(self):
+        follow = self.follow()
+        for status, expected in [
+            ("accepted", (1, 1)),
+            ("accepted", (1, 1)),  # resaving does not count twice
+            ("rejected", (0, 0)),
+            ("pending", (0, 0)),
+            ("accepted", (1, 1)),
+        ]:
+            with self.subTest(status):
+                follow.status = status
+                follow.save()
+                self.assertEqual(self.counts(), expected)
+
+    def test_deleting_an_accepted_follow_uncounts_it(self):
+        self.follow(status="accepted").delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_deleting_a_pending_follow_changes_nothing(self):
+        self.follow(status="accepted")
+        Follow.objects.create(follower=self.followed, followed=self.follower).delete()
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_cached_ids_follow_the_changes(self):
+        follow = self.follow()
+        self.assertEqual(list(follow_graph.follower_ids(self.followed.pk)), [])
+        follow.status = "accepted"
+        follow.save()
+        self.assertEqual(
+            list(follow_graph.follower_ids(self.followed.pk)), [self.follower.pk]
+        )
+        follow.delete()
+        self.assertEqual(list(follow_graph.following_ids(self.follower.pk)), [])
+
+
+class TestDrift(FollowGraphTestCase):
+    def test_decrements_stop_at_zero(self):
+        self.follow(status="accepted")
+        User.objects.filter(pk__in=[self.follower.pk, self.followed.pk]).update(
+            followers_count=0, following_count=0
+        )
+        Follow.objects.get(follower=self.follower).delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_unread_decrements_stop_at_zero(self):
+        notifications.adjust_unread(self.follower.pk, -3)
+        self.assertEqual(notifications.unread_count(self.follower.pk), 0)
+
+    def test_recount_rebuilds_the_counters(self):
+        self.follow(status="accepted")
+        Follow.objects.create(follower=self.followed, followed=self.follower)
+        User.objects.filter(pk__in=[self.follower.pk, self.followed.pk]).update(
+            followers_count=7, following_count=0
+        )
+        follow_graph.recount(
+            User.objects.filter(pk__in=[self.follower.pk, self.followed.pk])
+        )
+        self.assertEqual(self.counts(), (1, 1))
+        follower = User.objects.get(pk=self.follower.pk)
+        self.assertEqual(follower.followers_count, 0)
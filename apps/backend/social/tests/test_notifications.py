@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from core.models import Task
+from core.test_utils import create_test_user
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from social import notifications
+from social.models import Notification, Post
+
+User = get_user_model()
+
+
+class NotificationTestCase(TestCase):
+    def setUp(self):
+        self.owner = create_test_user()
+        self.fans = [create_test_user() for _ in range(3)]
+        self.post = Post.objects.create(user=self.owner, title="t")
+
+    def like(self, fan, post=None):
+        return notifications.record(
+            self.owner.id, "like", fan.id, (post or self.post).id
+        )
+
+    def unread(self):
+        return notifications.unread_count(self.owner.id)
+
+
+class TestRecord(NotificationTestCase):
+    def test_events_within_the_window_roll_up(self):
+        first = self.like(self.fans[0])
+        self.assertEqual(self.like(self.fans[1]).pk, first.pk)
+        first.refresh_from_db()
+        self.assertEqual((first.actor_count, first.actor_id), (2, self.fans[1].id))
+        self.assertEqual(self.unread(), 1)
+
+    def test_events_after_the_window_open_a_new_notification(self):
+        first = self.like(self.fans[0])
+        Notification.objects.filter(pk=first.pk).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertNotEqual(self.like(self.fans[1]).pk, first.pk)
+        self.assertEqual(self.unread(), 2)
+
+    def test_other_posts_and_verbs_are_kept_apart(self):
+        other = Post.objects.create(user=self.owner, title="o")
+        first = self.like(self.fans[0])
+        self.assertNotEqual(self.like(self.fans[0], post=other).pk, first.pk)
+        comment = notifications.record(
+            self.owner.id, "comment", self.fans[0].id, self.post.id
+        )
+        self.assertNotEqual(comment.pk, first.pk)
+        self.assertEqual(self.unread(), 3)
+
+    def test_read_notifications_are_not_rolled_into(self):
+        first = self.like(self.fans[0])
+        notifications.mark_read(self.owner)
+        self.assertNotEqual(self.like(self.fans[1]).pk, first.pk)
+
+    def test_a_repeated_actor_counts_once(self):
+        first = self.like(self.fans[0])
+        self.like(self.fans[0])
+        self.like(self.fans[1])
+        self.like(self.fans[0])
+        first.refresh_from_db()
+        self.assertEqual(first.actor_count, 2)
+        self.assertEqual(first.actors.count(), 2)
+
+    def test_a_deleted_recipient_is_skipped(self):
+        recipient_id = self.owner.id
+        self.owner.delete()
+        self.assertIsNone(notifications.record(recipient_id, "like", self.fans[0].id))
+        self.assertFalse(Notification.objects.filter(recipient_id=recipient_id))
+
+    def test_notify_queues_the_record_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.notify(self.owner.id, "like", self.fans[0].id, self.post.id)
+            notifications.notify(self.owner.id, "like", self.owner.id, self.post.id)
+        job = Task.objects.get(name=notifications.record.name)
+        self.assertEqual(
+            job.args, [self.owner.id, "like", self.fans[0].id, self.post.id]
+        )
+
+
+class TestUnreadCounter(NotificationTestCase):
+    def test_mark_read_clears_everything_or_the_given_ids(self):
+        first = self.like(self.fans[0])
+        other = Post.objects.create(user=self.owner, title="o")
+        self.like(self.fans[0], post=other)
+        self.assertEqual(notifications.mark_read(self.owner, ids=[first.pk]), 1)
+        self.assertEqual(self.unread(), 1)
+        self.assertEqual(notifications.mark_read(self.owner), 1)
+        self.assertEqual(notifications.mark_read(self.owner), 0)
+        self.assertEqual(self.unread(), 0)
+
+    def test_mark_read_ignores_other_users_notifications(self):
+        first = self.like(self.fans[0])
+        self.assertEqual(notifications.mark_read(self.fans[0], ids=[first.pk]), 0)
+        self.assertEqual(self.unread(), 1)
+
+    def test_counter_matches_a_recount(self):
+        posts = [Post.objects.create(user=self.owner, title=str(n)) for n in range(3)]
+        for post in posts:
+            for fan in self.fans:
+                self.like(fan, post=post)
+        read = Notification.objects.get(post=posts[0])
+        notifications.mark_read(self.owner, ids=[read.pk])
+        posts[1].delete()  # cascades to its unread notification
+        counted = self.unread()
+
+        notifications.recount_unread(User.objects.filter(pk=self.owner.pk))
+        self.assertEqual(self.unread(), counted)
+        self.assertEqual(counted, 1)
@@ -0,0 +1,46 @@
+from core.test_utils import BudgetTestCase
+from social.models import Post
+
+
+class TestPostViewSetQueryBudgets(BudgetTestCase):
+    def test_list(self):
+        self.assertEndpointBudget("posts-list")
+
+    def test_list_does_not_grow_with_the_page(self):
+        viewer = self.context["viewer"]
+        Post.objects.bulk_create(
+            Post(user=viewer, title=f"extra {n}", body="extra") for n in range(10)
+        )
+        self.assertEndpointBudget("posts-list")
+
+    def test_user_posts(self):
+        self.assertEndpointBudget("posts-user")
+
+    def test_detail(self):
+        self.assertEndpointBudget("posts-detail")
+
+    def test_comments(self):
+        self.assertEndpointBudget("posts-comments")
+
+    def test_like(self):
+        self.assertEndpointBudget("posts-like")
+
+    def test_comment(self):
+        self.assertEndpointBudget("posts-comment")
+
+
+class TestFollowViewSetQueryBudgets(BudgetTestCase):
+    def test_followers(self):
+        self.assertEndpointBudget("follows-followers")
+
+    def test_following(self):
+        self.assertEndpointBudget("follows-following")
+
+    def test_status(self):
+        self.assertEndpointBudget("follows-status")
+
+    def test_statuses(self):
+        self.assertEndpointBudget("follows-statuses")
+
+    def test_follow(self):
+        self.assertEndpointBudget("follows-follow")
@@ -0,0 +1,42 @@
+from core.query_plans import ACCESS_PATHS, explain, full_scans, has_sort
+from django.test import TestCase
+from social.models import Post
+
+
+class TestAccessPathPlans(TestCase):
+    """EXPLAIN the hot queries (``core.query_plans``); no full scans or sorts"""
+
+    def assertIndexedPlan(self, name):
+        build, index_ordered = ACCESS_PATHS[name]
+        plan = explain(build(1))
+        self.assertEqual(full_scans(plan), [], f"{name} reads a table fully:\n{plan}")
+        if index_ordered:
+            self.assertFalse(
+                has_sort(plan), f"{name} sorts instead of index order:\n{plan}"
+            )
+
+    def test_detects_a_full_scan(self):
+        # body has no index: the check itself must notice
+        plan = explain(Post.objects.filter(body="x"))
+        self.assertIn("social_post", full_scans(plan))
+
+    def test_feed(self):
+        self.assertIndexedPlan("feed")
+
+    def test_user_posts(self):
+        self.assertIndexedPlan("user_posts")
+
+    def test_public_posts(self):
+        self.assertIndexedPlan("public_posts")
+
+    def test_follow_status(self):
+        self.assertIndexedPlan("follow_status")
+
+    def test_followers(self):
+        self.assertIndexedPlan("followers")
+
+    def test_post_comments(self):
+        self.assertIndexedPlan("post_comments")
+
+    def test_todo_progress(self):
+        self.assertIndexedPlan("todo_progress")
@@ -1,15 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import AlbumViewSet, FeedPosts, FollowViewSet, MyPosts, PostViewSet
+from . import async_views
+from .views import (AlbumViewSet, FeedPosts, FollowViewSet, MyPosts,
+                    NotificationViewSet, PostViewSet)
 
 router = DefaultRouter()
 router.register(r"posts", PostViewSet, basename="post")
 router.register(r"albums", AlbumViewSet, basename="album")
 router.register(r"follows", FollowViewSet, basename="follow")
+router.register(r"notifications", NotificationViewSet, basename="notification")
 
 urlpatterns = [
     *router.urls,
     path("feed/posts", FeedPosts.as_view(), name="feed-posts"),
     path("my-posts", MyPosts.as_view(), name="my-posts"),
 ]
+
+if settings.ASYNC_SOCIAL_VIEWS:
+    # Matched before the DRF routes above; writes fall through to the viewsets
+    urlpatterns = [
+        path("posts/", async_views.post_list),
+        path("posts/<int:pk>/", async_views.post_detail),
+        path("follows/users/<int:user_id>/status/", async_views.follow_status),
+        path("follows/followers/", async_views.followers),
+        path("follows/following/", async_views.following),
+        path("feed/posts", async_views.feed_posts, name="feed-posts"),
+        path("my-posts", async_views.my_posts, name="my-posts"),
+    ] + urlpatterns
@@ -1,18 +1,22 @@
+from core.db_router import ReplicaReadsMixin
 from django.contrib.auth import get_user_model
 from django.db.models import Count, Prefetch, Q
 from rest_framework import decorators, permissions, response, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Album, Comment, Follow, Like, Photo, Post
+from . import feed_ranking, follow_graph, notifications
+from .models import (Album, Comment, Follow, FollowSuggestion, Like,
+                     Notification, Photo, Post)
 from .serializers import (AlbumCreateSerializer, AlbumSerializer,
-                          CommentCreateSerializer, CommentSerializer,
-                          FollowSerializer, PhotoCreateSerializer,
-                          PhotoSerializer, PostCreateSerializer,
-                          PostSerializer)
+                          AuthorSerializer, CommentCreateSerializer,
+                          CommentSerializer, FollowSerializer,
+                          FollowSuggestionSerializer, NotificationSerializer,
+                          PhotoCreateSerializer, PhotoSerializer,
+                          PostCreateSerializer, PostSerializer)
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -52,6 +56,7 @@ class PostViewSet(viewsets.ModelViewSet):
             likes_count=Count("likes", distinct=True),
             comments_count=Count("comments", distinct=True),
         )
+        .order_by("-created_at")
     )
 
     def get_permissions(self):
@@ -111,7 +116,7 @@ class PostViewSet(viewsets.ModelViewSet):
         return response.Response(status=status.HTTP_201_CREATED)
 
 
-class AlbumViewSet(viewsets.ModelViewSet):
+class AlbumViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     serializer_class = AlbumSerializer
     parser_classes = [JSONParser, MultiPartParser, FormParser]
@@ -158,6 +163,17 @@ class AlbumViewSet(viewsets.ModelViewSet):
         return response.Response(PhotoSerializer(photo).data, status=status.HTTP_201_CREATED)
 
 
+MAX_STATUS_IDS = 100
+SUGGESTION_LIMIT = 10
+SUGGESTION_MAX_LIMIT = 50
+
+
+class FollowPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
 class FollowViewSet(viewsets.ModelViewSet):
     queryset = Follow.objects.all()
     serializer_class = FollowSerializer
@@ -244,21 +260,71 @@ class FollowViewSet(viewsets.ModelViewSet):
         except Follow.DoesNotExist:
             return Response({"status": "none"}, status=200)
 
+    def _paginated_follows(self, request, qs):
+        paginator = FollowPagination()
+        page = paginator.paginate_queryset(
+            qs.select_related("follower", "followed").order_by("-id"), request
+        )
+        return paginator.get_paginated_response(FollowSerializer(page, many=True).data)
+
+    @action(detail=False, methods=["get"], url_path="statuses")
+    def statuses(self, request):
+        """Follow status for many users at once: ``?ids=1,2,3``."""
+        try:
+            ids = [int(i) for i in request.query_params.get("ids", "").split(",") if i]
+        except ValueError:
+            return Response({"error": "ids must be a comma separated list"}, status=400)
+        if len(ids) > MAX_STATUS_IDS:
+            return Response(
+                {"error": f"At most {MAX_STATUS_IDS} ids per request"}, status=400
+            )
+        found = follow_graph.statuses(request.user.id, ids)
+        return Response({"statuses": {str(k): v for k, v in found.items()}})
+
+    @action(detail=False, methods=["get"], url_path="suggestions")
+    def suggestions(self, request):
+        """People you may know, precomputed by ``manage.py recommend_follows``."""
+        try:
+            limit = int(request.query_params.get("limit", SUGGESTION_LIMIT))
+        except ValueError:
+            limit = SUGGESTION_LIMIT
+        limit = max(1, min(limit, SUGGESTION_MAX_LIMIT))
+        qs = (
+            FollowSuggestion.objects.filter(
+                user=request.user, candidate__is_active=True
+            )
+            # Drop candidates followed since the last batch run
+            .exclude(
+                candidate_id__in=Follow.objects.filter(
+                    follower=request.user
+                ).values("followed_id")
+            )
+            .select_related("candidate")
+            .order_by("-score", "candidate_id")[:limit]
+        )
+        return Response({"results": FollowSuggestionSerializer(qs, many=True).data})
+
     @action(detail=False, methods=["get"], url_path="followers")
     def followers(self, request):
-        followers = Follow.objects.filter(
-            followed=request.user, status="accepted"
-        ).select_related("follower")
-        serializer = FollowSerializer(followers, many=True)
-        return Response(serializer.data)
+        return self._paginated_follows(
+            request, Follow.objects.filter(followed=request.user, status="accepted")
+        )
 
     @action(detail=False, methods=["get"], url_path="following")
     def following(self, request):
-        following = Follow.objects.filter(
-            follower=request.user, status="accepted"
-        ).select_related("followed")
-        serializer = FollowSerializer(following, many=True)
-        return Response(serializer.data)
+        return self._paginated_follows(
+            request, Follow.objects.filter(follower=request.user, status="accepted")
+        )
+
+    @action(detail=False, methods=["get"], url_path=r"users/(?P<user_id>\d+)/mutual")
+    def mutual(self, request, user_id=None):
+        """People you follow who also follow this user (paginated)."""
+        ids = follow_graph.followed_by_following(request.user.id, int(user_id))
+        paginator = FollowPagination()
+        page = paginator.paginate_queryset(ids, request)
+        users = get_user_model().objects.in_bulk(page)
+        data = [AuthorSerializer(users[i]).data for i in page if i in users]
+        return paginator.get_paginated_response(data)
 
 
 class FeedPagination(PageNumberPagination):
@@ -271,7 +337,7 @@ class MyPostsPagination(PageNumberPagination):
     page_size = 10
 
 
-class FeedPosts(APIView):
+class FeedPosts(ReplicaReadsMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
@@ -289,13 +355,22 @@ class FeedPosts(APIView):
             )
             .order_by("-created_at")
         )
+        ranked = feed_ranking.wants_ranking(request)
+        if ranked:
+            data = feed_ranking.ranked_page(request, qs, FeedPagination, PostSerializer)
+            if data is not None:
+                return Response(data)
         paginator = FeedPagination()
         page = paginator.paginate_queryset(qs, request)
         ser = PostSerializer(page, many=True)
-        return paginator.get_paginated_response(ser.data)
+        paginated = paginator.get_paginated_response(ser.data)
+        if ranked:
+            # Ranking ran over its latency budget
+            paginated.data["ranking"] = "chronological"
+        return paginated
 
 
-class MyPosts(APIView):
+class MyPosts(ReplicaReadsMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
@@ -313,3 +388,49 @@ class MyPosts(APIView):
         page = paginator.paginate_queryset(qs, request)
         ser = PostSerializer(page, many=True)
         return paginator.get_paginated_response(ser.data)
+
+
+class NotificationPagination(CursorPagination):
+    # Rolled-up notifications move to the top when they gain actors
+    ordering = ("-updated_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class NotificationViewSet(viewsets.GenericViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        return Notification.objects.filter(recipient=self.request.user).select_related(
+            "actor"
+        )
+
+    def list(self, request):
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        return Response({"unread": notifications.unread_count(request.user.id)})
+
+    @action(detail=False, methods=["post"], url_path="read")
+    def read(self, request):
+        """Mark ``{"ids": [...]}`` read, or every notification without ids."""
+        ids = request.data.get("ids")
+        if ids is not None:
+            if not isinstance(ids, list):
+                return Response({"error": "ids must be a list"}, status=400)
+            try:
+                ids = [int(i) for i in ids]
+            except (TypeError, ValueError):
+                return Response({"error": "ids must be integers"}, status=400)
+        updated = notifications.mark_read(request.user, ids)
+        return Response(
+            {
+                "updated": updated,
+                "unread": notifications.unread_count(request.user.id),
+            }
+        )
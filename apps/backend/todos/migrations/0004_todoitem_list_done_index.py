@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0003_todopriority_todoitem_priority"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="todoitem",
+            index=models.Index(
+                fields=["list", "is_done"], name="todoitem_list_done_idx"
+            ),
+        ),
+    ]
@@ -58,6 +58,10 @@ class TodoItem(models.Model):
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            # ilerleme hesapları: list_id = X [AND is_done = ...]
+            models.Index(fields=["list", "is_done"], name="todoitem_list_done_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -126,11 +126,13 @@ class TodoListSerializer(serializers.ModelSerializer):
         ]
 
     def get_items_count(self, obj: TodoList) -> int:
-        return obj.items.count()
+        # items.all(): görünümün prefetch önbelleğini kullanır
+        return len(obj.items.all())
 
     def get_progress(self, obj: TodoList) -> int:
-        count = obj.items.count()
-        if count == 0:
+        items = obj.items.all()
+        if not items:
             return 0
-        total = sum(i.progress_cached for i in obj.items.all())
+        total = sum(i.progress_cached for i in items)
+        count = len(items)
         return int(round(total / count))
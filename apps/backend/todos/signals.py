@@ -1,8 +1,23 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from .models import TodoItem, TodoList, TodoSubItem
 
+_suspended = ContextVar("todo_progress_suspended", default=False)
+
+
+@contextmanager
+def progress_signals_suspended():
+    """Skip progress recalculation, e.g. while deleting whole lists."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
 
 def _recalc_item_progress(item: TodoItem) -> None:
     total = item.subitems.count()
@@ -30,11 +45,15 @@ def _recalc_list_progress(tlist: TodoList) -> None:
 
 @receiver([post_save, post_delete], sender=TodoSubItem)
 def recalc_on_subitem_change(sender, instance: TodoSubItem, **kwargs):
+    if _suspended.get():
+        return
     _recalc_item_progress(instance.parent)
     _recalc_list_progress(instance.parent.list)
 
 
 @receiver([post_save, post_delete], sender=TodoItem)
 def recalc_on_item_change(sender, instance: TodoItem, **kwargs):
+    if _suspended.get():
+        return
     _recalc_item_progress(instance)
     _recalc_list_progress(instance.list)
@@ -0,0 +1,20 @@
+from core.test_utils import BudgetTestCase
+from todos.models import TodoItem, TodoList, TodoSubItem
+
+
+class TestTodoListViewSetQueryBudgets(BudgetTestCase):
+    def test_list(self):
+        self.assertEndpointBudget("todo-lists-list")
+
+    def test_list_does_not_grow_with_items(self):
+        todo_list = TodoList.objects.get(pk=self.context["todo_list"])
+        items = TodoItem.objects.bulk_create(
+            TodoItem(list=todo_list, title=f"extra {n}") for n in range(10)
+        )
+        TodoSubItem.objects.bulk_create(
+            TodoSubItem(parent=item, title="extra sub") for item in items
+        )
+        self.assertEndpointBudget("todo-lists-list")
+
+    def test_detail(self):
+        self.assertEndpointBudget("todo-lists-detail")
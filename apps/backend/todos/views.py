@@ -4,6 +4,8 @@ Todos API görünümleri.
 Sahiplik bazlı yetkilendirme ve sayfalama desteği içerir.
 """
 
+from core.db_router import ReplicaReadsMixin
+from django.db.models import Prefetch
 from drf_spectacular.utils import extend_schema
 from rest_framework import decorators, permissions, response, status, viewsets
 from users.policies import filter_queryset_by_visibility
@@ -25,13 +27,25 @@ class TodoPriorityViewSet(viewsets.ReadOnlyModelViewSet):
     summary="Todo listeleri",
     description="Kullanıcıya ait todo listeleri.",
 )
-class TodoListViewSet(viewsets.ModelViewSet):
+class TodoListViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = TodoList.objects.all()
     serializer_class = TodoListSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
 
     def get_queryset(self):
-        qs = TodoList.objects.all()
+        # Öğeler, öncelikleri ve alt öğeler liste başına değil toplu yüklenir
+        qs = TodoList.objects.prefetch_related(
+            Prefetch(
+                "items",
+                queryset=TodoItem.objects.select_related("priority").prefetch_related(
+                    "subitems"
+                ),
+            )
+        )
+        user_id = self.request.query_params.get("user_id")
+        if user_id and user_id.isdigit():
+            # Profil sayfası: tek kullanıcının listeleri
+            qs = qs.filter(user_id=int(user_id))
         return filter_queryset_by_visibility(qs, self.request.user, owner_field="user")
 
     def perform_create(self, serializer):
@@ -41,13 +55,15 @@ class TodoListViewSet(viewsets.ModelViewSet):
 @extend_schema(
     tags=["Todos"], summary="Todo öğeleri", description="Kullanıcıya ait todo öğeleri."
 )
-class TodoItemViewSet(viewsets.ModelViewSet):
+class TodoItemViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = TodoItem.objects.all()
     serializer_class = TodoItemSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
 
     def get_queryset(self):
-        qs = TodoItem.objects.select_related("list")
+        qs = TodoItem.objects.select_related("list", "priority").prefetch_related(
+            "subitems"
+        )
         # Sahiplik alanı list.user
         return filter_queryset_by_visibility(
             qs, self.request.user, owner_field="list__user"
@@ -66,7 +82,7 @@ class TodoItemViewSet(viewsets.ModelViewSet):
 @extend_schema(
     tags=["Todos"], summary="Alt öğeler", description="Kullanıcıya ait alt öğeler."
 )
-class TodoSubItemViewSet(viewsets.ModelViewSet):
+class TodoSubItemViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = TodoSubItem.objects.all()
     serializer_class = TodoSubItemSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from .views_admin_tools import purge_non_admin_users
+from .views_admin_tools import purge_non_admin_users, purge_status
 
 urlpatterns = [
     path("purge-non-admin-users/", purge_non_admin_users, name="purge_non_admin_users"),
+    path("purge-non-admin-users/<int:task_id>/", purge_status, name="purge_status"),
 ]
@@ -0,0 +1,190 @@
+"""
+Login throughput per password hasher (see ``core.hashers``).
+
+For each hasher the ``loginbench_*`` fixture users get a password hashed
+with it, and ``--threads`` threads post to ``/api/auth/login/`` with their
+own ``APIClient`` while that hasher is preferred. Hashing runs on the
+bounded hashing pool, so throughput grows with the threads only up to
+``PASSWORD_HASHING_WORKERS`` and the cores available; "per core" divides by
+the smaller of the three. Busy answers (503 from a full pool) are counted
+separately from other failures.
+
+Afterwards one user with a PBKDF2 hash logs in under the configured
+settings to show the rehash to the preferred hasher. Fixture users are
+removed afterwards.
+"""
+
+import itertools
+import json
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+PREFIX = "loginbench_"
+PASSWORD = "loginbench-password"
+HASHERS = {
+    "scrypt": "core.hashers.ScryptPasswordHasher",
+    "argon2": "core.hashers.Argon2PasswordHasher",
+    "pbkdf2": "core.hashers.PBKDF2PasswordHasher",
+}
+
+
+def _cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _available(name):
+    if name != "argon2":
+        return True
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class Command(BaseCommand):
+    help = "Benchmark login throughput per password hasher"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hasher",
+            action="append",
+            choices=list(HASHERS),
+            default=[],
+            help="Hasher(s) to run (default: every installed one)",
+        )
+        parser.add_argument("--threads", type=int, default=_cores())
+        parser.add_argument("--logins", type=int, default=20, help="Per thread")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        selected = options["hasher"] or [h for h in HASHERS if _available(h)]
+        missing = [h for h in selected if not _available(h)]
+        if missing:
+            raise CommandError(f"{', '.join(missing)} needs argon2-cffi installed")
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(
+                f"{PREFIX}* users exist (interrupted run?); delete them first"
+            )
+
+        threads = options["threads"]
+        cores = min(threads, settings.PASSWORD_HASHING_WORKERS, _cores())
+        self.stdout.write(
+            f"{threads} threads, {settings.PASSWORD_HASHING_WORKERS} hashing "
+            f"workers, {_cores()} cores -> per core = / {cores}\n"
+        )
+        results = {}
+        try:
+            User.objects.bulk_create(
+                User(username=f"{PREFIX}{i}", email=f"{PREFIX}{i}@example.test")
+                for i in range(threads)
+            )
+            for name in selected:
+                preferred = [HASHERS[name]] + [
+                    h for h in HASHERS.values() if h != HASHERS[name]
+                ]
+                with override_settings(PASSWORD_HASHERS=preferred):
+                    results[name] = self.run(threads, options["logins"])
+                results[name]["per_core"] = round(
+                    results[name]["throughput"] / cores, 2
+                )
+                self.report(name, results[name])
+            results["rehash"] = self.check_rehash()
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+        if options["output"]:
+            payload = {"threads": threads, "cores": cores, "results": results}
+            Path(options["output"]).write_text(json.dumps(payload, indent=2) + "\n")
+            self.stdout.write(f"\nResults written to {options['output']}")
+
+    def run(self, threads, logins):
+        hasher = get_hasher()
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        User.objects.filter(username__startswith=PREFIX).update(password=encoded)
+        started = time.perf_counter()
+        for _ in range(3):
+            hasher.verify(PASSWORD, encoded)
+        verify_ms = (time.perf_counter() - started) / 3 * 1000
+
+        latencies, statuses = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+        addresses = itertools.count(1)  # one per login: the anonymous throttle
+
+        def worker(index):
+            client = APIClient()
+            body = {"username": f"{PREFIX}{index}", "password": PASSWORD}
+            local_latencies, local_statuses = [], []
+            barrier.wait()
+            for _ in range(logins):
+                n = next(addresses)
+                address = f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+                t = time.perf_counter()
+                response = client.post(
+                    "/api/auth/login/", body, format="json", REMOTE_ADDR=address
+                )
+                local_latencies.append(time.perf_counter() - t)
+                local_statuses.append(response.status_code)
+            connections.close_all()
+            with lock:
+                latencies.extend(local_latencies)
+                statuses.extend(local_statuses)
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        ok = statuses.count(200)
+        return {
+            "verify_ms": round(verify_ms, 2),
+            "logins": len(statuses),
+            "throughput": round(ok / elapsed, 2),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+            "busy": statuses.count(503),
+            "errors": len(statuses) - ok - statuses.count(503),
+        }
+
+    def check_rehash(self):
+        legacy = get_hasher("pbkdf2_sha256")
+        User.objects.filter(username=f"{PREFIX}0").update(
+            password=legacy.encode(PASSWORD, legacy.salt())
+        )
+        APIClient().post(
+            "/api/auth/login/",
+            {"username": f"{PREFIX}0", "password": PASSWORD},
+            format="json",
+            REMOTE_ADDR="10.255.255.255",
+        )
+        algorithm = User.objects.get(username=f"{PREFIX}0").password.split("$", 1)[0]
+        self.stdout.write(f"\nrehash on login: pbkdf2_sha256 -> {algorithm}")
+        return {"before": "pbkdf2_sha256", "after": algorithm}
+
+    def report(self, name, r):
+        self.stdout.write(
+            f"{name:>7}: verify={r['verify_ms']:7.2f}ms  "
+            f"{r['throughput']:7.2f} logins/s  {r['per_core']:7.2f}/core  "
+            f"p50={r['p50_ms']:7.2f}ms  p95={r['p95_ms']:7.2f}ms  "
+            f"busy={r['busy']}  errors={r['errors']}"
+        )
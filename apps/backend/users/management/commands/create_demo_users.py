@@ -3,6 +3,7 @@ import random
 from datetime import datetime, timedelta
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from social.models import Album, Comment, Follow, Like, Photo, Post
@@ -216,6 +217,7 @@ class Command(BaseCommand):
             "Erzurum",
         ]
 
+        password = make_password("demo123")  # All demo users have same password
         for i in range(count):
             # Randomly choose gender and name
             is_male = random.choice([True, False])
@@ -255,10 +257,10 @@ class Command(BaseCommand):
             is_private = random.random() < private_rate
 
             # Create user
-            user = User.objects.create_user(
+            user = User.objects.create(
                 username=username,
                 email=email,
-                password="demo123",  # All demo users have same password
+                password=password,
                 full_name=full_name,
                 phone=phone,
                 address=address,
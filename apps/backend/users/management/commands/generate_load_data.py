@@ -0,0 +1,395 @@
+"""
+Generate a production-sized synthetic dataset for load testing.
+
+Creates ``--users`` accounts (``<prefix><n>``), ``--posts`` posts per user
+spread over the last ``--days`` days, about ``--follows`` follows and
+``--likes`` likes. Followed users and liked posts follow a power law
+(``P(rank) ~ rank**-skew`` over a seeded random ranking), and so do the
+follow/like counts per user, so the data has celebrities, lurkers and hot
+posts like a real network.
+
+Rows are generated in shards of ``SHARD`` users. Every shard draws from
+its own RNG seeded with ``(--seed, phase, shard)``, so the dataset depends
+only on the options, not on ``--processes``. Shards are generated and
+inserted by a spawn process pool, one transaction per shard, with
+``bulk_create`` or, with ``--copy`` on PostgreSQL, ``COPY ... FROM STDIN``.
+Every account shares one precomputed password hash (``--password``).
+
+No signals run. Follower counters are recomputed at the end. The search and
+typeahead indexes are not updated: run ``rebuild_search_index`` if needed.
+
+    python manage.py generate_load_data --users 1000000 --follows 10000000 \\
+        --likes 50000000 --processes 8 --copy
+"""
+
+import io
+import multiprocessing
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+from functools import cache
+from itertools import chain
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+SHARD = 10_000
+
+# Filled in each child by _init_child
+_ids = {}
+_write_lock = None
+
+
+def _init_child(ids, write_lock):
+    global _write_lock
+    import django
+
+    django.setup()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _ids.update(ids)
+    _write_lock = write_lock
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """Let generated rows keep their own ``created_at``/``updated_at``."""
+    fields = [
+        f
+        for model in models
+        for f in model._meta.concrete_fields
+        if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)
+    ]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy(model, objs):
+    """``COPY`` ``objs`` into the model's table (PostgreSQL)."""
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    buf = io.StringIO()
+    for obj in objs:
+        buf.write(
+            "\t".join(
+                _copy_value(f.get_db_prep_save(getattr(obj, f.attname), connection))
+                for f in fields
+            )
+        )
+        buf.write("\n")
+    buf.seek(0)
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    sql = (
+        f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN"
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, buf)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buf.getvalue())
+
+
+def _insert(model, objs, use_copy, batch_size):
+    from django.db import transaction
+
+    # SQLite has one writer: shards are built in parallel but inserted in
+    # turn, rather than timing out on the database lock
+    lock = _write_lock if connection.vendor == "sqlite" else nullcontext()
+    with lock, transaction.atomic(), _explicit_timestamps(model):
+        if use_copy:
+            _copy(model, objs)
+        else:
+            model.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def _rng(seed, phase, shard):
+    return np.random.default_rng([seed, phase, shard])
+
+
+def _power_law(rng, n, size, skew):
+    """``size`` ranks in ``[0, n)`` with ``P(rank) ~ (rank + 1)**-skew``."""
+    u = rng.random(size)
+    if skew == 1.0:
+        ranks = np.exp(u * np.log(n + 1)) - 1
+    else:
+        e = 1.0 - skew
+        ranks = (1 + u * ((n + 1) ** e - 1)) ** (1 / e) - 1
+    return np.minimum(ranks.astype(np.int64), n - 1)
+
+
+def _degrees(rng, size, mean, cap):
+    """Heavy-tailed per-user counts (Pareto, shape 1.5) averaging ``mean``."""
+    raw = rng.pareto(1.5, size) + 1
+    return np.minimum(np.rint(raw * mean / raw.mean()).astype(np.int64), cap)
+
+
+@cache
+def _popularity(seed, n, phase):
+    """Seeded ranking of ``n`` rows: rank -> index."""
+    return np.random.default_rng([seed, phase]).permutation(n)
+
+
+def _users_shard(opts, shard, password_hash):
+    from django.utils import timezone
+    from users.management.commands.seed_demo import NAMES
+
+    User = get_user_model()
+    rng = _rng(opts["seed"], 0, shard)
+    lo, hi = shard * SHARD, min((shard + 1) * SHARD, opts["users"])
+    prefix = opts["prefix"]
+    private = rng.random(hi - lo) < opts["private_ratio"]
+    now = timezone.now()
+    joined = now - timedelta(days=opts["days"])
+    objs = [
+        User(
+            username=f"{prefix}{i}",
+            email=f"{prefix}{i}@example.test",
+            full_name=f"{NAMES[i % len(NAMES)]} {prefix}{i}",
+            password=password_hash,
+            is_private=bool(is_private),
+            date_joined=joined,
+            created_at=joined,
+            updated_at=now,
+        )
+        for i, is_private in zip(range(lo, hi), private.tolist())
+    ]
+    return _insert(User, objs, opts["copy"], opts["batch_size"])
+
+
+def _posts_shard(opts, shard):
+    from django.utils import timezone
+    from social.models import Post
+
+    rng = _rng(opts["seed"], 1, shard)
+    user_ids = _ids["users"][shard * SHARD : (shard + 1) * SHARD]
+    authors = np.repeat(user_ids, opts["posts"])
+    numbers = np.tile(np.arange(1, opts["posts"] + 1), len(user_ids))
+    ages = rng.uniform(0, opts["days"] * 86400, size=len(authors))
+    visibility = rng.choice(
+        ["public", "followers", "private"], size=len(authors), p=[0.7, 0.2, 0.1]
+    )
+    now = timezone.now()
+    objs = [
+        Post(
+            user_id=author,
+            title=f"Post {n}",
+            body="Lorem ipsum dolor sit amet.",
+            visibility=v,
+            created_at=now - timedelta(seconds=age),
+            updated_at=now - timedelta(seconds=age),
+        )
+        for author, n, v, age in zip(
+            authors.tolist(), numbers.tolist(), visibility.tolist(), ages.tolist()
+        )
+    ]
+    return _insert(Post, objs, opts["copy"], opts["batch_size"])
+
+
+def _pairs(opts, shard, phase, per_user, n_targets, target_phase):
+    """Distinct (source index, target index) pairs for one shard."""
+    rng = _rng(opts["seed"], phase, shard)
+    lo, hi = shard * SHARD, min((shard + 1) * SHARD, opts["users"])
+    degrees = _degrees(rng, hi - lo, per_user, n_targets - 1)
+    want = int(degrees.sum())
+    popularity = _popularity(opts["seed"], n_targets, target_phase)
+    src = np.repeat(np.arange(lo, hi, dtype=np.int64), degrees)
+    keys = np.empty(0, dtype=np.int64)
+    # Popular targets are drawn repeatedly; top up what deduplication removed
+    for _ in range(5):
+        dst = popularity[_power_law(rng, n_targets, len(src), opts["skew"])]
+        keys = np.union1d(keys, src * n_targets + dst)
+        missing = want - len(keys)
+        if missing <= 0:
+            break
+        src = lo + rng.choice(hi - lo, size=missing, p=degrees / want)
+    if len(keys) > want:
+        keys = np.sort(rng.choice(keys, size=want, replace=False))
+    return keys // n_targets, keys % n_targets
+
+
+def _follows_shard(opts, shard):
+    from django.utils import timezone
+    from social.models import Follow
+
+    ids = _ids["users"]
+    src, dst = _pairs(opts, shard, 2, opts["follows_per_user"], len(ids), 100)
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+    # Follows of private accounts start as requests
+    pending = _ids["private"][dst] & (
+        _rng(opts["seed"], 3, shard).random(len(dst)) < 0.3
+    )
+    now = timezone.now()
+    objs = [
+        Follow(
+            follower_id=a,
+            followed_id=b,
+            status="pending" if p else "accepted",
+            created_at=now,
+        )
+        for a, b, p in zip(ids[src].tolist(), ids[dst].tolist(), pending.tolist())
+    ]
+    return _insert(Follow, objs, opts["copy"], opts["batch_size"])
+
+
+def _likes_shard(opts, shard):
+    from social.models import Like
+
+    user_ids, post_ids = _ids["users"], _ids["posts"]
+    src, dst = _pairs(opts, shard, 4, opts["likes_per_user"], len(post_ids), 101)
+    objs = [
+        Like(user_id=u, post_id=p)
+        for u, p in zip(user_ids[src].tolist(), post_ids[dst].tolist())
+    ]
+    return _insert(Like, objs, opts["copy"], opts["batch_size"])
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate synthetic users, posts, follows and likes for load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--posts", type=int, default=5, help="Per user")
+        parser.add_argument(
+            "--follows", type=int, default=None, help="Total (default: 10 per user)"
+        )
+        parser.add_argument(
+            "--likes", type=int, default=None, help="Total (default: 50 per user)"
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Power-law exponent for followed users and liked posts",
+        )
+        parser.add_argument("--private-ratio", type=float, default=0.1)
+        parser.add_argument(
+            "--days", type=int, default=30, help="Spread posts over this many days"
+        )
+        parser.add_argument("--prefix", default="load_")
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--copy", action="store_true", help="Use COPY (PostgreSQL only)"
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options["copy"] and connection.vendor != "postgresql":
+            raise CommandError("--copy needs PostgreSQL")
+        if options["users"] < 2:
+            raise CommandError("--users must be at least 2")
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Users named {prefix}* already exist; pick another --prefix"
+            )
+
+        n = options["users"]
+        opts = {
+            "users": n,
+            "posts": options["posts"],
+            "follows_per_user": (options["follows"] or 10 * n) / n,
+            "likes_per_user": (options["likes"] or 50 * n) / n,
+            "skew": options["skew"],
+            "private_ratio": options["private_ratio"],
+            "days": options["days"],
+            "prefix": prefix,
+            "seed": options["seed"],
+            "batch_size": options["batch_size"],
+            "copy": options["copy"],
+        }
+        shards = range((n + SHARD - 1) // SHARD)
+        self.processes = options["processes"]
+        started = time.perf_counter()
+
+        # Hashing is deliberately slow; do it once for every account
+        password_hash = make_password(options["password"])
+        self.run_phase("users", _users_shard, opts, shards, {}, password_hash)
+
+        users = User.objects.filter(username__startswith=prefix)
+        # Index order = generation order (usernames sort as generated)
+        rows = sorted(
+            users.values_list("username", "id", "is_private"),
+            key=lambda row: int(row[0][len(prefix) :]),
+        )
+        user_ids = np.array([row[1] for row in rows], dtype=np.int64)
+        private = np.array([row[2] for row in rows], dtype=bool)
+        ids = {"users": user_ids, "private": private}
+
+        self.run_phase("posts", _posts_shard, opts, shards, ids)
+        self.run_phase("follows", _follows_shard, opts, shards, ids)
+
+        from social import follow_graph
+        from social.models import Post
+
+        # Index posts like users: by author index, then creation order
+        posts = np.fromiter(
+            chain.from_iterable(
+                Post.objects.filter(user__in=users)
+                .values_list("user_id", "id")
+                .iterator(chunk_size=50_000)
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        by_id = np.argsort(user_ids)
+        author_index = by_id[np.searchsorted(user_ids, posts[:, 0], sorter=by_id)]
+        ids["posts"] = posts[np.lexsort((posts[:, 1], author_index)), 1]
+        self.run_phase("likes", _likes_shard, opts, shards, ids)
+
+        phase_started = time.perf_counter()
+        follow_graph.recount(users)
+        self.stdout.write(f"  counters: {time.perf_counter() - phase_started:.1f}s")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {prefix}* data in {time.perf_counter() - started:.1f}s"
+            )
+        )
+
+    def run_phase(self, name, fn, opts, shards, ids, *args):
+        started = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+        total = 0
+        with ProcessPoolExecutor(
+            self.processes,
+            mp_context=context,
+            initializer=_init_child,
+            initargs=(ids, context.Lock()),
+        ) as pool:
+            futures = [pool.submit(fn, opts, shard, *args) for shard in shards]
+            for future in futures:
+                total += future.result()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  {name}: {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f}/s)"
+        )
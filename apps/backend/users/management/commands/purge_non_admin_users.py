@@ -1,12 +1,9 @@
 import logging
 
-from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
-from django.db import models, transaction
-from social.models import Album, Comment, Follow, Like, Photo, Post
-from todos.models import TodoItem, TodoList, TodoSubItem
+from users.purge import DEFAULT_CHUNK_SIZE, get_deletion_summary, purge_users
+from users.tasks import PurgeInProgress, enqueue_purge
 
-User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +23,24 @@ class Command(BaseCommand):
             default=[],
             help="Usernames or emails to preserve (can be used multiple times)",
         )
+        parser.add_argument(
+            "--estimate",
+            action="store_true",
+            default=False,
+            help="Estimate related counts from a sample of users (fast on large databases)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Users deleted per transaction",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            default=False,
+            help="Queue the purge for the task worker instead of running it here",
+        )
         parser.add_argument(
             "--force",
             action="store_true",
@@ -48,7 +63,9 @@ class Command(BaseCommand):
             self.stdout.write("This operation cannot be undone.")
 
             # Count what will be deleted
-            deletion_summary = self.get_deletion_summary(keep_list)
+            deletion_summary = get_deletion_summary(
+                keep_list, estimate=options["estimate"]
+            )
             self.display_summary(deletion_summary, dry_run=True)
 
             confirm = input('\nType "PURGE_NON_ADMIN_USERS" to confirm: ')
@@ -61,11 +78,26 @@ class Command(BaseCommand):
                 self.stdout.write(
                     self.style.SUCCESS("🔍 DRY RUN MODE - No data will be deleted")
                 )
-                deletion_summary = self.get_deletion_summary(keep_list)
+                deletion_summary = get_deletion_summary(
+                    keep_list, estimate=options["estimate"]
+                )
                 self.display_summary(deletion_summary, dry_run=True)
+            elif options["background"]:
+                job = enqueue_purge(keep_list)
+                self.stdout.write(
+                    self.style.SUCCESS(f"Purge queued as task {job.id} ({job.status}).")
+                )
+                logger.warning(f"PURGE_NON_ADMIN_USERS queued as task {job.id}")
             else:
                 self.stdout.write(self.style.WARNING("🚨 PURGING NON-ADMIN USERS..."))
-                deletion_summary = self.purge_users(keep_list)
+                deletion_summary = get_deletion_summary(
+                    keep_list, estimate=options["estimate"]
+                )
+                purge_users(
+                    keep_list,
+                    chunk_size=options["chunk_size"],
+                    on_progress=self.report_progress,
+                )
                 self.display_summary(deletion_summary, dry_run=False)
 
                 # Log the operation
@@ -75,122 +107,27 @@ class Command(BaseCommand):
                     f'Kept: {deletion_summary["kept_users"]}'
                 )
 
+        except PurgeInProgress as e:
+            raise CommandError(
+                f"{e}; it keeps {e.job.kwargs.get('keep', [])}. Wait for it to finish."
+            )
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"❌ Error during purge: {str(e)}"))
             logger.error(f"PURGE_NON_ADMIN_USERS failed: {str(e)}")
             raise CommandError(f"Purge failed: {str(e)}")
 
-    def get_deletion_summary(self, keep_list):
-        """Get summary of what would be deleted"""
-        # Users to preserve
-        preserved_users = self.get_preserved_users(keep_list)
-        preserved_user_ids = list(preserved_users.values_list("id", flat=True))
-
-        # Users to delete
-        users_to_delete = User.objects.exclude(id__in=preserved_user_ids)
-
-        # Count related objects
-        summary = {
-            "users": users_to_delete.count(),
-            "posts": Post.objects.filter(user__in=users_to_delete).count(),
-            "comments": Comment.objects.filter(user__in=users_to_delete).count(),
-            "likes": Like.objects.filter(user__in=users_to_delete).count(),
-            "albums": Album.objects.filter(user__in=users_to_delete).count(),
-            "photos": Photo.objects.filter(album__user__in=users_to_delete).count(),
-            "follows": Follow.objects.filter(
-                models.Q(follower__in=users_to_delete)
-                | models.Q(followed__in=users_to_delete)
-            ).count(),
-            "todo_lists": TodoList.objects.filter(user__in=users_to_delete).count(),
-            "todo_items": TodoItem.objects.filter(
-                list__user__in=users_to_delete
-            ).count(),
-            "todo_sub_items": TodoSubItem.objects.filter(
-                parent__list__user__in=users_to_delete
-            ).count(),
-            "kept_users": preserved_users.count(),
-            "kept_usernames": list(preserved_users.values_list("username", flat=True)),
-        }
-
-        summary["total_related"] = (
-            summary["posts"]
-            + summary["comments"]
-            + summary["likes"]
-            + summary["albums"]
-            + summary["photos"]
-            + summary["follows"]
-            + summary["todo_lists"]
-            + summary["todo_items"]
-            + summary["todo_sub_items"]
-        )
-
-        return summary
-
-    def get_preserved_users(self, keep_list):
-        """Get users that should be preserved"""
-        preserved = User.objects.filter(is_superuser=True)
-
-        if keep_list:
-            # Add users from keep_list (by username or email)
-            keep_users = User.objects.filter(
-                models.Q(username__in=keep_list) | models.Q(email__in=keep_list)
+    def report_progress(self, progress):
+        if not progress["finished"]:
+            self.stdout.write(
+                f'  chunk {progress["chunks"]}: '
+                f'{progress["users_deleted"]}/{progress["users_total"]} users deleted'
             )
-            preserved = preserved | keep_users
-
-        return preserved.distinct()
-
-    def purge_users(self, keep_list):
-        """Actually delete the users and related content"""
-        with transaction.atomic():
-            # Get users to preserve
-            preserved_users = self.get_preserved_users(keep_list)
-            preserved_user_ids = list(preserved_users.values_list("id", flat=True))
-
-            # Get users to delete
-            users_to_delete = User.objects.exclude(id__in=preserved_user_ids)
-
-            # Delete in proper order to handle CASCADE relationships
-            # First, delete objects that might have PROTECT relationships
-
-            # Delete follows (both as follower and followed)
-            Follow.objects.filter(
-                models.Q(follower__in=users_to_delete)
-                | models.Q(followed__in=users_to_delete)
-            ).delete()
-
-            # Delete likes
-            Like.objects.filter(user__in=users_to_delete).delete()
-
-            # Delete comments
-            Comment.objects.filter(user__in=users_to_delete).delete()
-
-            # Delete photos (albums will cascade)
-            Photo.objects.filter(album__user__in=users_to_delete).delete()
-
-            # Delete albums
-            Album.objects.filter(user__in=users_to_delete).delete()
-
-            # Delete todo sub-items
-            TodoSubItem.objects.filter(parent__list__user__in=users_to_delete).delete()
-
-            # Delete todo items
-            TodoItem.objects.filter(list__user__in=users_to_delete).delete()
-
-            # Delete todo lists
-            TodoList.objects.filter(user__in=users_to_delete).delete()
-
-            # Delete posts
-            Post.objects.filter(user__in=users_to_delete).delete()
-
-            # Finally, delete the users
-            users_to_delete.delete()
-
-            # Get final summary
-            return self.get_deletion_summary(keep_list)
 
     def display_summary(self, summary, dry_run):
         """Display deletion summary"""
         mode = "WOULD DELETE" if dry_run else "DELETED"
+        if summary["estimated"]:
+            mode += " (ESTIMATED)"
 
         self.stdout.write(f"\n📊 {mode} SUMMARY:")
         self.stdout.write("=" * 50)
@@ -1,10 +1,12 @@
 import random
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from social.models import Post
 from todos.models import TodoItem, TodoList, TodoSubItem
+from users.tasks import seed_demo as seed_demo_task
 
 NAMES = [
     "Ahmet",
@@ -41,13 +43,28 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--users", type=int, default=25)
         parser.add_argument("--deterministic", action="store_true")
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Queue the seeding for `manage.py worker` and return",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **opts):
+        if opts.get("background"):
+            queued = seed_demo_task.enqueue(
+                users=opts["users"], deterministic=opts["deterministic"]
+            )
+            self.stdout.write(f"Queued seed_demo as task {queued.id}")
+            return
+        self.seed(**opts)
+
+    @transaction.atomic
+    def seed(self, **opts):
         if opts.get("deterministic"):
             random.seed(42)
         User = get_user_model()
         created_users = []
+        password = make_password("password")  # one hash for every user
         for i in range(opts["users"]):
             username = f"user{i+1}"
             full_name = NAMES[i % len(NAMES)]
@@ -59,8 +76,8 @@ class Command(BaseCommand):
                 },
             )
             if created:
-                user.set_password("password")
-                user.save()
+                user.password = password
+                user.save(update_fields=["password"])
             created_users.append(user)
 
         # Simple posts per user
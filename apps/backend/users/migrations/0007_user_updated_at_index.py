@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0006_user_created_at_user_updated_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+    ]
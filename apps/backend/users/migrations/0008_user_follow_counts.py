@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counts(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    Follow = apps.get_model("social", "Follow")
+    db_alias = schema_editor.connection.alias
+    accepted = Follow.objects.using(db_alias).filter(status="accepted")
+
+    def count_by(field):
+        return Coalesce(
+            Subquery(
+                accepted.filter(**{field: OuterRef("pk")})
+                .values(field)
+                .annotate(n=Count("id"))
+                .values("n")
+            ),
+            0,
+        )
+
+    User.objects.using(db_alias).update(
+        followers_count=count_by("followed"), following_count=count_by("follower")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_user_updated_at_index"),
+        ("social", "0008_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0008_user_follow_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="unread_notifications",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -12,8 +12,16 @@ class User(AbstractUser):
     about = models.TextField(blank=True)
     is_premium = models.BooleanField(default=False)
     is_private = models.BooleanField(default=False)
+    # Accepted follows, maintained by social.signals (O(1) profile counts)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # Unread inbox rows, maintained by social.notifications
+    unread_notifications = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
-    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+    # Indexed: the typeahead index syncs changed users by updated_at
+    updated_at = models.DateTimeField(
+        auto_now=True, null=True, blank=True, db_index=True
+    )
 
     def __str__(self) -> str:
         return self.username
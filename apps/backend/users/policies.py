@@ -27,13 +27,17 @@ def is_follower(request_user: User, target_user: User) -> bool:
     ).exists()
 
 
-def can_view_profile(request_user: User, target_user: User) -> bool:
+def can_view_profile(
+    request_user: User, target_user: User, following: bool | None = None
+) -> bool:
     """Profil görünürlüğünü değerlendirir.
 
     - Admin/Sahip → True
     - profile_privacy == public → True
     - profile_privacy == friends (followers) → takipçi ise True
     - profile_privacy == private veya is_private True → False
+
+    Takip durumu zaten biliniyorsa `following` ile verilir; sorgu atılmaz.
     """
     if not target_user:
         return False
@@ -52,6 +56,8 @@ def can_view_profile(request_user: User, target_user: User) -> bool:
     if privacy == "public":
         return True
     if privacy in ("friends", "followers"):
+        if following is not None:
+            return following
         return is_follower(request_user, target_user)
     if privacy == "private":
         return False
@@ -80,18 +86,26 @@ def filter_queryset_by_visibility(qs, request_user: User, owner_field: str = "us
     if request_user.is_staff or request_user.is_superuser:
         return qs
 
-    owner_id_field = f"{owner_field}_id"
-
-    # İzinli sahipler: self + public kullanıcılar + kabul edilmiş takip edilenler
-    public_owner_ids = User.objects.filter(
-        Q(profile_privacy="public") & Q(is_private=False)
-    ).values_list("id", flat=True)
-
-    follower_owner_ids = Follow.objects.filter(
+    following_ids = Follow.objects.filter(
         follower=request_user, status="accepted"
     ).values_list("followed_id", flat=True)
 
-    allowed_ids = set(public_owner_ids).union(set(follower_owner_ids))
-    allowed_ids.add(request_user.id)
+    # İzinli sahipler: self + gizli olmayan kullanıcılar + kabul edilmiş takip
+    # edilenler (tek sorguda alt sorgu olarak)
+    return qs.filter(
+        Q(**{f"{owner_field}__is_private": False})
+        | Q(**{f"{owner_field}_id__in": following_ids})
+        | Q(**{f"{owner_field}_id": request_user.id})
+    )
+
+
+def can_view_owned_by(request_user: User, owner: User, following: bool) -> bool:
+    """`filter_queryset_by_visibility` kuralının tek bir sahip için karşılığı.
 
-    return qs.filter(**{owner_id_field: list(allowed_ids)})
+    `following`: istek yapan, sahibi kabul edilmiş olarak takip ediyor mu.
+    """
+    if not request_user or not request_user.is_authenticated:
+        return False
+    if request_user.is_staff or request_user.is_superuser:
+        return True
+    return request_user.id == owner.id or not owner.is_private or following
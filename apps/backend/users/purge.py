@@ -0,0 +1,307 @@
+"""
+Chunked purge of non-admin users.
+
+Users are deleted in id order, ``chunk_size`` at a time, each chunk in its
+own short transaction. Within a chunk every dependent table is cleared with
+one raw ``DELETE ... WHERE <path to user> IN (chunk)`` (``SET_NULL``
+relations get one ``UPDATE``), deepest tables first. The plan is derived
+from the model relations, the way Django's deletion collector walks them,
+but no rows are loaded and no per-object signals are sent. Todo progress
+signals are suspended as well, so nothing recalculates lists that are about
+to disappear.
+
+Search entries have no foreign key to follow and are normally removed by
+``post_delete`` signals, so each chunk deletes the entries of the users and
+of every post and comment it removes in the same transaction.
+
+Denormalized state of the users who are kept is repaired after each chunk:
+follower/following counters and unread notification counters in the
+chunk's transaction, the follow-graph caches and the typeahead index once
+it has committed.
+
+The user id range is fixed when the purge starts (accounts created during
+the purge are left alone). After each chunk the checkpoint is handed to
+``on_progress``; passing it back as ``resume`` continues from there. Since
+deleted users are gone, a fresh run also finishes an interrupted one.
+
+``get_deletion_summary`` is the dry-run preview shared by the admin API and
+the management command.
+"""
+
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.functions import Mod
+from search.models import SearchEntry
+from social import follow_graph, notifications
+from social.models import Album, Comment, Follow, Like, Notification, Photo, Post
+from todos.models import TodoItem, TodoList, TodoSubItem
+from todos.signals import progress_signals_suspended
+
+from .typeahead import user_index
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_SAMPLE_SIZE = 200
+
+# Summary key -> (model, lookup from the model to its owner's user id)
+SUMMARY_TABLES = {
+    "posts": (Post, "user_id"),
+    "comments": (Comment, "user_id"),
+    "likes": (Like, "user_id"),
+    "albums": (Album, "user_id"),
+    "photos": (Photo, "album__user_id"),
+    "todo_lists": (TodoList, "user_id"),
+    "todo_items": (TodoItem, "list__user_id"),
+    "todo_sub_items": (TodoSubItem, "parent__list__user_id"),
+}
+
+# Models with their own search entries (users' own are matched by owner_id)
+SEARCH_KINDS = {Post: SearchEntry.KIND_POST, Comment: SearchEntry.KIND_COMMENT}
+
+
+def get_preserved_users(keep_list):
+    """Superusers plus the usernames/emails in ``keep_list``."""
+    preserved = User.objects.filter(is_superuser=True)
+    if keep_list:
+        preserved = preserved | User.objects.filter(
+            models.Q(username__in=keep_list) | models.Q(email__in=keep_list)
+        )
+    return preserved.distinct()
+
+
+def _count_all(querysets):
+    """COUNT(*) of every queryset in one ``SELECT (...), (...)`` round trip."""
+    parts, params = [], []
+    for qs in querysets.values():
+        try:
+            sql, sql_params = qs.order_by().values("pk").query.sql_with_params()
+        except EmptyResultSet:  # e.g. ``__in=[]``
+            parts.append("0")
+            continue
+        parts.append(f"(SELECT COUNT(*) FROM ({sql}) AS counted)")
+        params.extend(sql_params)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT " + ", ".join(parts), params)
+        return dict(zip(querysets, cursor.fetchone()))
+
+
+def _sample_user_ids(candidates, total, size):
+    """Every ``total // size``-th candidate id, from a random offset."""
+    step = max(total // size, 1)
+    return list(
+        candidates.annotate(_bucket=Mod("id", step))
+        .filter(_bucket=random.randrange(step))
+        .values_list("id", flat=True)
+    )
+
+
+def get_deletion_summary(keep_list, estimate=False, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Counts of what a purge with ``keep_list`` would delete.
+
+    Exact counts take two queries: the preserved users, then one statement
+    counting every table. Since everyone but the (few) preserved users is
+    deleted, rows are matched with ``owner NOT IN (preserved)`` instead of
+    joining against the users being deleted.
+
+    ``estimate=True`` counts exactly only the users; content is counted for
+    a systematic sample of ``sample_size`` of them through the owner
+    indexes and scaled up, which keeps dry runs on large databases cheap.
+    """
+    preserved = list(get_preserved_users(keep_list).values_list("id", "username"))
+    preserved_ids = [user_id for user_id, _ in preserved]
+
+    if not estimate:
+        counts = _count_all(
+            {
+                "users": User.objects.exclude(id__in=preserved_ids),
+                **{
+                    key: model.objects.exclude(**{f"{lookup}__in": preserved_ids})
+                    for key, (model, lookup) in SUMMARY_TABLES.items()
+                },
+                "follows": Follow.objects.exclude(
+                    follower_id__in=preserved_ids, followed_id__in=preserved_ids
+                ),
+            }
+        )
+    else:
+        candidates = User.objects.exclude(id__in=preserved_ids)
+        users = candidates.count()
+        sample = _sample_user_ids(candidates, users, sample_size) if users else []
+        counts = _count_all(
+            {
+                **{
+                    key: model.objects.filter(**{f"{lookup}__in": sample})
+                    for key, (model, lookup) in SUMMARY_TABLES.items()
+                },
+                # Each deleted follow once: by its follower if that is
+                # deleted, otherwise by the followed user
+                "follows": Follow.objects.filter(
+                    models.Q(follower_id__in=sample)
+                    | models.Q(followed_id__in=sample, follower_id__in=preserved_ids)
+                ),
+            }
+        )
+        scale = users / len(sample) if sample else 0
+        counts = {key: round(n * scale) for key, n in counts.items()}
+        counts["users"] = users
+
+    summary = {
+        "users": counts["users"],
+        **{key: counts[key] for key in (*SUMMARY_TABLES, "follows")},
+        "kept_users": len(preserved),
+        "kept_usernames": [username for _, username in preserved],
+        "estimated": estimate,
+    }
+    summary["total_related"] = sum(counts[key] for key in (*SUMMARY_TABLES, "follows"))
+    return summary
+
+
+def _plan(model, lookup, ancestors):
+    """Steps deleting everything hanging off ``model`` rows matching ``lookup``.
+
+    Returns ``(action, model, lookup, field)`` tuples, children first;
+    ``lookup`` leads from the step's model to the user id.
+    """
+    steps = []
+    # Same relations the deletion collector follows, hidden ("+") reverse
+    # FKs and auto-created m2m through tables included
+    for rel in get_candidate_relations_to_delete(model._meta):
+        child = rel.related_model
+        child_lookup = f"{rel.field.name}__{lookup}"
+        on_delete = rel.on_delete
+        if on_delete is models.CASCADE:
+            if child in ancestors:
+                raise NotImplementedError(f"Cyclic cascade through {child.__name__}")
+            steps += _plan(child, child_lookup, ancestors | {child})
+            steps.append(("delete", child, child_lookup, None))
+        elif on_delete is models.SET_NULL:
+            steps.append(("nullify", child, child_lookup, rel.field.name))
+        elif on_delete is not models.DO_NOTHING:
+            raise NotImplementedError(
+                f"{child.__name__}.{rel.field.name}: unsupported on_delete"
+            )
+    return steps
+
+
+def deletion_plan():
+    return _plan(User, "in", {User}) + [("delete", User, "pk__in", None)]
+
+
+def _run_step(step, user_ids):
+    action, model, lookup, field = step
+    qs = model._base_manager.filter(**{lookup: user_ids})
+    if action == "nullify":
+        return qs.update(**{field: None})
+    return qs._raw_delete(qs.db)
+
+
+def _unindex(plan, user_ids):
+    """Raw-delete the search entries of everything ``plan`` deletes."""
+    # Users' own entries, their posts and the comments on them
+    matches = models.Q(owner_id__in=user_ids)
+    for action, model, lookup, _ in plan:
+        kind = SEARCH_KINDS.get(model)
+        if action == "delete" and kind is not None:
+            deleted = model._base_manager.filter(**{lookup: user_ids}).values("pk")
+            matches |= models.Q(kind=kind, object_id__in=deleted)
+    qs = SearchEntry.objects.filter(matches)
+    return qs._raw_delete(qs.db)
+
+
+def _affected_kept_users(user_ids):
+    """Kept users whose counters the chunk's raw deletes will change."""
+    ids = set(user_ids)
+    follows = Follow.objects.filter(
+        models.Q(follower_id__in=ids) | models.Q(followed_id__in=ids),
+        status="accepted",
+    ).values_list("follower_id", "followed_id")
+    follow_peers = {a for pair in follows for a in pair} - ids
+    unread = (
+        Notification.objects.filter(is_read=False)
+        .filter(models.Q(actor_id__in=ids) | models.Q(post__user_id__in=ids))
+        .exclude(recipient_id__in=ids)
+        .values_list("recipient_id", flat=True)
+    )
+    return follow_peers, set(unread)
+
+
+def _repair(user_ids, follow_peers, unread_recipients):
+    if follow_peers:
+        follow_graph.recount(User.objects.filter(id__in=follow_peers))
+    if unread_recipients:
+        notifications.recount_unread(User.objects.filter(id__in=unread_recipients))
+
+    def forget():
+        # After commit: a rolled-back chunk keeps its users and follows
+        for peer in follow_peers:
+            follow_graph.forget(peer, peer)
+        user_index.remove_many(user_ids)
+
+    transaction.on_commit(forget)
+
+
+def purge_users(
+    keep_list, chunk_size=DEFAULT_CHUNK_SIZE, resume=None, on_progress=None, pause=0
+):
+    """Delete all non-preserved users in chunks; returns the final progress."""
+    preserved_ids = list(get_preserved_users(keep_list).values_list("id", flat=True))
+    candidates = User.objects.exclude(id__in=preserved_ids)
+
+    progress = dict(resume or {})
+    if "max_user_id" not in progress:
+        last = candidates.order_by("-id").values_list("id", flat=True).first()
+        progress.update(
+            max_user_id=last or 0,
+            last_user_id=0,
+            users_total=candidates.count(),
+            users_deleted=0,
+            chunks=0,
+            deleted={},
+            finished=False,
+        )
+    candidates = candidates.filter(id__lte=progress["max_user_id"])
+    deleted = Counter(progress["deleted"])
+    plan = deletion_plan()
+
+    with progress_signals_suspended():
+        while True:
+            user_ids = list(
+                candidates.filter(id__gt=progress["last_user_id"])
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+            with transaction.atomic():
+                follow_peers, unread_recipients = _affected_kept_users(user_ids)
+                # Before the plan: the entries are matched through the rows
+                count = _unindex(plan, user_ids)
+                if count:
+                    deleted[SearchEntry._meta.label] += count
+                for step in plan:
+                    count = _run_step(step, user_ids)
+                    if count:
+                        deleted[step[1]._meta.label] += count
+                _repair(user_ids, follow_peers, unread_recipients)
+            progress.update(
+                last_user_id=user_ids[-1],
+                users_deleted=progress["users_deleted"] + len(user_ids),
+                chunks=progress["chunks"] + 1,
+                deleted=dict(deleted),
+            )
+            if on_progress:
+                on_progress(progress)
+            if pause:
+                time.sleep(pause)
+
+    progress["finished"] = True
+    if on_progress:
+        on_progress(progress)
+    return progress
@@ -1,3 +1,4 @@
+from core.authentication import invalidate_user
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
@@ -20,7 +21,32 @@ class UserSerializer(serializers.ModelSerializer):
             "about",
             "is_premium",
             "is_private",
+            "followers_count",
+            "following_count",
         ]
+        read_only_fields = ["followers_count", "following_count"]
+
+
+class UserListSerializer(UserSerializer):
+    """Users grid: adds the requester's follow status for each user."""
+
+    follow_status = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ["follow_status"]
+
+    def get_follow_status(self, obj):
+        # Filled per page by UserViewSet.list (None for anonymous requests)
+        return self.context.get("follow_statuses", {}).get(obj.id)
+
+
+class TypeaheadUserSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+    full_name = serializers.CharField()
+    avatar = serializers.CharField()
+    is_premium = serializers.BooleanField()
+    is_private = serializers.BooleanField()
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -53,6 +79,11 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
         ]
         extra_kwargs = {f: {"required": False} for f in fields}
 
+    def update(self, instance, validated_data):
+        user = super().update(instance, validated_data)
+        invalidate_user(user.id)
+        return user
+
 
 class PasswordChangeSerializer(serializers.Serializer):
     old_password = serializers.CharField()
@@ -0,0 +1,24 @@
+from core.snapshots import snapshot_restored
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .typeahead import RECORD_FIELDS, user_index
+
+TYPEAHEAD_FIELDS = set(RECORD_FIELDS) | {"is_active"}
+
+
+@receiver(post_save, sender=User)
+def update_typeahead_on_save(sender, instance: User, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) & TYPEAHEAD_FIELDS:
+        user_index.upsert(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_from_typeahead(sender, instance: User, **kwargs):
+    user_index.remove(instance.id)
+
+
+@receiver(snapshot_restored)
+def rebuild_typeahead_after_restore(sender, **kwargs):
+    user_index.invalidate()
@@ -0,0 +1,54 @@
+"""Background tasks for the users app (run by ``manage.py worker``)."""
+
+from core.models import Task
+from core.tasks import current_progress, report_progress, task
+from django.core.management import call_command
+from django.db import transaction
+
+from .purge import DEFAULT_CHUNK_SIZE, purge_users
+
+
+@task(max_attempts=1)
+def seed_demo(users=25, deterministic=False):
+    """``manage.py seed_demo`` off the request/CLI path."""
+    call_command("seed_demo", users=users, deterministic=deterministic)
+
+
+@task(max_attempts=3, backoff=10)
+def purge_non_admin_users(keep=(), chunk_size=DEFAULT_CHUNK_SIZE):
+    """Chunked purge; a retried attempt resumes from the last checkpoint."""
+    return purge_users(
+        keep,
+        chunk_size=chunk_size,
+        resume=current_progress(),
+        on_progress=report_progress,
+    )
+
+
+class PurgeInProgress(Exception):
+    """Another purge, with a different keep list, is queued or running."""
+
+    def __init__(self, job):
+        super().__init__(f"Purge task {job.id} is already {job.status}")
+        self.job = job
+
+
+def enqueue_purge(keep_list):
+    """Queue the purge, or return the same purge already queued or running.
+
+    Raises ``PurgeInProgress`` if the pending purge keeps other accounts.
+    """
+    with transaction.atomic():
+        job = (
+            Task.objects.select_for_update()
+            .filter(
+                name=purge_non_admin_users.name,
+                status__in=[Task.QUEUED, Task.RUNNING],
+            )
+            .first()
+        )
+        if job is None:
+            return purge_non_admin_users.enqueue(keep=list(keep_list))
+        if sorted(job.kwargs.get("keep", [])) != sorted(keep_list):
+            raise PurgeInProgress(job)
+        return job
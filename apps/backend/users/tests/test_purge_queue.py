@@ -0,0 +1,50 @@
+from core.models import Task
+from core.test_utils import BaseAPITestCase
+from django.core.cache import cache
+from users.tasks import PurgeInProgress, enqueue_purge, purge_non_admin_users
+
+URL = "/api/admin-tools/purge-non-admin-users/"
+
+
+class TestEnqueuePurge(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()  # throttle state from earlier tests
+        self.authenticate_admin()
+
+    def purge(self, keep):
+        return self.client.post(
+            URL,
+            {"confirm": "PURGE_NON_ADMIN_USERS", "keep": keep, "dry_run": False},
+            format="json",
+        )
+
+    def test_queues_a_purge(self):
+        response = self.purge(["alice"])
+        self.assertEqual(response.status_code, 202)
+        job = Task.objects.get(pk=response.data["task_id"])
+        self.assertEqual(job.name, purge_non_admin_users.name)
+        self.assertEqual(job.kwargs, {"keep": ["alice"]})
+
+    def test_same_keep_list_reuses_the_pending_purge(self):
+        first = enqueue_purge(["alice", "bob"])
+        self.assertEqual(enqueue_purge(["bob", "alice"]).pk, first.pk)
+        response = self.purge(["alice", "bob"])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["task_id"], first.pk)
+
+    def test_other_keep_list_conflicts_with_the_pending_purge(self):
+        first = enqueue_purge(["alice"])
+        with self.assertRaises(PurgeInProgress):
+            enqueue_purge(["bob"])
+        response = self.purge(["bob"])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["task_id"], first.pk)
+        self.assertEqual(
+            Task.objects.filter(name=purge_non_admin_users.name).count(), 1
+        )
+
+    def test_finished_purge_is_not_reused(self):
+        first = enqueue_purge(["alice"])
+        Task.objects.filter(pk=first.pk).update(status=Task.SUCCEEDED)
+        self.assertNotEqual(enqueue_purge(["bob"]).pk, first.pk)
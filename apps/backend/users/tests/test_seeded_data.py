@@ -0,0 +1,44 @@
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from social.models import Post
+
+pytestmark = pytest.mark.skipif(
+    not settings.TEST_SEED_COMMANDS, reason="TEST_SEED_COMMANDS is empty"
+)
+
+
+def test_seeded_users_can_log_in(seeded, client):
+    user = seeded.users[0]
+    response = client.post(
+        "/api/auth/login/",
+        {"username": user.username, "password": "password"},
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert "access" in response.json()
+
+
+@pytest.mark.skipif(not settings.FAST_TESTS, reason="FAST_TESTS is off")
+def test_fast_tests_use_the_cheap_hasher(seeded):
+    assert get_hasher().algorithm == "md5"
+    assert seeded.users[0].password.startswith("md5$")
+
+
+def assert_seeded_rows_intact(seeded):
+    assert get_user_model().objects.count() == len(seeded.users)
+    assert Post.objects.count() == len(seeded.posts)
+
+
+# Twice: whichever run comes second sees the first one's changes rolled back
+@pytest.mark.parametrize("run", [1, 2])
+def test_changes_to_seeded_rows_are_rolled_back(seeded, run):
+    assert_seeded_rows_intact(seeded)
+    Post.objects.filter(user=seeded.users[0]).delete()
+    seeded.users[0].delete()
+    assert not get_user_model().objects.filter(pk=seeded.users[0].pk).exists()
+
+
+def test_seeded_rows_are_intact(seeded):
+    assert_seeded_rows_intact(seeded)
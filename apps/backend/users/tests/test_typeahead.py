@@ -0,0 +1,125 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from core.test_utils import create_test_user
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from users.typeahead import UserPrefixIndex
+
+User = get_user_model()
+
+
+def usernames(records):
+    return [r["username"] for r in records]
+
+
+class TypeaheadTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.index = UserPrefixIndex()
+
+    def expire_sync(self, index=None):
+        (index or self.index)._checked_at = 0.0
+
+
+class TestSearch(TypeaheadTestCase):
+    def test_matches_prefixes_of_every_word(self):
+        # Seeded demo users share the test database: distinctive names only
+        create_test_user(username="ta_ayse", full_name="Ayşe Kayaoğluzade")
+        create_test_user(username="ta_ali", full_name="Ali Demirtaşoğlu")
+        self.assertEqual(usernames(self.index.search("ta_ay")), ["ta_ayse"])
+        self.assertEqual(usernames(self.index.search("ali demirtas")), ["ta_ali"])
+        self.assertEqual(self.index.search("ali kayaogluz"), [])
+
+    def test_folds_turkish_letters(self):
+        create_test_user(username="ta_ismail", full_name="İsmailcan Çağlarbaşı")
+        self.assertEqual(usernames(self.index.search("caglarb")), ["ta_ismail"])
+        self.assertEqual(usernames(self.index.search("İSMAİLC")), ["ta_ismail"])
+
+    def test_stops_at_the_limit(self):
+        for n in range(5):
+            create_test_user(username=f"ta_deniz{n}")
+        self.assertEqual(len(self.index.search("ta_deniz", limit=3)), 3)
+
+    def test_skips_inactive_users(self):
+        create_test_user(username="ta_gone", is_active=False)
+        self.assertEqual(self.index.search("ta_gone"), [])
+
+    def test_top_k_takes_single_digit_milliseconds(self):
+        User.objects.bulk_create(
+            User(username=f"user{n:05d}", email=f"user{n}@example.test")
+            for n in range(20000)
+        )
+        self.index.search("warm")  # builds the index
+        timings = []
+        for query in ("u", "user1", "user19", "user0999"):
+            started = time.perf_counter()
+            self.assertTrue(self.index.search(query, limit=8))
+            timings.append(time.perf_counter() - started)
+        self.assertLess(max(timings), 0.01, timings)
+
+
+class TestIncrementalSync(TypeaheadTestCase):
+    def test_changes_from_other_processes_arrive_without_a_rebuild(self):
+        user = create_test_user(username="ta_before")
+        self.index.search("ta_before")
+        # Another process: no signal reaches this index
+        User.objects.filter(pk=user.pk).update(
+            username="ta_after", updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        self.expire_sync()
+        with mock.patch.object(self.index, "rebuild") as rebuild:
+            self.assertEqual(usernames(self.index.search("ta_after")), ["ta_after"])
+        rebuild.assert_not_called()
+        self.assertEqual(self.index.search("ta_before"), [])
+
+    def test_hard_deletes_in_other_processes_are_dropped(self):
+        user = create_test_user(username="ta_purged")
+        self.index.search("ta_purged")
+        other_process = UserPrefixIndex()
+        # Raw delete: what the chunked purge does in the worker
+        qs = User.objects.filter(pk=user.pk)
+        qs._raw_delete(qs.db)
+        other_process.remove_many([user.pk])
+
+        self.expire_sync()
+        with mock.patch.object(self.index, "rebuild") as rebuild:
+            self.assertEqual(self.index.search("ta_purged"), [])
+        rebuild.assert_not_called()
+
+    def test_without_deletions_ids_are_not_rechecked(self):
+        create_test_user(username="ta_stays")
+        self.index.search("ta_stays")
+        self.expire_sync()
+        with self.assertNumQueries(1):  # only the updated_at delta
+            self.index.search("ta_stays")
+
+    @override_settings(TYPEAHEAD_REBUILD_SECONDS=0)
+    def test_one_thread_rebuilds_while_the_others_serve_the_stale_index(self):
+        create_test_user(username="ta_shared")
+        self.index.search("ta_shared")
+        rebuilds = []
+        started = threading.Event()
+
+        def slow_rebuild():
+            rebuilds.append(1)
+            started.set()
+            time.sleep(0.2)
+
+        with mock.patch.object(self.index, "rebuild", side_effect=slow_rebuild):
+            threads = [
+                threading.Thread(target=self.index.search, args=("ta_shared",))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            started.wait(1)
+            # The rebuilding thread holds the lock: this one answers at once
+            self.assertEqual(usernames(self.index.search("ta_shared")), ["ta_shared"])
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(rebuilds), 1)
@@ -0,0 +1,220 @@
+"""
+Kullanıcı typeahead araması için bellek içi önek indeksi.
+
+Yapı
+----
+- Her kullanıcı için kullanıcı adı ve ad-soyad kelimeleri Türkçe kurallarıyla
+  katlanır (`search.normalization`) ve `(anahtar, user_id)` çiftleri sıralı
+  bir listede tutulur.
+- Sorgu: her kelime için `bisect` ile önek aralığı bulunur; en dar aralık
+  taranır, diğer kelimeler kullanıcının anahtar kümesinde kontrol edilir ve
+  `limit` kadar sonuç bulununca durulur. Sonuçlar eşleşen anahtara göre
+  sözlük sırasındadır (tam eşleşme önce gelir).
+
+Güncellik
+---------
+- Aynı süreçte kullanıcı kaydı/silinmesi sinyallerle anında yansır.
+- Diğer worker süreçlerindeki değişiklikler için `updated_at` üzerinden
+  artımlı senkron (`TYPEAHEAD_SYNC_SECONDS`) ve seyrek tam yeniden kurulum
+  (`TYPEAHEAD_REBUILD_SECONDS`) yapılır.
+- Kalıcı silmeler `updated_at` bırakmaz: `remove`/`remove_many` önbellekteki
+  `DELETIONS_KEY` sayacını artırır; sayaç değiştiyse senkron, indeksteki
+  id'leri veritabanıyla karşılaştırıp silinenleri düşürür (ör. worker'daki
+  purge'ün sildikleri web süreçlerinden de kalkar).
+- Senkronu ve yeniden kurulumu aynı anda tek thread yapar; eskimiş ama
+  kurulu indeks bu sırada diğer isteklere olduğu gibi cevap verir.
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from search.normalization import fold, tokenize
+
+RECORD_FIELDS = ("id", "username", "full_name", "avatar", "is_premium", "is_private")
+_HIGH = "\U0010ffff"
+DELETIONS_KEY = "typeahead:deletions"
+
+
+def _keys_for(username, full_name):
+    keys = {fold(username)}
+    keys.update(tokenize(username))
+    keys.update(tokenize(full_name))
+    keys.discard("")
+    return tuple(sorted(keys))
+
+
+class UserPrefixIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()  # tek senkron/yeniden kurulum
+        self._keys = []  # sorted [(key, user_id)]
+        self._records = {}  # user_id -> (record, keys)
+        self._built_at = None  # time.monotonic()
+        self._checked_at = 0.0  # time.monotonic()
+        self._synced_at = None  # DB saatiyle son senkron
+        self._deletions = None  # son bakılan DELETIONS_KEY değeri
+
+    # -- yazma -------------------------------------------------------------
+    def rebuild(self):
+        User = get_user_model()
+        started = timezone.now()
+        deletions = cache.get(DELETIONS_KEY)
+        keys, records = [], {}
+        rows = User.objects.filter(is_active=True).values_list(*RECORD_FIELDS)
+        for row in rows.iterator(chunk_size=5000):
+            record = dict(zip(RECORD_FIELDS, row))
+            user_keys = _keys_for(record["username"], record["full_name"])
+            records[record["id"]] = (record, user_keys)
+            keys.extend((key, record["id"]) for key in user_keys)
+        keys.sort()
+        with self._lock:
+            self._keys, self._records = keys, records
+            self._synced_at = started
+            self._deletions = deletions
+            self._built_at = self._checked_at = time.monotonic()
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def upsert(self, user):
+        if not self.is_built:
+            # Henüz sorgulanmadı; ilk aramada zaten tam kurulacak
+            return
+        if not user.is_active:
+            # updated_at taşır, diğer süreçler senkronda görür: sayaç gerekmez
+            with self._lock:
+                self._discard(user.id)
+            return
+        record = {field: getattr(user, field) for field in RECORD_FIELDS}
+        user_keys = _keys_for(user.username, user.full_name)
+        with self._lock:
+            self._discard(user.id)
+            self._records[user.id] = (record, user_keys)
+            for key in user_keys:
+                insort(self._keys, (key, user.id))
+
+    def remove(self, user_id):
+        self.remove_many([user_id])
+
+    def remove_many(self, user_ids):
+        """Silinen kullanıcıları düşürür ve diğer süreçlere haber verir."""
+        with self._lock:
+            for user_id in user_ids:
+                self._discard(user_id)
+        cache.add(DELETIONS_KEY, 0, timeout=None)
+        try:
+            cache.incr(DELETIONS_KEY)
+        except ValueError:  # arada süresi doldu/silindi
+            cache.set(DELETIONS_KEY, 1, timeout=None)
+
+    def invalidate(self):
+        """İndeksi bırakır; bir sonraki aramada baştan kurulur."""
+        with self._lock:
+            self._built_at = None
+
+    def _discard(self, user_id):
+        existing = self._records.pop(user_id, None)
+        if existing is None:
+            return
+        for key in existing[1]:
+            pos = bisect_left(self._keys, (key, user_id))
+            if pos < len(self._keys) and self._keys[pos] == (key, user_id):
+                del self._keys[pos]
+
+    def _needs_rebuild(self):
+        return (
+            not self.is_built
+            or time.monotonic() - self._built_at >= settings.TYPEAHEAD_REBUILD_SECONDS
+        )
+
+    def _refresh(self):
+        """Gerekirse başka süreçlerde yapılan değişiklikleri içeri alır."""
+        if self._needs_rebuild():
+            if self.is_built:
+                # Eskimiş ama kullanılabilir: biri kurarken diğerleri beklemez
+                if not self._refresh_lock.acquire(blocking=False):
+                    return
+            else:
+                self._refresh_lock.acquire()
+            try:
+                # Beklerken başka thread kurmuş olabilir
+                if self._needs_rebuild():
+                    self.rebuild()
+            finally:
+                self._refresh_lock.release()
+            return
+        if time.monotonic() - self._checked_at < settings.TYPEAHEAD_SYNC_SECONDS:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # başka thread senkronluyor
+        try:
+            self._sync()
+        finally:
+            self._refresh_lock.release()
+
+    def _sync(self):
+        User = get_user_model()
+        started = timezone.now()
+        # Sayaç sorgulardan önce okunur: sonradan gelen silme bir dahakine kalır
+        deletions = cache.get(DELETIONS_KEY)
+        for user in User.objects.filter(updated_at__gte=self._synced_at).only(
+            "is_active", *RECORD_FIELDS
+        ):
+            self.upsert(user)
+        if deletions != self._deletions:
+            with self._lock:
+                known = list(self._records)
+            live = set()
+            for start in range(0, len(known), 5000):
+                live.update(
+                    User.objects.filter(
+                        id__in=known[start : start + 5000], is_active=True
+                    ).values_list("id", flat=True)
+                )
+            with self._lock:
+                for user_id in set(known) - live:
+                    self._discard(user_id)
+        with self._lock:
+            self._synced_at = started
+            self._deletions = deletions
+            self._checked_at = time.monotonic()
+
+    # -- okuma -------------------------------------------------------------
+    def _range(self, prefix):
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + _HIGH,))
+        return lo, hi
+
+    def search(self, query, limit=8):
+        """Sorgudaki tüm kelimelerle önek eşleşen ilk `limit` kullanıcıyı döner."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self._refresh()
+        with self._lock:
+            ranges = [self._range(token) for token in tokens]
+            lo, hi = min(ranges, key=lambda r: r[1] - r[0])
+            others = tokens[:]
+            del others[ranges.index((lo, hi))]
+
+            results, seen = [], set()
+            for pos in range(lo, hi):
+                user_id = self._keys[pos][1]
+                if user_id in seen:
+                    continue
+                record, user_keys = self._records[user_id]
+                if all(any(k.startswith(t) for k in user_keys) for t in others):
+                    seen.add(user_id)
+                    results.append(record)
+                    if len(results) >= limit:
+                        break
+            return results
+
+
+user_index = UserPrefixIndex()
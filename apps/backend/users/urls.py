@@ -4,12 +4,14 @@ from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (ChangePasswordView, LoginView, LogoutView, RegisterViewSet,
                     UserViewSet)
+from .views_profile import profile
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet, basename="user")
 router.register(r"auth", RegisterViewSet, basename="auth")
 
 urlpatterns = [
+    path("users/<int:pk>/profile/", profile, name="user-profile"),
     *router.urls,
     path("auth/login/", LoginView.as_view(), name="token_obtain_pair"),
     path("auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
@@ -1,28 +1,59 @@
+from core.authentication import UserClaimsRefreshToken, invalidate_user
+from core.db_router import ReplicaReadsMixin
+from core.hashers import reject_when_busy
 from django.contrib.auth import get_user_model
 from rest_framework import (decorators, filters, permissions, response, status,
                             viewsets)
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from social import follow_graph
 
 from .serializers import (PasswordChangeSerializer, ProfileUpdateSerializer,
-                          RegisterSerializer, UserSerializer)
+                          RegisterSerializer, TypeaheadUserSerializer,
+                          UserListSerializer, UserSerializer)
+from .typeahead import user_index
 
 User = get_user_model()
 
+TYPEAHEAD_LIMIT = 8
+TYPEAHEAD_MAX_LIMIT = 20
 
-class UserViewSet(viewsets.ModelViewSet):
+
+class UserViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = User.objects.all().order_by("id")
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["username", "email", "full_name"]
     ordering_fields = ["id", "username"]
+    replica_read_actions = {"list"}
 
     def get_permissions(self):
-        if self.action == "list":
+        if self.action in ("list", "typeahead"):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
-    @decorators.action(detail=False, methods=["get", "patch", "delete"], url_path="me")
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        users = list(queryset) if page is None else page
+        context = self.get_serializer_context()
+        if request.user.is_authenticated:
+            # One Follow query per page instead of one status request per card
+            context["follow_statuses"] = follow_graph.statuses(
+                request.user.id, [u.id for u in users]
+            )
+        data = UserListSerializer(users, many=True, context=context).data
+        if page is None:
+            return response.Response(data)
+        return self.get_paginated_response(data)
+
+    @decorators.action(
+        detail=False,
+        methods=["get", "patch", "delete"],
+        url_path="me",
+        authentication_classes=[JWTAuthentication],  # always the current row
+    )
     def me(self, request):
         if request.method == "GET":
             return response.Response(UserSerializer(request.user).data)
@@ -33,9 +64,23 @@ class UserViewSet(viewsets.ModelViewSet):
             return response.Response(UserSerializer(request.user).data)
         # DELETE => soft delete
         request.user.is_active = False
-        request.user.save(update_fields=["is_active"])
+        request.user.save(update_fields=["is_active", "updated_at"])
+        invalidate_user(request.user.id)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
+    @decorators.action(detail=False, methods=["get"], url_path="typeahead")
+    def typeahead(self, request):
+        """Prefix search over username/full_name from the in-memory index."""
+        try:
+            limit = int(request.query_params.get("limit", TYPEAHEAD_LIMIT))
+        except ValueError:
+            limit = TYPEAHEAD_LIMIT
+        limit = max(1, min(limit, TYPEAHEAD_MAX_LIMIT))
+        records = user_index.search(request.query_params.get("q", ""), limit=limit)
+        return response.Response(
+            {"results": TypeaheadUserSerializer(records, many=True).data}
+        )
+
 
 class RegisterViewSet(viewsets.GenericViewSet):
     serializer_class = RegisterSerializer
@@ -76,7 +121,6 @@ class LoginView(APIView):
         from datetime import timedelta
 
         from django.contrib.auth import authenticate
-        from rest_framework_simplejwt.tokens import RefreshToken
 
         username = request.data.get("username")
         password = request.data.get("password")
@@ -88,13 +132,15 @@ class LoginView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        user = authenticate(request, username=username, password=password)
+        # A full hashing pool answers 503 here instead of queueing the login
+        with reject_when_busy():
+            user = authenticate(request, username=username, password=password)
         if not user:
             return response.Response(
                 {"detail": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED
             )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = UserClaimsRefreshToken.for_user(user)
         # Adjust refresh lifetime based on remember_me (e.g., 1 day vs 30 days)
         refresh.set_exp(
             lifetime=timedelta(days=30) if remember_me else timedelta(hours=8)
@@ -109,6 +155,7 @@ class LoginView(APIView):
 
 
 class ChangePasswordView(APIView):
+    authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
@@ -117,4 +164,5 @@ class ChangePasswordView(APIView):
         user = request.user
         user.set_password(ser.validated_data["new_password"])
         user.save(update_fields=["password"])
+        invalidate_user(user.id)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
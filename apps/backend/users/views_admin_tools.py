@@ -1,21 +1,25 @@
 import logging
 
-from django.contrib.auth import get_user_model
-from django.db import models, transaction
+from core.models import Task
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (api_view, authentication_classes,
+                                       permission_classes)
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from social.models import Album, Comment, Follow, Like, Photo, Post
-from todos.models import TodoItem, TodoList, TodoSubItem
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from .permissions import IsSuperUser
+from .purge import get_deletion_summary
+from .tasks import PurgeInProgress, enqueue_purge
+from .tasks import purge_non_admin_users as purge_task
 
-User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
 @api_view(["POST"])
+@authentication_classes([JWTAuthentication])  # superuser flag from the database
 @permission_classes([IsAuthenticated, IsSuperUser])
 def purge_non_admin_users(request):
     """
@@ -31,14 +35,22 @@ def purge_non_admin_users(request):
     {
         "confirm": "PURGE_NON_ADMIN_USERS",
         "keep": ["admin", "page_manager@example.com"],
-        "dry_run": false
+        "dry_run": false,
+        "estimate": false
     }
+
+    ``estimate`` makes the dry run scale counts from a sample of the users
+    instead of counting every row (see ``users.purge.get_deletion_summary``).
+
+    A real purge is queued as a background task (202 with ``task_id``);
+    poll ``purge-non-admin-users/<task_id>/`` for its progress.
     """
 
     # Validate request data
     confirm = request.data.get("confirm")
     keep_list = request.data.get("keep", [])
     dry_run = request.data.get("dry_run", True)  # Default to dry-run for safety
+    estimate = bool(request.data.get("estimate", False))
 
     # Safety check - require exact confirmation phrase
     if confirm != "PURGE_NON_ADMIN_USERS":
@@ -64,7 +76,7 @@ def purge_non_admin_users(request):
     try:
         if dry_run:
             # Dry run - just show what would be deleted
-            deletion_summary = get_deletion_summary(keep_list)
+            deletion_summary = get_deletion_summary(keep_list, estimate=estimate)
 
             # Log the dry run
             logger.info(
@@ -83,23 +95,34 @@ def purge_non_admin_users(request):
             )
 
         else:
-            # Actual purge
-            deletion_summary = purge_users(keep_list)
+            # Actual purge runs in the background (see users.purge)
+            try:
+                job = enqueue_purge(keep_list)
+            except PurgeInProgress as exc:
+                return Response(
+                    {
+                        "error": "Purge in progress",
+                        "message": "Another purge with a different keep list is "
+                        "queued or running; wait for it to finish",
+                        "task_id": exc.job.id,
+                        "status_url": reverse("purge_status", args=[exc.job.id]),
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
 
-            # Log the actual purge
             logger.warning(
-                f"PURGE_NON_ADMIN_USERS executed by {request.user.username} ({request.user.id}) "
-                f'from {request.META.get("REMOTE_ADDR", "unknown")}. '
-                f'Deleted {deletion_summary["users"]} users and {deletion_summary["total_related"]} related objects.'
+                f"PURGE_NON_ADMIN_USERS queued by {request.user.username} ({request.user.id}) "
+                f'from {request.META.get("REMOTE_ADDR", "unknown")} as task {job.id}.'
             )
 
             return Response(
                 {
-                    "mode": "executed",
-                    "message": "Purge completed successfully",
-                    "deleted": deletion_summary,
+                    "mode": "queued",
+                    "message": "Purge started in the background",
+                    "task_id": job.id,
+                    "status_url": reverse("purge_status", args=[job.id]),
                 },
-                status=status.HTTP_200_OK,
+                status=status.HTTP_202_ACCEPTED,
             )
 
     except Exception as e:
@@ -112,110 +135,20 @@ def purge_non_admin_users(request):
         )
 
 
-def get_deletion_summary(keep_list):
-    """Get summary of what would be deleted"""
-    # Users to preserve
-    preserved_users = get_preserved_users(keep_list)
-    preserved_user_ids = list(preserved_users.values_list("id", flat=True))
-
-    # Users to delete
-    users_to_delete = User.objects.exclude(id__in=preserved_user_ids)
-
-    # Count related objects
-    summary = {
-        "users": users_to_delete.count(),
-        "posts": Post.objects.filter(user__in=users_to_delete).count(),
-        "comments": Comment.objects.filter(user__in=users_to_delete).count(),
-        "likes": Like.objects.filter(user__in=users_to_delete).count(),
-        "albums": Album.objects.filter(user__in=users_to_delete).count(),
-        "photos": Photo.objects.filter(album__user__in=users_to_delete).count(),
-        "follows": Follow.objects.filter(
-            models.Q(follower__in=users_to_delete)
-            | models.Q(followed__in=users_to_delete)
-        ).count(),
-        "todo_lists": TodoList.objects.filter(user__in=users_to_delete).count(),
-        "todo_items": TodoItem.objects.filter(list__user__in=users_to_delete).count(),
-        "todo_sub_items": TodoSubItem.objects.filter(
-            parent__list__user__in=users_to_delete
-        ).count(),
-        "kept_users": preserved_users.count(),
-        "kept_usernames": list(preserved_users.values_list("username", flat=True)),
-    }
-
-    summary["total_related"] = (
-        summary["posts"]
-        + summary["comments"]
-        + summary["likes"]
-        + summary["albums"]
-        + summary["photos"]
-        + summary["follows"]
-        + summary["todo_lists"]
-        + summary["todo_items"]
-        + summary["todo_sub_items"]
+@api_view(["GET"])
+@authentication_classes([JWTAuthentication])  # superuser flag from the database
+@permission_classes([IsAuthenticated, IsSuperUser])
+def purge_status(request, task_id):
+    """Status and progress of a purge task."""
+    job = get_object_or_404(Task, pk=task_id, name=purge_task.name)
+    return Response(
+        {
+            "task_id": job.id,
+            "status": job.status,
+            "attempts": job.attempts,
+            "progress": job.progress,
+            "error": job.last_error if job.status == Task.FAILED else "",
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
     )
-
-    return summary
-
-
-def get_preserved_users(keep_list):
-    """Get users that should be preserved"""
-    preserved = User.objects.filter(is_superuser=True)
-
-    if keep_list:
-        # Add users from keep_list (by username or email)
-        keep_users = User.objects.filter(
-            models.Q(username__in=keep_list) | models.Q(email__in=keep_list)
-        )
-        preserved = preserved | keep_users
-
-    return preserved.distinct()
-
-
-def purge_users(keep_list):
-    """Actually delete the users and related content"""
-    with transaction.atomic():
-        # Get users to preserve
-        preserved_users = get_preserved_users(keep_list)
-        preserved_user_ids = list(preserved_users.values_list("id", flat=True))
-
-        # Get users to delete
-        users_to_delete = User.objects.exclude(id__in=preserved_user_ids)
-
-        # Delete in proper order to handle CASCADE relationships
-        # First, delete objects that might have PROTECT relationships
-
-        # Delete follows (both as follower and followed)
-        Follow.objects.filter(
-            models.Q(follower__in=users_to_delete)
-            | models.Q(followed__in=users_to_delete)
-        ).delete()
-
-        # Delete likes
-        Like.objects.filter(user__in=users_to_delete).delete()
-
-        # Delete comments
-        Comment.objects.filter(user__in=users_to_delete).delete()
-
-        # Delete photos (albums will cascade)
-        Photo.objects.filter(album__user__in=users_to_delete).delete()
-
-        # Delete albums
-        Album.objects.filter(user__in=users_to_delete).delete()
-
-        # Delete todo sub-items
-        TodoSubItem.objects.filter(parent__list__user__in=users_to_delete).delete()
-
-        # Delete todo items
-        TodoItem.objects.filter(list__user__in=users_to_delete).delete()
-
-        # Delete todo lists
-        TodoList.objects.filter(user__in=users_to_delete).delete()
-
-        # Delete posts
-        Post.objects.filter(user__in=users_to_delete).delete()
-
-        # Finally, delete the users
-        users_to_delete.delete()
-
-        # Get final summary
-        return get_deletion_summary(keep_list)
@@ -0,0 +1,124 @@
+"""
+Composite profile page: user, posts, albums, todo lists and follow status.
+
+The follow edge between the viewer and the profile owner is read once and
+every section's visibility is derived from it (the same rules as
+``/posts/?user_id=``, ``/albums/?user_id=`` and the todo endpoints). The
+sections then load concurrently; each returns its count, the first page and
+a ``next`` link into the regular paginated endpoint.
+"""
+
+import asyncio
+
+from core.async_api import alist, async_api_view
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Prefetch
+from django.urls import reverse
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from social.models import Album, Follow, Post
+from social.serializers import AlbumSerializer, PostSerializer
+from social.views import PostPagination
+from todos.models import TodoItem, TodoList
+from todos.serializers import TodoListSerializer
+
+from .policies import can_view_owned_by, can_view_profile
+from .serializers import UserSerializer
+
+User = get_user_model()
+
+
+async def _section(request, queryset, serializer_class, page_size, list_url):
+    count, rows = await asyncio.gather(queryset.acount(), alist(queryset[:page_size]))
+    next_url = None
+    if count > page_size:
+        next_url = replace_query_param(request.build_absolute_uri(list_url), "page", 2)
+    return {
+        "count": count,
+        "next": next_url,
+        "results": serializer_class(rows, many=True).data,
+    }
+
+
+async def _empty():
+    return {"count": 0, "next": None, "results": []}
+
+
+@async_api_view(replica=True)
+async def profile(request, pk):
+    viewer = request.user
+    owner, follow_status = await asyncio.gather(
+        User.objects.filter(pk=pk).afirst(),
+        Follow.objects.filter(follower=viewer, followed_id=pk)
+        .values_list("status", flat=True)
+        .afirst(),
+    )
+    if owner is None:
+        raise exceptions.NotFound("No User matches the given query.")
+
+    is_self = owner.id == viewer.id
+    following = follow_status == "accepted"
+    if is_self:
+        visibilities = None  # everything
+    elif following:
+        visibilities = ["public", "followers"]
+    else:
+        visibilities = ["public"]
+
+    posts = Post.objects.filter(user=owner).select_related("user")
+    albums = Album.objects.filter(user=owner).prefetch_related("photos")
+    if visibilities is not None:
+        posts = posts.filter(visibility__in=visibilities)
+        albums = albums.filter(visibility__in=visibilities)
+    posts = posts.annotate(
+        likes_count=Count("likes", distinct=True),
+        comments_count=Count("comments", distinct=True),
+    ).order_by("-created_at")
+    todo_lists = TodoList.objects.filter(user=owner).prefetch_related(
+        Prefetch(
+            "items",
+            queryset=TodoItem.objects.select_related("priority").prefetch_related(
+                "subitems"
+            ),
+        )
+    )
+
+    page_size = api_settings.PAGE_SIZE
+    owner_query = f"?user_id={owner.id}"
+    posts_data, albums_data, todos_data = await asyncio.gather(
+        _section(
+            request,
+            posts,
+            PostSerializer,
+            PostPagination.page_size,
+            reverse("post-list") + owner_query,
+        ),
+        _section(
+            request,
+            albums.order_by("-created_at"),
+            AlbumSerializer,
+            page_size,
+            reverse("album-list") + owner_query,
+        ),
+        (
+            _section(
+                request,
+                todo_lists,
+                TodoListSerializer,
+                page_size,
+                reverse("todo-list-list") + owner_query,
+            )
+            if can_view_owned_by(viewer, owner, following)
+            else _empty()
+        ),
+    )
+
+    return {
+        "user": UserSerializer(owner).data,
+        "follow_status": "self" if is_self else (follow_status or "none"),
+        "can_view_profile": can_view_profile(viewer, owner, following=following),
+        "posts": posts_data,
+        "albums": albums_data,
+        "todo_lists": todos_data,
+    }
@@ -0,0 +1,80 @@
+import { onBeforeUnmount } from 'vue'
+import { json } from '@/lib/http'
+import { useSessionStore } from '@/stores/session'
+
+type Handler = (data: any) => void
+
+// One EventSource per tab, shared by every component listening to /api/events/
+let source: EventSource | null = null
+let sourceToken = ''
+let retryTimer: ReturnType<typeof setTimeout> | undefined
+const handlers = new Map<string, Set<Handler>>()
+
+function dispatch(type: string, ev: MessageEvent) {
+  let data: any = null
+  try { data = JSON.parse(ev.data) } catch { return }
+  handlers.get(type)?.forEach(h => h(data))
+}
+
+// The stream is opened with a one-time ticket (EventSource cannot send the
+// Authorization header, and the token must not end up in URLs); a closed
+// stream needs a fresh ticket, since EventSource would replay the used one
+async function open(token: string) {
+  let ticket = ''
+  try {
+    ticket = (await json('/api/events/ticket/', { method: 'POST' })).ticket
+  } catch {
+    // No stream endpoint (WSGI) or the token expired: stay without live updates
+    return
+  }
+  if (sourceToken !== token || source) return
+  source = new EventSource(`/api/events/?ticket=${encodeURIComponent(ticket)}`)
+  handlers.forEach((_, type) => source!.addEventListener(type, ev => dispatch(type, ev as MessageEvent)))
+  source.onerror = () => {
+    if (source?.readyState !== EventSource.CLOSED) return
+    source = null
+    retryTimer = setTimeout(() => { if (sourceToken === token) open(token) }, 5000)
+  }
+}
+
+function connect(token: string) {
+  if (sourceToken === token) return
+  close()
+  sourceToken = token
+  open(token)
+}
+
+function close() {
+  clearTimeout(retryTimer)
+  source?.close()
+  source = null
+  sourceToken = ''
+}
+
+function disconnectIfIdle() {
+  for (const set of handlers.values()) if (set.size) return
+  close()
+}
+
+export function useEvents() {
+  const session = useSessionStore()
+  const owned: Array<[string, Handler]> = []
+
+  function on(type: string, handler: Handler) {
+    if (!session.access) return
+    if (!handlers.has(type)) {
+      handlers.set(type, new Set())
+      source?.addEventListener(type, ev => dispatch(type, ev as MessageEvent))
+    }
+    handlers.get(type)!.add(handler)
+    owned.push([type, handler])
+    connect(session.access)
+  }
+
+  onBeforeUnmount(() => {
+    owned.forEach(([type, handler]) => handlers.get(type)?.delete(handler))
+    disconnectIfIdle()
+  })
+
+  return { on }
+}
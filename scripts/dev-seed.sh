@@ -4,9 +4,17 @@ set -euo pipefail
 cd apps/backend
 source ../../.venv/bin/activate 2>/dev/null || true
 
+# SEED_FRESH=1 rebuilds the data through the ORM instead of the snapshot
+if [[ "${SEED_FRESH:-0}" == "1" ]]; then
+  rm -f "${SNAPSHOT_DIR:-snapshots}"/dev.*
+fi
+
 python manage.py migrate
-# deterministic dev users + demo data
-python manage.py create_dev_users || true
-python manage.py create_demo_users --count 20 || true
+# deterministic dev users + demo data (replaces the database contents):
+# restored from snapshots/dev.* when it matches the current migrations,
+# otherwise seeded once and saved there
+python manage.py snapshot restore dev \
+  --seed create_dev_users \
+  --seed "create_demo_users --count 20"
 
 echo "Seed completed."
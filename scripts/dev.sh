@@ -19,6 +19,13 @@ export VITE_API_BASE=${VITE_API_BASE:-http://localhost:8000}
   python manage.py runserver 8000
 ) &
 
+# Start the background task worker (core.tasks: notifications, photos, purge)
+(
+  cd apps/backend
+  source ../../.venv/bin/activate 2>/dev/null || true
+  python manage.py worker
+) &
+
 # Start frontend
 (
   cd apps/frontend